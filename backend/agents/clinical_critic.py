@@ -1,56 +1,104 @@
-from langchain_openai import ChatOpenAI
-from backend.state import CerinasState
-from dotenv import load_dotenv
-load_dotenv()
+from typing import Dict, List, Optional
 
-def clinical_critic_node(state: CerinasState) -> CerinasState:
+from backend.llm import complete
+from backend.metrics import metrics
+from backend.prompts import get_prompt
+from backend.sections import Section, changed_sections, matches_heading, split_sections
+from backend.state import CerinasState, SectionCritique
+from backend.structured import ClinicalCritique, parse_structured
+
+
+async def _llm_critique(text: str, partial: bool) -> Optional[ClinicalCritique]:
+    scope = (
+        "these revised sections of a CBT exercise (the rest was already reviewed)"
+        if partial
+        else "this CBT exercise"
+    )
+    system, critique_prompt = get_prompt("clinical_critic").render(scope=scope, text=text)
+
+    response = (await complete(
+        "clinical_critic", critique_prompt, schema=ClinicalCritique, system=system
+    )).text
+    return parse_structured(
+        "clinical_critic", response, ClinicalCritique, fallback=ClinicalCritique.from_labeled_text
+    )
+
+
+def _aggregate(sections: List[Section], reviews: Dict[str, SectionCritique]):
+    """Length-weighted empathy score plus de-duplicated issues and suggestions."""
+    total = sum(len(section.text) for section in sections) or 1
+    empathy_score = round(
+        sum(reviews[s.digest].empathy_score * len(s.text) for s in sections) / total, 1
+    )
+    tone_issues: List[str] = []
+    suggestions: List[str] = []
+    for section in sections:
+        review = reviews[section.digest]
+        tone_issues.extend(i for i in review.tone_issues if i not in tone_issues)
+        if review.suggestions and review.suggestions not in suggestions:
+            suggestions.append(review.suggestions)
+    return empathy_score, tone_issues, "\n".join(suggestions)
+
+
+async def clinical_critic_node(state: CerinasState) -> dict:
     """
     Clinical Critic: Evaluates tone, empathy, and CBT alignment.
+
+    Reviews are kept per draft section (backend/sections.py); on later
+    iterations only sections the drafter changed are critiqued again and
+    the scores are combined weighted by section length.
     """
-    llm = ChatOpenAI(model="gpt-4o-mini", temperature=0.7)
-    
-    critique_prompt = f"""
-    As a clinical psychologist, critique this CBT exercise:
-    
-    {state.current_draft}
-    
-    Evaluate:
-    1. Empathy: Does it feel supportive without being patronizing?
-    2. Clarity: Is it easy to understand and follow?
-    3. CBT Alignment: Does it follow cognitive-behavioral principles?
-    4. Tone: Is it warm and non-judgmental?
-    5. Actionability: Can someone actually do this?
-    
-    Provide:
-    - Overall empathy score (0-100)
-    - Top 3 tone issues (if any)
-    - Specific suggestions for improvement
-    
-    Be constructive. Format as:
-    EMPATHY_SCORE: [number]
-    TONE_ISSUES: [comma-separated list]
-    SUGGESTIONS: [detailed paragraph]
-    """
-    
-    response = llm.invoke(critique_prompt).content
-    
-    # Parse response
-    try:
-        lines = response.split("\n")
-        for line in lines:
-            if line.startswith("EMPATHY_SCORE:"):
-                state.empathy_score = float(line.split(":").strip())
-            elif line.startswith("TONE_ISSUES:"):
-                issues_str = line.split(":", 1).strip()
-                state.tone_issues = [i.strip() for i in issues_str.split(",") if i.strip()]
-            elif line.startswith("SUGGESTIONS:"):
-                state.clinical_feedback = line.split(":", 1).strip()
-    except:
-        state.empathy_score = 75
-        state.clinical_feedback = "Review for tone and clarity improvements."
-    
-    state.agent_notes.setdefault("clinical_critic", []).append(
-        f"Empathy score: {state.empathy_score}. Issues: {len(state.tone_issues)}"
-    )
-    
-    return state
+    sections = split_sections(state.current_draft)
+    reviewed = state.critic_section_reviews
+    changed = changed_sections(sections, reviewed)
+    reviews = {s.digest: reviewed[s.digest] for s in sections if s.digest in reviewed}
+    metrics.inc("reviews.sections_reused.clinical_critic", len(reviews))
+    metrics.inc("reviews.sections_audited.clinical_critic", len(changed))
+
+    if changed:
+        partial = len(changed) < len(sections)
+        text = (
+            "\n\n".join(section.text for section in changed)
+            if partial
+            else state.current_draft
+        )
+        critique = await _llm_critique(text, partial)
+
+        if critique is None:
+            # Keep the previous review rather than inventing a score
+            return {
+                "clinical_review_failed": True,
+                "agent_notes": {
+                    "clinical_critic": [
+                        "Critique response could not be parsed; keeping previous review"
+                    ]
+                },
+            }
+
+        # Attach issues to the sections the critic named (all of them if it
+        # named none we can find), so the drafter can patch just those
+        targeted = [s for s in changed if matches_heading(s, critique.sections)] or changed
+        for section in changed:
+            has_issues = section in targeted
+            reviews[section.digest] = SectionCritique(
+                empathy_score=critique.empathy_score,
+                tone_issues=critique.tone_issues if has_issues else [],
+                suggestions=critique.suggestions if has_issues else "",
+            )
+
+    empathy_score, tone_issues, clinical_feedback = _aggregate(sections, reviews)
+
+    # Return only the fields this node changed
+    return {
+        "empathy_score": empathy_score,
+        "tone_issues": tone_issues,
+        "clinical_feedback": clinical_feedback,
+        "clinical_review_failed": False,
+        "critic_section_reviews": reviews,
+        "agent_notes": {
+            "clinical_critic": [
+                f"Empathy score: {empathy_score}. Issues: {len(tone_issues)} "
+                f"({len(changed)}/{len(sections)} sections reviewed)"
+            ]
+        },
+    }
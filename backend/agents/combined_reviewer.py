@@ -0,0 +1,71 @@
+from backend.agents.safety_guardian import flags_by_section, score_safety, to_safety_flags
+from backend.llm import complete
+from backend.prompts import get_prompt
+from backend.sections import matches_heading, split_sections
+from backend.state import CerinasState, SectionCritique
+from backend.structured import CombinedReview, parse_structured
+
+
+async def combined_reviewer_node(state: CerinasState) -> dict:
+    """
+    Combined Reviewer: safety audit and clinical critique in one call.
+
+    Used by the "fast" review mode in place of the Safety Guardian and
+    Clinical Critic; writes the same state fields as both. It always reviews
+    the whole draft, but fills the per-section maps the same way so the
+    drafter's patch mode can target the flagged sections.
+    """
+    system, review_prompt = get_prompt("combined_reviewer").render(draft=state.current_draft)
+    
+    response = (await complete(
+        "combined_reviewer", review_prompt, schema=CombinedReview, system=system
+    )).text
+    review = parse_structured("combined_reviewer", response, CombinedReview)
+    
+    if review is None:
+        # An unreadable review is not a clean review: keep the previous results
+        return {
+            "safety_review_failed": True,
+            "clinical_review_failed": True,
+            "agent_notes": {
+                "combined_reviewer": [
+                    "Review response could not be parsed; keeping previous results"
+                ]
+            },
+        }
+    
+    safety_flags = to_safety_flags(state.current_draft, review.issues)
+    safety_score = score_safety(safety_flags)
+    
+    sections = split_sections(state.current_draft)
+    section_flags, _ = flags_by_section(sections, safety_flags)
+    # As in the Clinical Critic: tone issues go to the sections the reviewer
+    # named, or to every section if it named none we can find
+    targeted = [s for s in sections if matches_heading(s, review.sections)] or sections
+    section_reviews = {
+        section.digest: SectionCritique(
+            empathy_score=review.empathy_score,
+            tone_issues=review.tone_issues if section in targeted else [],
+            suggestions=review.suggestions if section in targeted else "",
+        )
+        for section in sections
+    }
+    
+    # Return only the fields this node changed
+    return {
+        "safety_flags": safety_flags,
+        "safety_score": safety_score,
+        "empathy_score": review.empathy_score,
+        "tone_issues": review.tone_issues,
+        "clinical_feedback": review.suggestions,
+        "safety_review_failed": False,
+        "clinical_review_failed": False,
+        "safety_section_flags": section_flags,
+        "critic_section_reviews": section_reviews,
+        "agent_notes": {
+            "combined_reviewer": [
+                f"Review complete. Safety score: {safety_score}. Issues: {len(safety_flags)}. "
+                f"Empathy score: {review.empathy_score}. Tone issues: {len(review.tone_issues)}"
+            ]
+        },
+    }
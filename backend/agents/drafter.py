@@ -1,5 +1,5 @@
 # from langchain_openai import ChatOpenAI
-# from backend.state import CerinasState, DraftVersion
+# from backend.state import CerinasState, DraftVersion, SafetyFlag
 # from datetime import datetime
 # from dotenv import load_dotenv
 # load_dotenv()
@@ -55,27 +55,110 @@
 #     return state
 
 
-from langchain_openai import ChatOpenAI
-from backend.state import CerinasState, DraftVersion
+from typing import List, Optional
+
+from backend.config import settings
+from backend.llm import complete
+from backend.metrics import metrics
+from backend.prompts import get_prompt
+from backend.sections import Section, diff_summary, section_for_line, splice, split_sections
+from backend.state import CerinasState, DraftVersion, SafetyFlag
+from backend.structured import SEVERITIES, DraftPatch, parse_structured
+from backend.tokens import trim_to_budget
 from datetime import datetime
 
 
-def drafter_node(state: CerinasState) -> CerinasState:
+def _by_severity(flags: List[SafetyFlag]) -> List[SafetyFlag]:
+    """Most severe first, so trimming to the feedback budget drops the least important."""
+    rank = {severity: index for index, severity in enumerate(SEVERITIES)}
+    return sorted(flags, key=lambda flag: rank.get(flag.severity, len(SEVERITIES)))
+
+
+def _patch_targets(state: CerinasState, sections: List[Section]) -> Optional[List[Section]]:
     """
-    Drafter: Creates or improves CBT exercise drafts.
-    
-    Incorporates feedback from Safety Guardian and Clinical Critic.
+    Sections to regenerate in patch mode, or None for a full rewrite.
+
+    A section is targeted when it holds a safety flag or the critic attached
+    tone issues to it. Falls back to a full rewrite when there is no previous
+    draft, a flag cannot be located, nothing is targeted or the targets make
+    up most of the draft.
     """
-    llm = ChatOpenAI(
-        model="gpt-4o-mini",
-        temperature=0.7
+    if not settings.drafter_patch_mode or not state.current_draft or not sections:
+        return None
+
+    targets = set()
+    for flag in state.safety_flags:
+        section = section_for_line(sections, flag.line_num)
+        if section is None:
+            return None
+        targets.add(section.digest)
+    for section in sections:
+        review = state.critic_section_reviews.get(section.digest)
+        if review is not None and review.tone_issues:
+            targets.add(section.digest)
+
+    chosen = [section for section in sections if section.digest in targets]
+    chosen_chars = sum(len(section.text) for section in chosen)
+    if not chosen or chosen_chars > settings.drafter_patch_max_fraction * len(state.current_draft):
+        return None
+    return chosen
+
+
+async def _patch(state: CerinasState, sections: List[Section], targets: List[Section]) -> Optional[str]:
+    """Regenerate only `targets` and splice them into the current draft."""
+    feedback = ""
+    for section in targets:
+        flags = [
+            flag for flag in state.safety_flags
+            if section.start_line <= flag.line_num <= section.end_line
+        ]
+        review = state.critic_section_reviews.get(section.digest)
+        if not flags and (review is None or not review.tone_issues):
+            continue
+        feedback += f"\n## Feedback for section {sections.index(section)}:\n"
+        for flag in _by_severity(flags):
+            feedback += f"- Safety ({flag.severity}): {flag.issue}\n  → Fix: {flag.suggestion}\n"
+        if review is not None and review.tone_issues:
+            feedback += f"- Tone: {', '.join(review.tone_issues)}\n"
+            if review.suggestions:
+                feedback += f"  → {review.suggestions}\n"
+
+    feedback = trim_to_budget(feedback, settings.drafter_feedback_token_budget)
+
+    excerpts = "\n\n".join(
+        f"SECTION {sections.index(section)}:\n{section.text}\nEND SECTION {sections.index(section)}"
+        for section in targets
     )
-    
+
+    system, prompt = get_prompt("drafter_patch").render(
+        user_intent=state.user_intent, feedback=feedback, excerpts=excerpts
+    )
+
+    response = (await complete("drafter", prompt, schema=DraftPatch, system=system)).text
+    # A patch cut off at the output ceiling would splice half a section in;
+    # fall back to a full rewrite instead
+    patch = parse_structured("drafter", response, DraftPatch, allow_recovered=False)
+    if patch is None:
+        return None
+
+    by_index = {sections.index(section): section for section in targets}
+    replacements = {
+        by_index[item.index]: item.text
+        for item in patch.sections
+        if item.index in by_index and item.text.strip()
+    }
+    if not replacements:
+        return None
+    return splice(state.current_draft, replacements)
+
+
+async def _rewrite(state: CerinasState) -> str:
+    """Generate a complete draft, improving on the previous one if any."""
     # Build context from feedback
     feedback_context = ""
     if state.safety_flags:
         feedback_context += "\n## Safety Issues to Address (CRITICAL):\n"
-        for flag in state.safety_flags:
+        for flag in _by_severity(state.safety_flags):
             feedback_context += f"- {flag.issue}\n  → Fix: {flag.suggestion}\n"
     
     # FIXED: Safely handle feedback as list or string
@@ -84,30 +167,40 @@ def drafter_node(state: CerinasState) -> CerinasState:
         clinical_feedback = " ".join([str(item) for item in clinical_feedback if item])
     if clinical_feedback and isinstance(clinical_feedback, str) and clinical_feedback.strip():
         feedback_context += f"\n## Clinical Feedback from Reviewer:\n{clinical_feedback}\n"
+    feedback_context = trim_to_budget(feedback_context, settings.drafter_feedback_token_budget)
     
     previous_draft_context = ""
     if state.current_draft:
         previous_draft_context = f"\n\nPrevious draft (iteration {len(state.draft_history)}):\n{state.current_draft}\n\nImprove upon this, addressing all feedback above."
     
-    prompt = f"""You are the Drafter Agent. Your role is to create safe, empathetic, and evidence-based CBT exercises.
-
-THERAPEUTIC GOAL: {state.user_intent}
-
-{feedback_context}
-
-{previous_draft_context}
+    system, prompt = get_prompt("drafter_rewrite").render(
+        user_intent=state.user_intent,
+        feedback_context=feedback_context,
+        previous_draft_context=previous_draft_context,
+    )
+    
+    return (await complete("drafter", prompt, system=system)).text
 
-Generate a CBT exercise that:
-1. ✓ Directly addresses the therapeutic goal
-2. ✓ Is structured with clear sections (Context, Steps, Reflection)
-3. ✓ Is warm and empathetic (non-judgmental tone)
-4. ✓ Is safe (no self-harm encouragement, no medical advice)
-5. ✓ Is actionable (client can actually do it)
-6. ✓ Is evidence-based (follows CBT principles)
 
-Return ONLY the exercise, no explanations or metadata."""
+async def drafter_node(state: CerinasState) -> dict:
+    """
+    Drafter: Creates or improves CBT exercise drafts.
     
-    draft = llm.invoke(prompt).content
+    Incorporates feedback from Safety Guardian and Clinical Critic. In patch
+    mode only the sections with feedback are regenerated and spliced back.
+    """
+    sections = split_sections(state.current_draft)
+    targets = _patch_targets(state, sections)
+    draft = await _patch(state, sections, targets) if targets else None
+    
+    if draft is not None:
+        metrics.inc("drafter.patches")
+        headings = ", ".join(section.heading.lstrip("#* ").rstrip("*:") for section in targets)
+        change = f"patched {len(targets)}/{len(sections)} sections ({headings})"
+    else:
+        metrics.inc("drafter.rewrites")
+        draft = await _rewrite(state)
+        change = "full rewrite" if state.current_draft else "first draft"
     
     # Track version
     version = DraftVersion(
@@ -115,13 +208,16 @@ Return ONLY the exercise, no explanations or metadata."""
         content=draft,
         created_at=datetime.utcnow(),
         created_by="drafter",
-        notes=f"Iteration {state.iteration_count}"
+        notes=f"Iteration {state.iteration_count}",
+        diff_summary=f"{change}: {diff_summary(state.current_draft, draft)}",
     )
-    state.draft_history.append(version)
-    state.current_draft = draft
-    
-    state.agent_notes.setdefault("drafter", []).append(
-        f"✍ Draft v{version.version_num} created (iteration {state.iteration_count})"
-    )
-    
-    return state
\ No newline at end of file
+    return {
+        "draft_history": [version],
+        "current_draft": draft,
+        "agent_notes": {
+            "drafter": [
+                f"✍ Draft v{version.version_num} created (iteration {state.iteration_count}): "
+                f"{version.diff_summary}"
+            ]
+        },
+    }
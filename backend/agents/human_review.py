@@ -0,0 +1,33 @@
+from langgraph.types import interrupt
+from backend.state import CerinasState
+
+
+async def human_review_node(state: CerinasState) -> dict:
+    """
+    Human Review: Pauses the graph until a reviewer decides.
+
+    Generation stops cleanly at the interrupt; the thread is resumed with
+    Command(resume={"human_approval": ..., "human_edits": ...}).
+    """
+    decision = interrupt(
+        {
+            "current_draft": state.current_draft,
+            "safety_score": state.safety_score,
+            "empathy_score": state.empathy_score,
+            "iteration_count": state.iteration_count,
+        }
+    )
+
+    human_approval = bool(decision.get("human_approval", False))
+    human_edits = decision.get("human_edits") or ""
+
+    if human_approval:
+        note = "✔ Approved by reviewer" + (" with edits" if human_edits else "")
+    else:
+        note = "✖ Not approved by reviewer, awaiting another review"
+
+    return {
+        "human_approval": human_approval,
+        "human_edits": human_edits,
+        "agent_notes": {"human_review": [note]},
+    }
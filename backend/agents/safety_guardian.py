@@ -1,70 +1,200 @@
-from langchain_openai import ChatOpenAI
+from typing import Dict, List, Optional, Tuple
+
+from backend.config import settings
+from backend.llm import complete
+from backend.metrics import metrics
+from backend.prompts import get_prompt
+from backend.safety_lexicon import PrescreenResult, prescreen
+from backend.sections import Section, changed_sections, section_for_line, split_sections
 from backend.state import CerinasState, SafetyFlag
-import re
-from dotenv import load_dotenv
-load_dotenv()
+from backend.structured import SafetyAudit, SafetyIssue, parse_structured
+
+
+def _line_number(draft: str, line: str) -> int:
+    """1-based draft line for the reviewer's line/section reference, 0 if unknown."""
+    line = line.strip()
+    if line.isdigit():
+        return int(line)
+    if line:
+        for number, text in enumerate(draft.splitlines(), start=1):
+            if line.lower() in text.lower():
+                return number
+    return 0
+
+
+def to_safety_flags(draft: str, issues: List[SafetyIssue]) -> List[SafetyFlag]:
+    return [
+        SafetyFlag(
+            line_num=_line_number(draft, issue.line),
+            severity=issue.severity,
+            issue=issue.issue,
+            suggestion=issue.suggestion
+        )
+        for issue in issues
+    ]
+
+
+def score_safety(safety_flags: List[SafetyFlag]) -> float:
+    critical_count = sum(1 for f in safety_flags if f.severity == "critical")
+    moderate_count = sum(1 for f in safety_flags if f.severity == "moderate")
+    return max(0, 100 - (critical_count * 30 + moderate_count * 10))
 
-def safety_guardian_node(state: CerinasState) -> CerinasState:
+
+def _in_sections(sections: List[Section], line_num: int) -> bool:
+    return any(section.start_line <= line_num <= section.end_line for section in sections)
+
+
+def _to_section_lines(flag: SafetyFlag, section: Section) -> SafetyFlag:
+    """Store flags with 1-based section-relative lines; 0 (unknown) stays 0."""
+    if not section.start_line <= flag.line_num <= section.end_line:
+        return flag.model_copy(update={"line_num": 0})
+    return flag.model_copy(update={"line_num": flag.line_num - section.start_line + 1})
+
+
+def _to_draft_lines(flag: SafetyFlag, section: Section) -> SafetyFlag:
+    if not flag.line_num:
+        return flag
+    return flag.model_copy(update={"line_num": flag.line_num + section.start_line - 1})
+
+
+def flags_by_section(
+    sections: List[Section], flags: List[SafetyFlag]
+) -> Tuple[Dict[str, List[SafetyFlag]], List[SafetyFlag]]:
     """
-    Safety Guardian: Audits draft for harmful content.
+    Flags keyed by the digest of the section holding them, with
+    section-relative lines, plus the flags no section holds (line set to 0).
     """
-    llm = ChatOpenAI(model="gpt-4o-mini", temperature=0)
-    
-    audit_prompt = f"""
-    Review this CBT exercise for safety concerns:
-    
-    {state.current_draft}
-    
-    Check for:
-    1. Self-harm encouragement
-    2. Dangerous medical advice
-    3. Pressure or coercion
-    4. Victim-blaming language
-    5. Overly complex for someone in crisis
-    
-    For each issue found:
-    - Specify the line/section
-    - Severity: critical, moderate, or low
-    - Explanation
-    - Suggestion for fix
+    located: Dict[str, List[SafetyFlag]] = {section.digest: [] for section in sections}
+    unlocated = []
+    for flag in flags:
+        section = section_for_line(sections, flag.line_num)
+        if section is None:
+            unlocated.append(flag.model_copy(update={"line_num": 0}))
+        else:
+            located[section.digest].append(_to_section_lines(flag, section))
+    return located, unlocated
+
+
+async def _llm_audit(text: str) -> Optional[SafetyAudit]:
+    system, audit_prompt = get_prompt("safety_guardian").render(text=text)
+
+    response = (await complete("safety_guardian", audit_prompt, schema=SafetyAudit, system=system)).text
+    return parse_structured("safety_guardian", response, SafetyAudit)
+
+
+async def safety_guardian_node(state: CerinasState) -> dict:
+    """
+    Safety Guardian: Audits draft for harmful content.
     
-    Format as JSON array:
-    [
-      {{"line": "...", "severity": "critical", "issue": "...", "suggestion": "..."}},
-      ...
-    ]
+    A lexical pre-screen (backend/safety_lexicon.py) runs first. Its matches
+    are hints: the LLM audits the whole draft with the matched lines pointed
+    out, or only the matched spans when CERINA_SAFETY_PRESCREEN_SCOPE=spans,
+    and its findings are the result. Only the pre-screen's few definitive
+    phrases are reported without an LLM call.
     
-    If no issues, return: []
+    Results are kept per draft section (backend/sections.py); on later
+    iterations only sections the drafter changed are audited again.
     """
+    draft = state.current_draft
+    screen = prescreen(draft) if settings.safety_prescreen_enabled else PrescreenResult([])
+    metrics.inc("safety.prescreen.matches", len(screen.flags))
     
-    response = llm.invoke(audit_prompt).content
+    if screen.definitive:
+        metrics.inc("safety.prescreen.definitive")
+        safety_score = score_safety(screen.definitive)
+        return {
+            "safety_flags": screen.definitive,
+            "safety_score": safety_score,
+            "safety_review_failed": False,
+            # Section audits no longer describe the reported flags; the next
+            # LLM audit covers the whole draft
+            "safety_section_flags": {},
+            "agent_notes": {
+                "safety_guardian": [
+                    f"Pre-screen found explicit self-harm language; LLM audit skipped. "
+                    f"Safety score: {safety_score}. Issues: {len(screen.definitive)}"
+                ]
+            },
+        }
     
-    # Parse response (with error handling)
-    try:
-        import json
-        issues = json.loads(response)
-        
-        state.safety_flags = [
-            SafetyFlag(
-                line_num=i,
-                severity=issue.get("severity", "low"),
-                issue=issue.get("issue", ""),
-                suggestion=issue.get("suggestion", "")
+    # Only sections whose content changed since the last audit go to the LLM
+    sections = split_sections(draft)
+    reviewed = state.safety_section_flags
+    changed = changed_sections(sections, reviewed)
+    section_flags = {
+        section.digest: reviewed[section.digest]
+        for section in sections
+        if section.digest in reviewed
+    }
+    metrics.inc("reviews.sections_reused.safety_guardian", len(section_flags))
+    metrics.inc("reviews.sections_audited.safety_guardian", len(changed))
+    audited = {}
+    unlocated: List[SafetyFlag] = []
+    
+    if changed:
+        suspicious = PrescreenResult(
+            [flag for flag in screen.flags if _in_sections(changed, flag.line_num)]
+        )
+        if settings.safety_prescreen_scope == "spans":
+            text = (
+                "(Excerpts flagged by a lexical pre-screen, prefixed with their line numbers)\n"
+                + suspicious.spans(draft)
+            ) if suspicious.flags else ""
+            if not suspicious.flags:
+                metrics.inc("safety.prescreen.cleared")
+        elif len(changed) == len(sections):
+            text = draft
+        else:
+            text = (
+                "(Revised sections only, prefixed with their line numbers)\n"
+                + "\n".join(section.numbered() for section in changed)
+            )
+        if text and suspicious.flags:
+            text += (
+                "\n\n(A lexical pre-screen matched the lines below. Report them only if they "
+                "are actually unsafe: psychoeducation, idioms and quoted thoughts are not issues.)\n"
+                + suspicious.hints(draft)
             )
-            for i, issue in enumerate(issues)
-        ]
         
-        # Calculate safety score
-        critical_count = sum(1 for f in state.safety_flags if f.severity == "critical")
-        moderate_count = sum(1 for f in state.safety_flags if f.severity == "moderate")
-        state.safety_score = max(0, 100 - (critical_count * 30 + moderate_count * 10))
+        audit = await _llm_audit(text) if text else SafetyAudit()
+        if audit is None:
+            # An unreadable audit is not a clean audit: keep the previous result
+            return {
+                "safety_review_failed": True,
+                "agent_notes": {
+                    "safety_guardian": [
+                        "Audit response could not be parsed; keeping previous safety result"
+                    ]
+                },
+            }
         
-    except json.JSONDecodeError:
-        state.safety_flags = []
-        state.safety_score = 100
+        audited, unlocated = flags_by_section(changed, to_safety_flags(draft, audit.issues))
+        if unlocated:
+            metrics.inc("safety.unlocated_flags", len(unlocated))
     
-    state.agent_notes.setdefault("safety_guardian", []).append(
-        f"Audit complete. Safety score: {state.safety_score}. Issues: {len(state.safety_flags)}"
-    )
+    located = {**section_flags, **audited}
+    safety_flags = [
+        _to_draft_lines(flag, section)
+        for section in sections
+        for flag in located[section.digest]
+    ] + unlocated
+    if not unlocated:
+        section_flags = located
+    # Otherwise this audit is not cached: a flag outside the audited sections
+    # cannot be attributed to one, its line 0 makes the drafter rewrite the
+    # whole draft, and the changed sections are audited again next time
+    safety_score = score_safety(safety_flags)
     
-    return state
+    # Return only the fields this node changed
+    return {
+        "safety_flags": safety_flags,
+        "safety_score": safety_score,
+        "safety_review_failed": False,
+        "safety_section_flags": section_flags,
+        "agent_notes": {
+            "safety_guardian": [
+                f"Audit complete ({len(changed)}/{len(sections)} sections audited). "
+                f"Safety score: {safety_score}. Issues: {len(safety_flags)}"
+            ]
+        },
+    }
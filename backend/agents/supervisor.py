@@ -44,74 +44,64 @@
 #     return state
 
 
-from langchain_openai import ChatOpenAI
-from backend.state import CerinasState
+from backend.convergence import convergence_policy
+from backend.llm import complete
+from backend.metrics import metrics
+from backend.prompts import get_prompt
+from backend.state import CerinasState, ScoreSnapshot
 
 
-def supervisor_node(state: CerinasState) -> CerinasState:
+async def supervisor_node(state: CerinasState) -> dict:
     """
     Supervisor: Orchestrates task routing and halts.
     
     Decides:
     - On iteration 0: Parse intent and route to drafter
-    - On subsequent iterations: Decide to loop or halt
+    - On subsequent iterations: Decide to loop or halt (see backend/convergence.py)
     """
-    llm = ChatOpenAI(
-        model="gpt-4o-mini",
-        temperature=0
-    )
+    update = {}
+    notes = []
     
     if state.iteration_count == 0:
         # Initial parse
-        prompt = f"""
-You are the Supervisor Agent for a CBT exercise generation system.
-
-User therapeutic goal: {state.user_intent}
-
-Your role is to:
-1. Understand the therapeutic intent
-2. Ensure the goal is clear and achievable
-3. Set the stage for a thorough drafting process
-
-Respond with: READY_TO_DRAFT
-
-User intent: {state.user_intent}
-"""
-        response = llm.invoke(prompt)
+        system, prompt = get_prompt("supervisor").render(user_intent=state.user_intent)
+        response = await complete("supervisor", prompt, system=system)
         
-        state.agent_notes.setdefault("supervisor", []).append(
-            f"✓ Parsed intent: '{state.user_intent}' - Ready to draft"
-        )
-        state.status = "drafting"
+        notes.append(f"✓ Parsed intent: '{state.user_intent}' - Ready to draft")
+        update["status"] = "drafting"
     else:
-        # Decision point: loop or halt?
-        has_critical_safety_issues = any(
-            flag.severity == "critical" for flag in state.safety_flags
+        # Decision point: loop or halt? Record this round's scores and let
+        # the convergence policy decide whether another iteration is worth it
+        snapshot = ScoreSnapshot(
+            iteration=state.iteration_count,
+            safety_score=state.safety_score,
+            empathy_score=state.empathy_score,
         )
+        update["score_history"] = [snapshot]
+        decision = convergence_policy.evaluate(state, state.score_history + [snapshot])
+        metrics.inc(f"convergence.{decision.rule}")
         
-        # FIXED: Safely handle clinical_feedback (list or string)
-        clinical_feedback = state.clinical_feedback or ""
-        if isinstance(clinical_feedback, list):
-            clinical_feedback = " ".join([str(item) for item in clinical_feedback if item])
-        elif not isinstance(clinical_feedback, str):
-            clinical_feedback = ""
-        
-        # Strip safely only if it's a string
-        has_clinical_feedback = bool(clinical_feedback.strip()) if clinical_feedback else False
-        
-        if (has_critical_safety_issues or has_clinical_feedback) and state.iteration_count < state.max_iterations:
+        if decision.rule == "review_failed":
+            # Review the same draft again rather than redrafting blind
+            notes.append(
+                f"↻ Iteration {state.iteration_count}: {decision.detail} ({decision.rule}). Routing back to review"
+            )
+            update["status"] = "reviewing"
+        elif not decision.halt:
             # Route back to drafter for improvements
-            state.agent_notes.setdefault("supervisor", []).append(
-                f"↻ Iteration {state.iteration_count}: Critical issues found. Routing to Drafter for improvements"
+            notes.append(
+                f"↻ Iteration {state.iteration_count}: {decision.detail} ({decision.rule}). Routing to Drafter for improvements"
             )
-            state.status = "drafting"
+            update["status"] = "drafting"
         else:
-            # Halt for human review
-            state.halted_for_human = True
-            state.status = "halted"
-            state.agent_notes.setdefault("supervisor", []).append(
-                f"⏸ Max iterations ({state.iteration_count}) reached or no further improvements needed. Halting for human review"
+            # Halt for human review; the reviewed draft goes straight to the gate
+            update["halted_for_human"] = True
+            update["status"] = "halted"
+            notes.append(
+                f"⏸ Halting for human review at iteration {state.iteration_count}: {decision.detail} (rule: {decision.rule})"
             )
     
-    state.iteration_count += 1
-    return state
\ No newline at end of file
+    if not update.get("halted_for_human"):
+        update["iteration_count"] = state.iteration_count + 1
+    update["agent_notes"] = {"supervisor": notes}
+    return update
\ No newline at end of file
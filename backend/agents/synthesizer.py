@@ -1,39 +1,24 @@
-from langchain_openai import ChatOpenAI
+from backend.llm import complete
+from backend.prompts import get_prompt
 from backend.state import CerinasState
-from dotenv import load_dotenv
-load_dotenv()
-def synthesizer_node(state: CerinasState) -> CerinasState:
+
+
+async def synthesizer_node(state: CerinasState) -> dict:
     """
     Synthesizer: Finalizes the protocol with all feedback incorporated.
     """
     if not state.human_approval:
         # Not yet approved, skip
-        return state
-    
-    llm = ChatOpenAI(model="gpt-4o-mini", temperature=0.5)
+        return {}
     
     # Incorporate human edits
     draft_to_finalize = state.human_edits if state.human_edits else state.current_draft
     
-    finalize_prompt = f"""
-    Finalize this CBT exercise for delivery to a client. 
-    Polish for tone, clarity, and formatting.
-    
-    Current draft:
-    {draft_to_finalize}
-    
-    Guidelines:
-    - Keep it warm and accessible
-    - Use clear headers
-    - Add a closing affirmation
-    - Ensure it's printable
-    
-    Return the final protocol only.
-    """
-    
-    final = llm.invoke(finalize_prompt).content
-    state.final_protocol = final
-    state.status = "finalized"
-    state.agent_notes.setdefault("synthesizer", []).append("Protocol finalized")
+    system, finalize_prompt = get_prompt("synthesizer").render(draft=draft_to_finalize)
     
-    return state
+    final = (await complete("synthesizer", finalize_prompt, system=system)).text
+    return {
+        "final_protocol": final,
+        "status": "finalized",
+        "agent_notes": {"synthesizer": ["Protocol finalized"]},
+    }
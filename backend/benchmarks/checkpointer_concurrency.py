@@ -0,0 +1,186 @@
+"""
+Checkpointer concurrency benchmark: single connection vs pooled savers.
+
+Runs N LangGraph threads through the Cerina graph in parallel (generate to
+the review halt, then approve) against the fake LLM backend while reader
+tasks poll `aget_state` on threads in flight, then reads the same threads
+back with `get_state` from parallel OS threads through the sync saver (the
+FastAPI threadpool path). Each variant uses a fresh checkpoint database:
+
+- single: AsyncSqliteSaver / SqliteSaver, one connection behind one lock
+- pooled: PooledAsyncSqliteSaver / PooledSqliteSaver (backend/checkpointer.py)
+
+Usage:
+    python -m backend.benchmarks.checkpointer_concurrency --threads 40 --concurrency 20 --readers 8
+    python -m backend.benchmarks.checkpointer_concurrency --variants pooled --os-threads 16
+"""
+import argparse
+import asyncio
+import os
+import random
+import sqlite3
+import tempfile
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from backend.metrics import Histogram
+
+
+def _configure(args):
+    """Environment must be set before any backend module reads settings."""
+    os.environ["CERINA_LLM_BACKEND"] = "fake"
+    os.environ["CERINA_LLM_CACHE_ENABLED"] = "false"
+    os.environ["CERINA_FAKE_LLM_LATENCY_DISTRIBUTION"] = "fixed"
+    os.environ["CERINA_FAKE_LLM_LATENCY_MS"] = str(args.latency_ms)
+    os.environ["CERINA_FAKE_LLM_SEED"] = "7"
+    os.chdir(tempfile.mkdtemp(prefix="cerina-bench-"))
+
+
+async def _open_savers(variant: str, path: str):
+    import aiosqlite
+    from langgraph.checkpoint.sqlite import SqliteSaver
+    from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+    from backend.checkpointer import PooledAsyncSqliteSaver, PooledSqliteSaver
+    from backend.config import settings
+    from backend.database import sqlite_pragmas
+
+    if variant == "pooled":
+        saver = await PooledAsyncSqliteSaver.connect(
+            path,
+            readers=settings.checkpoint_readers,
+            pragmas=sqlite_pragmas(),
+            write_batch_max=settings.checkpoint_write_batch_max,
+        )
+        return saver, PooledSqliteSaver(path, pragmas=sqlite_pragmas())
+
+    conn = await aiosqlite.connect(path)
+    sync_conn = sqlite3.connect(path, check_same_thread=False)
+    for pragma in sqlite_pragmas():
+        async with conn.execute(pragma):
+            pass
+        sync_conn.execute(pragma).close()
+    saver = AsyncSqliteSaver(conn)
+    await saver.setup()
+    return saver, SqliteSaver(sync_conn)
+
+
+async def _run_thread(graph, intent: str, thread_ids: list, latency: Histogram, errors: list):
+    from langgraph.types import Command
+
+    from backend.state import CerinasState
+
+    config = {"configurable": {"thread_id": str(uuid.uuid4())}}
+    thread_ids.append(config)
+    start = time.perf_counter()
+    try:
+        initial_state = CerinasState(user_intent=intent, original_query=intent)
+        await graph.ainvoke(initial_state.model_dump(), config=config)
+        await graph.ainvoke(Command(resume={"human_approval": True, "human_edits": None}), config=config)
+        latency.observe(time.perf_counter() - start)
+    except Exception as e:
+        errors.append(e)
+
+
+async def _poll_state(graph, thread_ids: list, stop: asyncio.Event, latency: Histogram):
+    while not stop.is_set():
+        if thread_ids:
+            start = time.perf_counter()
+            await graph.aget_state(random.choice(thread_ids))
+            latency.observe(time.perf_counter() - start)
+        await asyncio.sleep(0)
+
+
+def _report(label: str, histogram: Histogram, wall: float):
+    snap = histogram.snapshot()
+    print(
+        f"  {label:<16} n={snap['count']:<6} {snap['count'] / wall:8.1f}/s  "
+        f"p50 {snap['p50'] * 1000:7.2f}ms  p95 {snap['p95'] * 1000:7.2f}ms  "
+        f"p99 {snap['p99'] * 1000:7.2f}ms"
+    )
+
+
+async def run_variant(variant: str, args):
+    from backend.graph import build_graph
+    from backend.metrics import metrics
+
+    path = f"checkpoints-{variant}.sqlite"
+    saver, sync_saver = await _open_savers(variant, path)
+    graph, sync_graph = build_graph(saver), build_graph(sync_saver)
+
+    runs, reads, sync_reads = Histogram(), Histogram(), Histogram()
+    thread_ids: list = []
+    errors: list = []
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def bounded():
+        async with semaphore:
+            await _run_thread(graph, args.intent, thread_ids, runs, errors)
+
+    stop = asyncio.Event()
+    pollers = [
+        asyncio.create_task(_poll_state(graph, thread_ids, stop, reads))
+        for _ in range(args.readers)
+    ]
+    start = time.perf_counter()
+    await asyncio.gather(*(bounded() for _ in range(args.threads)))
+    wall = time.perf_counter() - start
+    stop.set()
+    await asyncio.gather(*pollers)
+
+    def read_back(config):
+        for _ in range(args.sync_reads):
+            read_start = time.perf_counter()
+            sync_graph.get_state(config)
+            sync_reads.observe(time.perf_counter() - read_start)
+
+    sync_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.os_threads) as pool:
+        await asyncio.get_running_loop().run_in_executor(
+            None, lambda: list(pool.map(read_back, thread_ids))
+        )
+    sync_wall = time.perf_counter() - sync_start
+
+    print(f"[{variant}] {args.threads} graph threads, concurrency {args.concurrency}, "
+          f"{args.readers} readers: {wall:.2f}s wall, {len(errors)} errors")
+    _report("graph thread", runs, wall)
+    _report("aget_state", reads, wall)
+    print(f"  {args.os_threads} OS threads, get_state: {sync_wall:.2f}s wall")
+    _report("get_state", sync_reads, sync_wall)
+    batches = metrics.histogram("checkpoint.write_batch_size")
+    if variant == "pooled" and batches.count:
+        print(f"  checkpoint writes per commit: mean {batches.total / batches.count:.1f}, "
+              f"max {batches.percentile(100):.0f}")
+
+    if variant == "pooled":
+        await saver.aclose()
+        sync_saver.close()
+    else:
+        await saver.conn.close()
+        sync_saver.conn.close()
+
+
+async def run(args):
+    for variant in args.variants.split(","):
+        await run_variant(variant, args)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--threads", type=int, default=40, help="graph threads to run")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--readers", type=int, default=8, help="concurrent aget_state pollers")
+    parser.add_argument("--os-threads", type=int, default=8, help="threads for the get_state phase")
+    parser.add_argument("--sync-reads", type=int, default=20, help="get_state calls per graph thread")
+    parser.add_argument("--intent", default="Behavioral activation exercise for low mood")
+    parser.add_argument("--latency-ms", type=float, default=2.0)
+    parser.add_argument("--variants", default="single,pooled")
+    args = parser.parse_args()
+
+    _configure(args)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
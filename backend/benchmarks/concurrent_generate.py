@@ -0,0 +1,76 @@
+"""
+Concurrent /generate benchmark.
+
+Fires one baseline /generate call, then N concurrent calls against a running
+backend while probing /health, and reports whether the batch finished in
+roughly one pipeline's time (async path) or N times that (blocked loop).
+
+Usage:
+    python -m backend.benchmarks.concurrent_generate --concurrency 8
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+
+async def _generate(client: httpx.AsyncClient, intent: str) -> float:
+    start = time.perf_counter()
+    response = await client.post(
+        "/generate",
+        json={"user_intent": intent, "original_query": intent},
+    )
+    response.raise_for_status()
+    return time.perf_counter() - start
+
+
+async def _probe_health(client: httpx.AsyncClient, stop: asyncio.Event, samples: list):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await client.get("/health")
+        samples.append(time.perf_counter() - start)
+        await asyncio.sleep(0.25)
+
+
+async def run(base_url: str, concurrency: int, intent: str, timeout: float):
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout) as client:
+        baseline = await _generate(client, intent)
+        print(f"baseline (1 request):        {baseline:8.2f}s")
+
+        health_samples: list = []
+        stop = asyncio.Event()
+        probe = asyncio.create_task(_probe_health(client, stop, health_samples))
+
+        start = time.perf_counter()
+        latencies = await asyncio.gather(
+            *(_generate(client, intent) for _ in range(concurrency))
+        )
+        wall = time.perf_counter() - start
+
+        stop.set()
+        await probe
+
+    print(f"{concurrency} concurrent requests:     {wall:8.2f}s wall")
+    print(f"  per-request mean:          {statistics.mean(latencies):8.2f}s")
+    print(f"  per-request max:           {max(latencies):8.2f}s")
+    print(f"  wall / baseline:           {wall / baseline:8.2f}x "
+          f"(serial would be ~{concurrency}x)")
+    if health_samples:
+        print(f"  /health max during run:    {max(health_samples) * 1000:8.1f}ms "
+              f"({len(health_samples)} probes)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--intent", default="Behavioral activation exercise for low mood")
+    parser.add_argument("--timeout", type=float, default=600.0)
+    args = parser.parse_args()
+    asyncio.run(run(args.base_url, args.concurrency, args.intent, args.timeout))
+
+
+if __name__ == "__main__":
+    main()
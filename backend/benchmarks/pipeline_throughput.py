@@ -0,0 +1,132 @@
+"""
+Pipeline throughput benchmark against the fake LLM backend.
+
+Runs the FastAPI app in-process (no server, no network, no API key) with
+`CERINA_LLM_BACKEND=fake`, drives N concurrent /generate + /approve cycles
+and reports throughput, p50/p95/p99 latency per endpoint and the time spent
+writing checkpoints. Databases go to a throwaway directory.
+
+Usage:
+    python -m backend.benchmarks.pipeline_throughput --requests 50 --concurrency 10
+    python -m backend.benchmarks.pipeline_throughput --latency-ms 0 --distribution none
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from backend.metrics import Histogram
+
+
+def _configure(args):
+    """Environment must be set before any backend module reads settings."""
+    os.environ["CERINA_LLM_BACKEND"] = "fake"
+    os.environ["CERINA_LLM_CACHE_ENABLED"] = "false"
+    os.environ["CERINA_FAKE_LLM_LATENCY_DISTRIBUTION"] = args.distribution
+    os.environ["CERINA_FAKE_LLM_LATENCY_MS"] = str(args.latency_ms)
+    os.environ["CERINA_FAKE_LLM_LATENCY_JITTER_MS"] = str(args.jitter_ms)
+    os.environ["CERINA_FAKE_LLM_ERROR_RATE"] = str(args.error_rate)
+    os.environ["CERINA_FAKE_LLM_SEED"] = str(args.seed)
+    os.chdir(tempfile.mkdtemp(prefix="cerina-bench-"))
+
+
+def _time_checkpoints(saver, histogram: Histogram):
+    """Wrap the saver's write path so every checkpoint write is timed."""
+    for name in ("aput", "aput_writes"):
+        original = getattr(saver, name)
+
+        async def timed(*a, _original=original, **kw):
+            start = time.perf_counter()
+            try:
+                return await _original(*a, **kw)
+            finally:
+                histogram.observe(time.perf_counter() - start)
+
+        setattr(saver, name, timed)
+
+
+async def _cycle(client, intent: str, generate: Histogram, approve: Histogram, errors: list):
+    try:
+        start = time.perf_counter()
+        response = await client.post(
+            "/generate", json={"user_intent": intent, "original_query": intent}
+        )
+        response.raise_for_status()
+        generate.observe(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        response = await client.post(
+            "/approve",
+            json={"thread_id": response.json()["thread_id"], "human_approval": True},
+        )
+        response.raise_for_status()
+        approve.observe(time.perf_counter() - start)
+    except Exception as e:
+        errors.append(e)
+
+
+def _report(label: str, histogram: Histogram, wall: float):
+    snap = histogram.snapshot()
+    print(
+        f"{label:<12} n={snap['count']:<5} {snap['count'] / wall:7.2f}/s  "
+        f"p50 {snap['p50'] * 1000:8.1f}ms  p95 {snap['p95'] * 1000:8.1f}ms  "
+        f"p99 {snap['p99'] * 1000:8.1f}ms"
+    )
+
+
+async def run(requests: int, concurrency: int, intent: str):
+    import httpx
+
+    from backend.database import db
+    from backend.main import app
+
+    generate, approve, checkpoint = Histogram(), Histogram(), Histogram()
+    errors: list = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def bounded(client):
+        async with semaphore:
+            await _cycle(client, intent, generate, approve, errors)
+
+    async with app.router.lifespan_context(app):
+        _time_checkpoints(await db.get_async_checkpointer(), checkpoint)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench", timeout=None
+        ) as client:
+            start = time.perf_counter()
+            await asyncio.gather(*(bounded(client) for _ in range(requests)))
+            wall = time.perf_counter() - start
+
+    print(f"{requests} cycles, concurrency {concurrency}: {wall:.2f}s wall, "
+          f"{len(errors)} failed")
+    _report("/generate", generate, wall)
+    _report("/approve", approve, wall)
+    _report("checkpoint", checkpoint, wall)
+    if generate.count:
+        per_cycle = checkpoint.total / (generate.count + approve.count)
+        print(f"checkpoint time per request: {per_cycle * 1000:.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=5)
+    parser.add_argument("--intent", default="Behavioral activation exercise for low mood")
+    parser.add_argument(
+        "--distribution", default="lognormal",
+        choices=["fixed", "uniform", "normal", "lognormal", "none"],
+    )
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--jitter-ms", type=float, default=15.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    _configure(args)
+    asyncio.run(run(args.requests, args.concurrency, args.intent))
+
+
+if __name__ == "__main__":
+    main()
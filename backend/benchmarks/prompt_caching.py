@@ -0,0 +1,134 @@
+"""
+Prompt layout benchmark: provider prefix caching, v1 vs v2 templates.
+
+Runs the same generations with each prompt version (backend/prompts.py)
+against the fake LLM backend, whose simulated prefix cache follows the
+provider rules (prefixes hashed in 128-token blocks, nothing cached below
+--cache-min-tokens) and charges --prefill-ms per uncached input token before
+the first output token. Reports time-to-first-token percentiles, input
+tokens, cached input tokens and billed input tokens (cached tokens at
+--cached-price of the normal rate) per version. Databases go to a throwaway
+directory.
+
+Usage:
+    python -m backend.benchmarks.prompt_caching --requests 20
+    python -m backend.benchmarks.prompt_caching --cache-min-tokens 0
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from backend.metrics import Histogram
+
+INTENTS = (
+    "Sleep hygiene routine for racing thoughts at night",
+    "Exposure hierarchy for social anxiety",
+    "Behavioral activation exercise for low mood",
+    "Thought record for catastrophizing about work",
+    "Grounding exercise for panic attacks",
+)
+
+
+def _configure():
+    """Environment must be set before any backend module reads settings."""
+    os.environ["CERINA_LLM_BACKEND"] = "fake"
+    os.environ["CERINA_LLM_CACHE_ENABLED"] = "false"
+    os.chdir(tempfile.mkdtemp(prefix="cerina-bench-"))
+
+
+def _time_calls(backend, ttft: Histogram, usage: dict):
+    """Wrap generate: with no per-output-token cost, its duration is the TTFT."""
+    original = backend.generate
+
+    async def timed(*a, **kw):
+        start = time.perf_counter()
+        result = await original(*a, **kw)
+        ttft.observe(time.perf_counter() - start)
+        usage["calls"] += 1
+        usage["input"] += result.input_tokens
+        usage["cached"] += result.cached_input_tokens
+        return result
+
+    backend.generate = timed
+
+
+async def run_version(version: str, args) -> dict:
+    from backend.config import settings
+    from backend.fake_llm import FakeLLMBackend
+    from backend.llm import set_backend
+    from backend.pipeline import run_generation
+
+    settings.prompt_version = version
+    backend = FakeLLMBackend(
+        latency_distribution="fixed",
+        latency_ms=args.latency_ms,
+        ms_per_output_token=0.0,
+        ms_per_input_token=args.prefill_ms,
+        prefix_cache_min_tokens=args.cache_min_tokens,
+        error_rate=0.0,
+    )
+    ttft = Histogram()
+    usage = {"calls": 0, "input": 0, "cached": 0}
+    _time_calls(backend, ttft, usage)
+    set_backend(backend)
+
+    for i in range(args.requests):
+        # Distinct requests: only the templates' static text can be shared
+        intent = f"{INTENTS[i % len(INTENTS)]} (client {i})"
+        await run_generation(f"bench-{version}-{i}", intent, intent)
+
+    set_backend(None)
+    billed = usage["input"] - usage["cached"] + usage["cached"] * args.cached_price
+    return {"ttft": ttft.snapshot(), "billed": billed, **usage}
+
+
+def _static_prefixes(version: str) -> str:
+    from backend.prompts import PROMPTS
+    from backend.tokens import count_tokens
+
+    sizes = [
+        f"{template.name} {count_tokens(template.system)}"
+        for (_, v), template in PROMPTS.items()
+        if v == version
+    ]
+    return ", ".join(sizes)
+
+
+async def main_async(args):
+    from backend import pipeline
+
+    results = {}
+    for version in ("v1", "v2"):
+        results[version] = await run_version(version, args)
+    await pipeline.aclose()
+
+    print(
+        f"{args.requests} generations per version, prefill {args.prefill_ms}ms/token, "
+        f"cache min {args.cache_min_tokens} tokens, cached tokens billed at {args.cached_price:g}x"
+    )
+    print(f"v2 static prefix tokens: {_static_prefixes('v2')}")
+    for version, r in results.items():
+        ttft = r["ttft"]
+        print(
+            f"{version}: calls={r['calls']:<4} ttft p50 {ttft['p50'] * 1000:7.1f}ms  "
+            f"p95 {ttft['p95'] * 1000:7.1f}ms  input={r['input']:<7} cached={r['cached']:<7} "
+            f"({r['cached'] / max(1, r['input']):.0%})  billed input={r['billed']:.0f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=10)
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="fixed per-call overhead")
+    parser.add_argument("--prefill-ms", type=float, default=0.2, help="per uncached input token")
+    parser.add_argument("--cache-min-tokens", type=int, default=1024)
+    parser.add_argument("--cached-price", type=float, default=0.5)
+    args = parser.parse_args()
+    _configure()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Safety pre-screen microbenchmark.
+
+Times backend.safety_lexicon.prescreen on a clean drafter-sized draft and on
+the same draft with flagged phrases appended, and compares it against
+scanning with the combined regex alone (no anchor prefilter).
+
+Usage:
+    python -m backend.benchmarks.safety_prescreen --draft-tokens 1500
+"""
+import argparse
+import timeit
+
+from backend.fake_llm import FakeLLMBackend
+from backend.safety_lexicon import _SCAN, prescreen
+
+FLAGGED_LINES = (
+    "If it gets hard, just snap out of it - no excuses.",
+    "You could double your dose on difficult days.",
+    "If you have thoughts of suicide, call your local crisis line.",
+)
+
+
+def _time(fn, number: int) -> float:
+    """Best-of-5 microseconds per call."""
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number * 1e6
+
+
+def run(draft_tokens: int, number: int):
+    clean = FakeLLMBackend(draft_tokens=draft_tokens).respond(
+        "drafter", "THERAPEUTIC GOAL: Gradual exposure for social anxiety"
+    )
+    flagged = clean + "\n" + "\n".join(FLAGGED_LINES)
+
+    for label, draft in (("clean", clean), ("flagged", flagged)):
+        flags = prescreen(draft).flags
+        print(f"{label:<8} {len(draft):6d} bytes  {len(flags)} flags  "
+              f"prescreen {_time(lambda: prescreen(draft), number):8.1f}us  "
+              f"regex only {_time(lambda: list(_SCAN.finditer(draft)), number):8.1f}us")
+        for flag in flags:
+            print(f"  line {flag.line_num}: [{flag.severity}] {flag.issue}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--draft-tokens", type=int, default=1500)
+    parser.add_argument("--number", type=int, default=1000)
+    args = parser.parse_args()
+    run(args.draft_tokens, args.number)
+
+
+if __name__ == "__main__":
+    main()
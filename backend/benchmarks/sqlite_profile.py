@@ -0,0 +1,188 @@
+"""
+SQLite profile benchmark: database throughput under concurrent traffic.
+
+Runs the FastAPI app in-process against the fake LLM backend, drives N
+concurrent /generate + /approve cycles while reader tasks poll /protocols,
+/protocol/{id} and /status/{id}, and reports write throughput (checkpoint
+writes and protocol saves) and read throughput for each SQLite profile
+(CERINA_SQLITE_PROFILE). Each profile runs in a fresh process and a
+throwaway directory, since pragmas are applied when connections open.
+
+Usage:
+    python -m backend.benchmarks.sqlite_profile --requests 40 --concurrency 10 --readers 4
+    python -m backend.benchmarks.sqlite_profile --profiles tuned
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from backend.metrics import Histogram
+
+
+def _configure(args):
+    """Environment must be set before any backend module reads settings."""
+    os.environ["CERINA_SQLITE_PROFILE"] = args.profile
+    os.environ["CERINA_LLM_BACKEND"] = "fake"
+    os.environ["CERINA_LLM_CACHE_ENABLED"] = "false"
+    os.environ["CERINA_FAKE_LLM_LATENCY_DISTRIBUTION"] = "fixed"
+    os.environ["CERINA_FAKE_LLM_LATENCY_MS"] = str(args.latency_ms)
+    os.environ["CERINA_FAKE_LLM_SEED"] = "7"
+    os.environ["CERINA_RECOVERY_INTERVAL_SECONDS"] = "0"
+    os.chdir(tempfile.mkdtemp(prefix="cerina-bench-"))
+
+
+def _timed(obj, name: str, histogram: Histogram):
+    """Replace obj.name (sync or async) with a version that times each call."""
+    original = getattr(obj, name)
+
+    if asyncio.iscoroutinefunction(original):
+        async def timed(*a, **kw):
+            start = time.perf_counter()
+            try:
+                return await original(*a, **kw)
+            finally:
+                histogram.observe(time.perf_counter() - start)
+    else:
+        def timed(*a, **kw):
+            start = time.perf_counter()
+            try:
+                return original(*a, **kw)
+            finally:
+                histogram.observe(time.perf_counter() - start)
+
+    setattr(obj, name, timed)
+
+
+async def _cycle(client, intent: str, thread_ids: list, errors: list):
+    try:
+        response = await client.post(
+            "/generate", json={"user_intent": intent, "original_query": intent}
+        )
+        response.raise_for_status()
+        thread_id = response.json()["thread_id"]
+        thread_ids.append(thread_id)
+        response = await client.post(
+            "/approve", json={"thread_id": thread_id, "human_approval": True}
+        )
+        response.raise_for_status()
+    except Exception as e:
+        errors.append(e)
+
+
+async def _reader(client, thread_ids: list, stop: asyncio.Event, errors: list):
+    turn = 0
+    while not stop.is_set():
+        try:
+            if turn % 3 == 0 or not thread_ids:
+                response = await client.get("/protocols", params={"limit": 20})
+            elif turn % 3 == 1:
+                response = await client.get(f"/protocol/{thread_ids[turn % len(thread_ids)]}")
+            else:
+                response = await client.get(f"/status/{thread_ids[turn % len(thread_ids)]}")
+            if response.status_code >= 500:
+                errors.append(response.text)
+        except Exception as e:
+            errors.append(e)
+        turn += 1
+        await asyncio.sleep(0)
+
+
+def _report(label: str, histogram: Histogram, wall: float):
+    snap = histogram.snapshot()
+    print(
+        f"  {label:<16} n={snap['count']:<6} {snap['count'] / wall:8.1f}/s  "
+        f"p50 {snap['p50'] * 1000:7.2f}ms  p95 {snap['p95'] * 1000:7.2f}ms  "
+        f"p99 {snap['p99'] * 1000:7.2f}ms"
+    )
+
+
+async def run(requests: int, concurrency: int, readers: int, intent: str):
+    import httpx
+
+    from backend.database import db
+    from backend.main import app
+
+    checkpoint_writes, protocol_saves = Histogram(), Histogram()
+    checkpoint_reads, protocol_reads = Histogram(), Histogram()
+    thread_ids: list = []
+    errors: list = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def bounded(client):
+        async with semaphore:
+            await _cycle(client, intent, thread_ids, errors)
+
+    async with app.router.lifespan_context(app):
+        saver = await db.get_async_checkpointer()
+        for name in ("aput", "aput_writes"):
+            _timed(saver, name, checkpoint_writes)
+        _timed(saver, "aget_tuple", checkpoint_reads)
+        _timed(db, "asave_protocol", protocol_saves)
+        for name in ("aget_protocol", "alist_protocols", "aget_job"):
+            _timed(db, name, protocol_reads)
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench", timeout=None
+        ) as client:
+            stop = asyncio.Event()
+            reader_tasks = [
+                asyncio.create_task(_reader(client, thread_ids, stop, errors))
+                for _ in range(readers)
+            ]
+            start = time.perf_counter()
+            await asyncio.gather(*(bounded(client) for _ in range(requests)))
+            wall = time.perf_counter() - start
+            stop.set()
+            await asyncio.gather(*reader_tasks)
+
+        wal_bytes = sum(
+            os.path.getsize(path) for path in ("cerina.db-wal", "checkpoints.sqlite-wal")
+            if os.path.exists(path)
+        )
+        await db.wal_checkpoint()
+
+    writes = checkpoint_writes.count + protocol_saves.count
+    reads = checkpoint_reads.count + protocol_reads.count
+    print(f"{requests} cycles, concurrency {concurrency}, {readers} readers: "
+          f"{wall:.2f}s wall, {len(errors)} errors")
+    print(f"  writes {writes / wall:8.1f}/s   reads {reads / wall:8.1f}/s   "
+          f"WAL before checkpoint {wal_bytes / 1024:.0f} KiB")
+    _report("checkpoint write", checkpoint_writes, wall)
+    _report("protocol save", protocol_saves, wall)
+    _report("checkpoint read", checkpoint_reads, wall)
+    _report("protocol read", protocol_reads, wall)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--intent", default="Behavioral activation exercise for low mood")
+    parser.add_argument("--latency-ms", type=float, default=5.0)
+    parser.add_argument("--profiles", default="default,tuned",
+                        help="comma-separated profiles to compare")
+    parser.add_argument("--profile", help=argparse.SUPPRESS)  # set in child processes
+    args = parser.parse_args()
+
+    if args.profile:
+        _configure(args)
+        asyncio.run(run(args.requests, args.concurrency, args.readers, args.intent))
+        return
+
+    for profile in args.profiles.split(","):
+        print(f"[{profile}]", flush=True)
+        subprocess.run(
+            [sys.executable, "-m", "backend.benchmarks.sqlite_profile",
+             *sys.argv[1:], "--profile", profile],
+            check=True,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,296 @@
+"""
+Pooled SQLite checkpointers.
+
+LangGraph's SqliteSaver and AsyncSqliteSaver run every read and write over
+one connection behind one lock, so a get_state waits for whichever
+checkpoint write is in flight, and vice versa. In WAL mode SQLite serves
+any number of readers next to a single writer, so:
+
+- PooledSqliteSaver (sync graph, scripts, threadpool callers) gives each
+  thread its own connection. Writes still take the saver's lock; reads don't.
+- PooledAsyncSqliteSaver (the app's graph) serves aget_tuple/alist from a
+  pool of read-only connections and runs every write through one writer
+  task, which commits whatever has queued up in a single transaction.
+
+Both savers reuse the library's own SQL: the async writer calls the parent
+aput/aput_writes/adelete_thread and only takes over the commit, so
+langgraph-checkpoint-sqlite is pinned in requirements.txt.
+"""
+import asyncio
+import functools
+import sqlite3
+import threading
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterator, List, Optional, Sequence, Tuple
+
+import aiosqlite
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    SerializerProtocol,
+)
+from langgraph.checkpoint.sqlite import SqliteSaver
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+from backend.metrics import metrics
+
+Write = Callable[[], Awaitable[Any]]  # one parent write method call
+
+
+class _BatchedConnection:
+    """
+    The writer connection as the parent saver sees it: statements go through,
+    but commit() is left to the writer task, which commits a batch at once.
+    """
+
+    def __init__(self, conn: aiosqlite.Connection):
+        self.wrapped = conn
+
+    def __getattr__(self, name: str):
+        return getattr(self.wrapped, name)
+
+    async def commit(self):
+        pass
+
+
+class PooledSqliteSaver(SqliteSaver):
+    """SqliteSaver with one connection per thread and a single writer at a time."""
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        pragmas: Sequence[str] = (),
+        serde: Optional[SerializerProtocol] = None,
+    ):
+        self.path = path
+        self.pragmas = list(pragmas)
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        super().__init__(self._connect(), serde=serde)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        for pragma in self.pragmas:
+            conn.execute(pragma).close()
+        with self._connections_lock:
+            self._connections.append(conn)
+        return conn
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    @conn.setter
+    def conn(self, conn: sqlite3.Connection):
+        self._local.conn = conn
+
+    @contextmanager
+    def cursor(self, transaction: bool = True) -> Iterator[sqlite3.Cursor]:
+        if not self.is_setup:
+            with self.lock:
+                self.setup()
+        conn = self.conn
+        cur = conn.cursor()
+        if not transaction:
+            try:
+                yield cur
+            finally:
+                cur.close()
+            return
+        with self.lock:
+            try:
+                yield cur
+            finally:
+                conn.commit()
+                cur.close()
+
+    def close(self):
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections = []
+
+
+class _ReaderSaver(AsyncSqliteSaver):
+    """AsyncSqliteSaver on a read-only connection; the writer creates the tables."""
+
+    async def setup(self) -> None:
+        pass
+
+
+class PooledAsyncSqliteSaver(AsyncSqliteSaver):
+    """
+    AsyncSqliteSaver with a read-only connection pool and a single writer
+    task. `self.conn` is the writer connection, wrapped so the parent's
+    write methods leave committing to the writer task.
+    """
+
+    def __init__(
+        self,
+        conn: aiosqlite.Connection,
+        readers: Sequence[aiosqlite.Connection] = (),
+        *,
+        write_batch_max: int = 64,
+        serde: Optional[SerializerProtocol] = None,
+    ):
+        super().__init__(_BatchedConnection(conn), serde=serde)
+        self._writer_conn = conn
+        self.write_batch_max = max(1, write_batch_max)
+        self._reader_conns = list(readers)
+        self._readers: asyncio.Queue = asyncio.Queue()
+        for reader_conn in self._reader_conns:
+            reader = _ReaderSaver(reader_conn, serde=self.serde)
+            self._readers.put_nowait(reader)
+        self._writes: asyncio.Queue = asyncio.Queue()
+        self._writer: Optional[asyncio.Task] = None
+
+    @classmethod
+    async def connect(
+        cls,
+        path: str,
+        *,
+        readers: int = 4,
+        pragmas: Sequence[str] = (),
+        write_batch_max: int = 64,
+    ) -> "PooledAsyncSqliteSaver":
+        async def open_connection(read_only: bool) -> aiosqlite.Connection:
+            conn = await aiosqlite.connect(path)
+            for pragma in [*pragmas, *(["PRAGMA query_only=1"] if read_only else [])]:
+                # Close each cursor, or its statement keeps the file locked
+                async with conn.execute(pragma):
+                    pass
+            return conn
+
+        writer = await open_connection(read_only=False)
+        reader_conns = [await open_connection(read_only=True) for _ in range(readers)]
+        saver = cls(writer, reader_conns, write_batch_max=write_batch_max)
+        await saver.setup()
+        await writer.commit()
+        return saver
+
+    async def aclose(self):
+        """Flush queued writes, stop the writer and close every connection."""
+        if self._writer is not None:
+            await self._writes.join()
+            self._writer.cancel()
+            await asyncio.gather(self._writer, return_exceptions=True)
+            self._writer = None
+        for conn in self._reader_conns + [self._writer_conn]:
+            await conn.close()
+
+    # Reads
+
+    @asynccontextmanager
+    async def _reader(self) -> AsyncIterator[AsyncSqliteSaver]:
+        reader = await self._readers.get()
+        try:
+            yield reader
+        finally:
+            self._readers.put_nowait(reader)
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        if not self._reader_conns:
+            return await super().aget_tuple(config)
+        await self.setup()
+        async with self._reader() as reader:
+            return await reader.aget_tuple(config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[dict] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        if not self._reader_conns:
+            async for item in super().alist(config, filter=filter, before=before, limit=limit):
+                yield item
+            return
+        await self.setup()
+        async with self._reader() as reader:
+            async for item in reader.alist(config, filter=filter, before=before, limit=limit):
+                yield item
+
+    # Writes
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return await self._write(
+            functools.partial(super().aput, config, checkpoint, metadata, new_versions)
+        )
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        await self._write(functools.partial(super().aput_writes, config, writes, task_id, task_path))
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await self._write(functools.partial(super().adelete_thread, thread_id))
+
+    async def _write(self, write: Write) -> Any:
+        """Queue a write for the writer task and wait until it is committed."""
+        if self._writer is None:
+            self._writer = asyncio.create_task(self._write_loop(), name="cerina-checkpoint-writer")
+        committed = asyncio.get_running_loop().create_future()
+        self._writes.put_nowait((write, committed))
+        return await committed
+
+    async def _write_loop(self):
+        while True:
+            batch = [await self._writes.get()]
+            while len(batch) < self.write_batch_max and not self._writes.empty():
+                batch.append(self._writes.get_nowait())
+            metrics.observe("checkpoint.write_batch_size", len(batch))
+            try:
+                results = await self._commit(batch)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                await self._commit_one_by_one(batch)
+            else:
+                for (_, committed), result in zip(batch, results):
+                    if not committed.done():
+                        committed.set_result(result)
+            finally:
+                for _ in batch:
+                    self._writes.task_done()
+
+    async def _commit(self, batch: list) -> list:
+        try:
+            results = [await write() for write, _ in batch]
+            await self._writer_conn.commit()
+        except Exception:
+            await self._writer_conn.rollback()
+            raise
+        return results
+
+    async def _commit_one_by_one(self, batch: list):
+        """Retry a failed batch per write so only the bad one reports the error."""
+        for item in batch:
+            committed = item[1]
+            try:
+                [result] = await self._commit([item])
+            except Exception as e:
+                if not committed.done():
+                    committed.set_exception(e)
+            else:
+                if not committed.done():
+                    committed.set_result(result)
@@ -0,0 +1,165 @@
+import json
+import os
+from typing import Any, Dict, List, Optional, get_origin
+from pydantic import BaseModel
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+class Settings(BaseModel):
+    """
+    Runtime configuration.
+
+    Every field can be overridden with a `CERINA_<FIELD_NAME>` environment
+    variable (e.g. `CERINA_JOB_WORKERS=4`). List fields take comma-separated
+    values, dict fields take JSON.
+    """
+
+    # Job queue. A running job holds a lease that its process renews every
+    # third of job_lease_seconds; other processes (more uvicorn workers, a
+    # rolling restart) only take over a job whose lease has expired
+    job_workers: int = 2
+    job_lease_seconds: float = 60.0
+
+    # Recovery: failed runs are resumed from their last checkpoint every
+    # interval (0 disables) until they have been attempted max_attempts times
+    recovery_interval_seconds: float = 60.0
+    recovery_max_attempts: int = 3
+
+    # Default review mode: "thorough" (Safety Guardian + Clinical Critic in
+    # parallel) or "fast" (one combined reviewer call per iteration)
+    review_mode: str = "thorough"
+
+    # LLM provider backend: "openai" or "fake" (offline, see backend/fake_llm.py)
+    llm_backend: str = "openai"
+
+    # Ask the provider for JSON-schema structured output from reviewer agents
+    llm_structured_outputs: bool = True
+
+    # Agent prompt layout (backend/prompts.py): "v2" sends a static system
+    # prefix the provider can cache; "v1" is the original interleaved layout
+    prompt_version: str = "v2"
+
+    # Shared LLM HTTP connection pool
+    llm_max_connections: int = 100
+    llm_max_keepalive_connections: int = 20
+    llm_keepalive_expiry: float = 30.0
+    llm_timeout: float = 120.0
+
+    # Model routing (backend/routing.py): tier -> fallback chain of models,
+    # agent (or "<review_mode>.<agent>") -> tier, and per-agent latency SLOs
+    # (ms) after which the next model in the chain is tried. JSON values.
+    llm_model_tiers: Dict[str, List[str]] = {
+        "fast": ["gpt-4.1-nano", "gpt-4o-mini"],
+        "standard": ["gpt-4o-mini"],
+        "strong": ["gpt-4o", "gpt-4o-mini"],
+    }
+    llm_agent_tiers: Dict[str, str] = {
+        "supervisor": "fast",
+        "clinical_critic": "fast",
+        "drafter": "strong",
+    }
+    llm_default_tier: str = "standard"
+    llm_latency_slo_ms: Dict[str, float] = {}
+
+    # Resilience for provider calls (backend/resilience.py): per-attempt
+    # timeout (s, 0: none), retries with jittered exponential backoff (s),
+    # hedging after the p95 latency once enough calls were seen, and a
+    # per-provider circuit breaker (consecutive failures, 0: disabled)
+    llm_call_timeout: float = 60.0
+    llm_retries: int = 2
+    llm_retry_base_delay: float = 0.5
+    llm_retry_max_delay: float = 8.0
+    llm_hedge_enabled: bool = False
+    llm_hedge_percentile: float = 95.0
+    llm_hedge_min_samples: int = 20
+    llm_breaker_failure_threshold: int = 5
+    llm_breaker_reset_seconds: float = 30.0
+
+    # Per-agent output token ceilings overriding AGENT_PROFILES in
+    # backend/llm.py, as JSON (e.g. {"drafter": 2000}); 0 removes the ceiling
+    llm_max_output_tokens: Dict[str, int] = {}
+
+    # Token budgets: feedback the drafter sees is trimmed to this many
+    # tokens (most severe first), and the refinement loop stops before an
+    # iteration would take a request past token_budget_per_request (0: no limit)
+    drafter_feedback_token_budget: int = 1500
+    token_budget_per_request: int = 40_000
+
+    # SQLite tuning applied to every connection of both stores (cerina.db and
+    # the checkpoint database); profile "default" leaves SQLite's defaults.
+    # cache_size < 0 is in KiB. The WAL is checkpointed with TRUNCATE every
+    # interval (s, 0 disables) so it does not grow without bound.
+    sqlite_profile: str = "tuned"
+    sqlite_journal_mode: str = "WAL"
+    sqlite_synchronous: str = "NORMAL"
+    sqlite_mmap_size: int = 256 * 1024 * 1024
+    sqlite_cache_size: int = -64 * 1024
+    sqlite_temp_store: str = "MEMORY"
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_wal_checkpoint_interval_seconds: float = 300.0
+
+    # Checkpointer pool (backend/checkpointer.py): read-only connections
+    # serving get_state, and the most writes the single writer commits in
+    # one transaction
+    checkpoint_readers: int = 4
+    checkpoint_write_batch_max: int = 64
+
+    # Persistent LLM response cache. Only calls at or below
+    # llm_cache_max_temperature are cached: sampled calls are meant to vary
+    llm_cache_enabled: bool = True
+    llm_cache_max_temperature: float = 0.0
+    llm_cache_ttl_seconds: int = 7 * 24 * 3600
+    llm_cache_max_entries: int = 10_000
+    llm_cache_max_bytes: int = 50 * 1024 * 1024
+    llm_cache_bypass_agents: List[str] = []
+
+    # Fake LLM backend (benchmarks and load tests)
+    fake_llm_latency_distribution: str = "lognormal"  # fixed, uniform, normal, lognormal, none
+    fake_llm_latency_ms: float = 800.0
+    fake_llm_latency_jitter_ms: float = 250.0
+    fake_llm_ms_per_output_token: float = 0.0
+    fake_llm_ms_per_input_token: float = 0.0  # prefill cost of uncached input
+    fake_llm_prefix_cache_min_tokens: int = 1024  # shortest cacheable prefix (OpenAI: 1024)
+    fake_llm_error_rate: float = 0.0
+    fake_llm_model_latency_ms: Dict[str, float] = {}  # per-model mean latency override
+    fake_llm_failing_models: List[str] = []  # models whose calls always fail
+    fake_llm_draft_tokens: int = 600
+    fake_llm_seed: Optional[int] = None
+
+    # Drafter patch mode: regenerate only the sections with safety flags or
+    # tone issues and splice them back, unless they exceed this share of the draft
+    drafter_patch_mode: bool = True
+    drafter_patch_max_fraction: float = 0.8
+
+    # Lexical safety pre-screen: matches point the LLM audit at suspicious
+    # lines; only a few explicit phrases skip the audit. scope "full" audits
+    # the whole draft; "spans" audits only the matched lines and clears
+    # drafts with no matches without an LLM call.
+    safety_prescreen_enabled: bool = True
+    safety_prescreen_scope: str = "full"
+
+    # Refinement loop convergence
+    convergence_safety_threshold: float = 95.0
+    convergence_empathy_threshold: float = 85.0
+    convergence_min_delta: float = 2.0
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        overrides: dict[str, Any] = {}
+        for name, field in cls.model_fields.items():
+            raw = os.getenv(f"CERINA_{name.upper()}")
+            if raw is None:
+                continue
+            origin = get_origin(field.annotation) or field.annotation
+            if origin in (list, set):
+                overrides[name] = [item.strip() for item in raw.split(",") if item.strip()]
+            elif origin is dict:
+                overrides[name] = json.loads(raw)
+            else:
+                overrides[name] = raw
+        return cls(**overrides)
+
+
+settings = Settings.from_env()
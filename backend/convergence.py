@@ -0,0 +1,99 @@
+"""
+Convergence policy for the refinement loop.
+
+The supervisor asks the policy after every review round whether another
+drafter/safety/critic iteration is worth paying for. Rules are checked in
+order and the first one that fires is recorded as the halt reason.
+"""
+from typing import List, NamedTuple, Optional
+
+from backend.config import settings
+from backend.state import CerinasState, ScoreSnapshot
+from backend.tokens import billed_tokens
+
+
+class ConvergenceDecision(NamedTuple):
+    halt: bool
+    rule: str
+    detail: str
+
+
+class ConvergencePolicy:
+    def __init__(
+        self,
+        safety_threshold: float = settings.convergence_safety_threshold,
+        empathy_threshold: float = settings.convergence_empathy_threshold,
+        min_delta: float = settings.convergence_min_delta,
+        token_budget: int = settings.token_budget_per_request,
+    ):
+        self.safety_threshold = safety_threshold
+        self.empathy_threshold = empathy_threshold
+        self.min_delta = min_delta
+        self.token_budget = token_budget
+
+    def evaluate(self, state: CerinasState, history: List[ScoreSnapshot]) -> ConvergenceDecision:
+        """Decide whether to halt, given the score history including this round."""
+        latest = history[-1]
+        previous: Optional[ScoreSnapshot] = history[-2] if len(history) > 1 else None
+
+        if state.iteration_count >= state.max_iterations:
+            return ConvergenceDecision(
+                True, "max_iterations", f"reached {state.max_iterations} iterations"
+            )
+
+        if self.token_budget and state.iteration_count:
+            # Project the next round from the average cost of the rounds so far
+            used = billed_tokens(state.token_usage)
+            projected = used + used / state.iteration_count
+            if projected > self.token_budget:
+                return ConvergenceDecision(
+                    True,
+                    "token_budget",
+                    f"{used} tokens used, next iteration would exceed the "
+                    f"{self.token_budget} token budget",
+                )
+
+        if state.safety_review_failed or state.clinical_review_failed:
+            # Missing feedback from an unreadable review is not convergence
+            failed = [
+                name for name, flag in (
+                    ("safety", state.safety_review_failed),
+                    ("clinical", state.clinical_review_failed),
+                ) if flag
+            ]
+            return ConvergenceDecision(
+                False, "review_failed", f"{' and '.join(failed)} review could not be parsed"
+            )
+
+        if any(flag.severity == "critical" for flag in state.safety_flags):
+            return ConvergenceDecision(False, "critical_safety", "critical safety issues remain")
+
+        if (
+            latest.safety_score >= self.safety_threshold
+            and latest.empathy_score >= self.empathy_threshold
+        ):
+            return ConvergenceDecision(
+                True,
+                "quality_threshold",
+                f"safety {latest.safety_score:g} ≥ {self.safety_threshold:g}, "
+                f"empathy {latest.empathy_score:g} ≥ {self.empathy_threshold:g}",
+            )
+
+        if previous is not None:
+            safety_delta = latest.safety_score - previous.safety_score
+            empathy_delta = latest.empathy_score - previous.empathy_score
+            if abs(safety_delta) < self.min_delta and abs(empathy_delta) < self.min_delta:
+                return ConvergenceDecision(
+                    True,
+                    "plateau",
+                    f"Δsafety {safety_delta:+g}, Δempathy {empathy_delta:+g} "
+                    f"(< {self.min_delta:g} points)",
+                )
+
+        if not state.clinical_feedback.strip():
+            return ConvergenceDecision(True, "no_feedback", "no clinical feedback to address")
+
+        return ConvergenceDecision(False, "improving", "scores still improving")
+
+
+convergence_policy = ConvergencePolicy()
@@ -1,41 +1,300 @@
-from sqlalchemy import create_engine, Column, String, Text, DateTime, Boolean
+from sqlalchemy import create_engine, event, inspect, text, Column, String, Text, DateTime, Boolean, Integer, Float, Index
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-from langgraph.checkpoint.sqlite import SqliteSaver  # or PostgresSaver
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import load_only, sessionmaker
 from datetime import datetime
+import asyncio
 import json
+import logging
+import time
+import aiosqlite
+from backend.checkpointer import PooledAsyncSqliteSaver, PooledSqliteSaver
+from backend.config import settings
+from backend.metrics import metrics
 from backend.state import CerinasState
 import sqlite3
-from typing import Union
-from backend.state import CerinasState
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
 
+logger = logging.getLogger(__name__)
 
 Base = declarative_base()
 
+
+def sqlite_pragmas() -> List[str]:
+    """PRAGMA statements of the configured SQLite profile (CERINA_SQLITE_*)."""
+    if settings.sqlite_profile == "default":
+        return []
+    return [
+        f"PRAGMA journal_mode={settings.sqlite_journal_mode}",
+        f"PRAGMA synchronous={settings.sqlite_synchronous}",
+        f"PRAGMA mmap_size={int(settings.sqlite_mmap_size)}",
+        f"PRAGMA cache_size={int(settings.sqlite_cache_size)}",
+        f"PRAGMA temp_store={settings.sqlite_temp_store}",
+        f"PRAGMA busy_timeout={int(settings.sqlite_busy_timeout_ms)}",
+    ]
+
+
+def apply_sqlite_pragmas(conn: sqlite3.Connection):
+    """Apply the SQLite profile to a new DBAPI connection."""
+    cursor = conn.cursor()
+    try:
+        for pragma in sqlite_pragmas():
+            cursor.execute(pragma)
+    finally:
+        cursor.close()
+
 class ProtocolQueryRecord(Base):
     __tablename__ = "protocol_queries"
     
+    __table_args__ = (
+        # Serves both status filters and "latest with status X" listings
+        Index("ix_protocol_queries_status_created_at", "status", "created_at"),
+    )
+
     id = Column(String, primary_key=True)
     user_intent = Column(String)
     original_query = Column(Text)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    thread_id = Column(String)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    thread_id = Column(String, index=True)
     status = Column(String)
     final_protocol = Column(Text)
     human_approved = Column(Boolean)
-    metadata_json = Column("metadata", Text)  # JSON stored in 'metadata' column
+    safety_score = Column(Float, index=True)
+    empathy_score = Column(Float, index=True)
+    iteration_count = Column(Integer)
+    input_tokens = Column(Integer)  # billed totals for the thread (backend/tokens.py)
+    output_tokens = Column(Integer)
+    metadata_json = Column("metadata", Text)  # JSON stored in 'metadata' column (agent notes, token usage)
+
+
+# Columns read by list queries; the Text blobs (query, protocol, metadata) are never loaded
+PROTOCOL_SUMMARY_COLUMNS = (
+    ProtocolQueryRecord.thread_id,
+    ProtocolQueryRecord.user_intent,
+    ProtocolQueryRecord.status,
+    ProtocolQueryRecord.safety_score,
+    ProtocolQueryRecord.empathy_score,
+    ProtocolQueryRecord.iteration_count,
+    ProtocolQueryRecord.created_at,
+)
+
+
+class GenerationJobRecord(Base):
+    """Durable queue entry for an asynchronous /generate request."""
+    __tablename__ = "generation_jobs"
+
+    thread_id = Column(String, primary_key=True)
+    user_intent = Column(String)
+    original_query = Column(Text)
+    review_mode = Column(String)  # None means the configured default
+    model_routing = Column(Text)  # JSON agent -> model tier overrides
+    status = Column(String, index=True)  # queued, running, succeeded, failed
+    error = Column(Text)
+    attempts = Column(Integer, default=0)
+    enqueued_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
+    owner = Column(String)  # process running the job (JobQueue.owner)
+    heartbeat_at = Column(DateTime)  # lease renewed by the owner while running
+
+
+class LLMCacheRecord(Base):
+    """Cached LLM response keyed by a hash of (model, temperature, prompt)."""
+    __tablename__ = "llm_cache"
+
+    key = Column(String, primary_key=True)
+    agent = Column(String)
+    model = Column(String)
+    temperature = Column(Float)
+    response = Column(Text)
+    size_bytes = Column(Integer)
+    hits = Column(Integer, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    last_accessed_at = Column(DateTime, default=datetime.utcnow, index=True)
 
 
 class Database:
-    def __init__(self, db_url: str = "sqlite:///cerina.db"):
+    def __init__(
+        self,
+        db_url: str = "sqlite:///cerina.db",
+        checkpoint_path: str = "checkpoints.sqlite",
+    ):
         self.engine = create_engine(db_url)
+        if self.engine.dialect.name == "sqlite":
+            event.listen(self.engine, "connect", lambda conn, _record: apply_sqlite_pragmas(conn))
         Base.metadata.create_all(self.engine)
+        added = self._add_missing_columns()
+        self._add_missing_indexes()
+        if ("protocol_queries", "iteration_count") in added:
+            self.backfill_protocol_columns()
         self.Session = sessionmaker(bind=self.engine)
+
+        # Async engine on the same database for the FastAPI endpoints; the
+        # sync engine and Session stay for scripts and startup migrations.
+        self.async_engine = self._create_async_engine(db_url)
+        self.AsyncSession = async_sessionmaker(self.async_engine, expire_on_commit=False)
         
         # LangGraph checkpointer
         # self.checkpointer = SqliteSaver(connection=self.engine.raw_connection())
-        conn = sqlite3.connect("checkpoints.sqlite", check_same_thread=False)
-        self.checkpointer = SqliteSaver(conn)
+        self.checkpoint_path = checkpoint_path
+        self.checkpointer = PooledSqliteSaver(checkpoint_path, pragmas=sqlite_pragmas())
+
+        # Async checkpointer for the event loop; it binds to the running loop,
+        # so it is created lazily on first use.
+        self._async_checkpointer: Optional[PooledAsyncSqliteSaver] = None
+        self._async_checkpointer_lock = asyncio.Lock()
+        self._wal_checkpoints: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def _create_async_engine(db_url: str) -> AsyncEngine:
+        """Async engine for `db_url`; SQLite URLs use the aiosqlite driver."""
+        if db_url.startswith("sqlite://"):
+            db_url = "sqlite+aiosqlite://" + db_url[len("sqlite://"):]
+        engine = create_async_engine(db_url)
+        if engine.dialect.name == "sqlite":
+            event.listen(
+                engine.sync_engine, "connect", lambda conn, _record: apply_sqlite_pragmas(conn)
+            )
+        return engine
+
+    async def close_async_engine(self):
+        """Close pooled async connections (app shutdown); they are bound to the event loop."""
+        await self.async_engine.dispose()
+
+    def _add_missing_columns(self) -> set:
+        """
+        Add model columns missing from tables created by an older version.
+
+        create_all only creates absent tables, so nullable columns added to
+        an existing model are appended here with ALTER TABLE. Returns the
+        (table, column) pairs that were added.
+        """
+        added = set()
+        inspector = inspect(self.engine)
+        with self.engine.begin() as conn:
+            for table in Base.metadata.sorted_tables:
+                if not inspector.has_table(table.name):
+                    continue
+                existing = {column["name"] for column in inspector.get_columns(table.name)}
+                for column in table.columns:
+                    if column.name in existing:
+                        continue
+                    column_type = column.type.compile(dialect=self.engine.dialect)
+                    conn.execute(
+                        text(f'ALTER TABLE {table.name} ADD COLUMN "{column.name}" {column_type}')
+                    )
+                    added.add((table.name, column.name))
+        return added
+
+    def _add_missing_indexes(self):
+        """Create model indexes missing from tables created by an older version."""
+        with self.engine.begin() as conn:
+            for table in Base.metadata.sorted_tables:
+                for index in table.indexes:
+                    index.create(conn, checkfirst=True)
+
+    def backfill_protocol_columns(self) -> int:
+        """
+        Copy scores and iteration counts of rows saved before they had their
+        own columns out of the `metadata` JSON. Runs once, when the columns
+        are added; returns the number of rows updated.
+        """
+        with self.engine.begin() as conn:
+            result = conn.execute(
+                text(
+                    """
+                    UPDATE protocol_queries SET
+                        safety_score = json_extract(metadata, '$.safety_score'),
+                        empathy_score = json_extract(metadata, '$.empathy_score'),
+                        iteration_count = json_extract(metadata, '$.iteration_count')
+                    WHERE iteration_count IS NULL AND json_valid(metadata)
+                    """
+                )
+            )
+            return result.rowcount
+
+    async def get_async_checkpointer(self) -> PooledAsyncSqliteSaver:
+        """Return the shared async checkpointer, opening it on first use."""
+        async with self._async_checkpointer_lock:
+            if self._async_checkpointer is None:
+                self._async_checkpointer = await PooledAsyncSqliteSaver.connect(
+                    self.checkpoint_path,
+                    readers=settings.checkpoint_readers,
+                    pragmas=sqlite_pragmas(),
+                    write_batch_max=settings.checkpoint_write_batch_max,
+                )
+        return self._async_checkpointer
+
+    async def close_async_checkpointer(self):
+        """Flush and close the async checkpointer's connections (app shutdown)."""
+        if self._async_checkpointer is not None:
+            await self._async_checkpointer.aclose()
+            self._async_checkpointer = None
+
+    async def wal_checkpoint(self):
+        """
+        Checkpoint both WAL files with TRUNCATE, resetting them to zero bytes.
+        A checkpoint blocked by an open reader is retried next interval.
+        """
+        start = time.perf_counter()
+        results = []  # (busy, log pages, checkpointed pages) per store
+        if self.engine.dialect.name == "sqlite":
+            def checkpoint_engine():
+                with self.engine.connect() as conn:
+                    return tuple(conn.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)").one())
+
+            results.append(await asyncio.to_thread(checkpoint_engine))
+        if self._async_checkpointer is not None:
+            # On a connection of its own: the saver's writer task owns the
+            # transaction on its connection, so SQLite makes the checkpoint
+            # wait for it (busy_timeout) instead of running mid-batch
+            async with aiosqlite.connect(self.checkpoint_path) as conn:
+                for pragma in sqlite_pragmas():
+                    async with conn.execute(pragma):
+                        pass
+                async with conn.execute("PRAGMA wal_checkpoint(TRUNCATE)") as cursor:
+                    results.append(tuple(await cursor.fetchone()))
+        for busy, _, _ in results:
+            if busy:
+                metrics.inc("sqlite.wal_checkpoint_busy")
+        metrics.observe("sqlite.wal_checkpoint_seconds", time.perf_counter() - start)
+
+    async def _checkpoint_wal_periodically(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.wal_checkpoint()
+            except Exception:
+                logger.warning("WAL checkpoint failed", exc_info=True)
+
+    def start_wal_checkpoints(self):
+        """Start periodic WAL checkpoints (app startup)."""
+        interval = settings.sqlite_wal_checkpoint_interval_seconds
+        if interval > 0 and self._wal_checkpoints is None:
+            self._wal_checkpoints = asyncio.create_task(
+                self._checkpoint_wal_periodically(interval), name="cerina-wal-checkpoint"
+            )
+
+    async def stop_wal_checkpoints(self):
+        if self._wal_checkpoints is not None:
+            self._wal_checkpoints.cancel()
+            await asyncio.gather(self._wal_checkpoints, return_exceptions=True)
+            self._wal_checkpoints = None
+
+    async def aclose(self):
+        """
+        Release everything bound to the running event loop: the WAL
+        checkpoint task, the async checkpointer's writer task and
+        connections, and the async engine's pool. The app lifespan calls
+        this on shutdown; scripts driving the pipeline with asyncio.run
+        must call it too, or the loop never finishes.
+        """
+        await self.stop_wal_checkpoints()
+        await self.close_async_checkpointer()
+        await self.close_async_engine()
 
     
 #     def save_protocol(self, thread_id: str, state: Union[CerinasState, dict]):
@@ -63,48 +322,364 @@ class Database:
 #         session.commit()
 #         session.close()
 
-    def save_protocol(self, thread_id: str, state: Union[CerinasState, dict]):
-        """Insert or update a protocol in the database."""
+    @staticmethod
+    def _protocol_row(thread_id: str, state: Union[CerinasState, dict]) -> dict:
         if isinstance(state, dict):
             state = CerinasState(**state)
-
-        session = self.Session()
-        try:
-            # Try to load existing record for this thread_id
-            record = session.query(ProtocolQueryRecord).filter_by(
-                thread_id=thread_id
-            ).first()
-
-            if record is None:
-                # Create new record
-                record = ProtocolQueryRecord(
-                    id=thread_id,
-                    thread_id=thread_id,
-                    created_at=datetime.utcnow(),
-                )
-
-            # Update all mutable fields
-            record.user_intent = state.user_intent
-            record.original_query = state.original_query
-            record.status = state.status
-            record.final_protocol = state.final_protocol
-            record.human_approved = state.human_approval
-            record.metadata_json = json.dumps(
+        return {
+            "id": thread_id,
+            "thread_id": thread_id,
+            "created_at": datetime.utcnow(),
+            "user_intent": state.user_intent,
+            "original_query": state.original_query,
+            "status": state.status,
+            "final_protocol": state.final_protocol,
+            "human_approved": state.human_approval,
+            "safety_score": state.safety_score,
+            "empathy_score": state.empathy_score,
+            "iteration_count": state.iteration_count,
+            "input_tokens": state.token_usage.get("input_tokens", 0),
+            "output_tokens": state.token_usage.get("output_tokens", 0),
+            "metadata": json.dumps(
                 {
                     "safety_score": state.safety_score,
                     "empathy_score": state.empathy_score,
                     "iteration_count": state.iteration_count,
                     "agent_notes": state.agent_notes,
+                    "token_usage": state.token_usage,
                 }
+            ),
+        }
+
+    @staticmethod
+    def _protocol_upsert():
+        """INSERT ... ON CONFLICT(id) DO UPDATE; created_at keeps its first value."""
+        table = ProtocolQueryRecord.__table__
+        statement = sqlite_insert(table)
+        return statement.on_conflict_do_update(
+            index_elements=[table.c.id],
+            set_={
+                column.name: statement.excluded[column.name]
+                for column in table.columns
+                if column.name not in ("id", "created_at")
+            },
+        )
+
+    def save_protocol(self, thread_id: str, state: Union[CerinasState, dict]):
+        """Insert or update a protocol in a single statement."""
+        with self.engine.begin() as conn:
+            conn.execute(self._protocol_upsert(), self._protocol_row(thread_id, state))
+
+    def save_protocols(self, protocols: Iterable[Tuple[str, Union[CerinasState, dict]]]):
+        """Insert or update a batch of (thread_id, state) pairs in one transaction."""
+        rows = [self._protocol_row(thread_id, state) for thread_id, state in protocols]
+        if not rows:
+            return
+        with self.engine.begin() as conn:
+            conn.execute(self._protocol_upsert(), rows)
+
+    async def asave_protocol(self, thread_id: str, state: Union[CerinasState, dict]):
+        """Async save_protocol, for use on the event loop."""
+        async with self.async_engine.begin() as conn:
+            await conn.execute(self._protocol_upsert(), self._protocol_row(thread_id, state))
+
+    async def asave_protocols(self, protocols: Iterable[Tuple[str, Union[CerinasState, dict]]]):
+        """Async save_protocols."""
+        rows = [self._protocol_row(thread_id, state) for thread_id, state in protocols]
+        if not rows:
+            return
+        async with self.async_engine.begin() as conn:
+            await conn.execute(self._protocol_upsert(), rows)
+
+    def get_protocol(self, thread_id: str) -> Optional[ProtocolQueryRecord]:
+        session = self.Session()
+        try:
+            record = session.query(ProtocolQueryRecord).filter_by(thread_id=thread_id).first()
+            if record is not None:
+                session.expunge(record)
+            return record
+        finally:
+            session.close()
+
+    def list_protocols(
+        self,
+        limit: int = 10,
+        status: Optional[str] = None,
+        min_safety_score: Optional[float] = None,
+    ) -> List[ProtocolQueryRecord]:
+        """
+        Most recent protocols, newest first. Only the summary columns are
+        loaded. The ordering, alone or with a status filter, is served by an
+        index; min_safety_score is a range filter, so it is checked on the
+        rows that index walk visits (a sparse match scans further back).
+        """
+        session = self.Session()
+        try:
+            records = session.scalars(self._list_protocols_query(limit, status, min_safety_score)).all()
+            for record in records:
+                session.expunge(record)
+            return records
+        finally:
+            session.close()
+
+    @staticmethod
+    def _list_protocols_query(limit: int, status: Optional[str], min_safety_score: Optional[float]):
+        query = select(ProtocolQueryRecord).options(load_only(*PROTOCOL_SUMMARY_COLUMNS))
+        if status is not None:
+            query = query.where(ProtocolQueryRecord.status == status)
+        if min_safety_score is not None:
+            query = query.where(ProtocolQueryRecord.safety_score >= min_safety_score)
+        return query.order_by(ProtocolQueryRecord.created_at.desc()).limit(limit)
+
+    async def aget_protocol(self, thread_id: str) -> Optional[ProtocolQueryRecord]:
+        """Async get_protocol."""
+        async with self.AsyncSession() as session:
+            return await session.scalar(
+                select(ProtocolQueryRecord).where(ProtocolQueryRecord.thread_id == thread_id).limit(1)
             )
 
+    async def alist_protocols(
+        self,
+        limit: int = 10,
+        status: Optional[str] = None,
+        min_safety_score: Optional[float] = None,
+    ) -> List[ProtocolQueryRecord]:
+        """Async list_protocols."""
+        async with self.AsyncSession() as session:
+            result = await session.scalars(self._list_protocols_query(limit, status, min_safety_score))
+            return list(result.all())
+
+    def enqueue_job(
+        self,
+        thread_id: str,
+        user_intent: str,
+        original_query: str,
+        review_mode: Optional[str] = None,
+        model_routing: Optional[Dict[str, str]] = None,
+    ) -> GenerationJobRecord:
+        """Persist a queued generation job."""
+        session = self.Session()
+        try:
+            record = GenerationJobRecord(
+                thread_id=thread_id,
+                user_intent=user_intent,
+                original_query=original_query,
+                review_mode=review_mode,
+                model_routing=json.dumps(model_routing) if model_routing else None,
+                status="queued",
+                attempts=0,
+                enqueued_at=datetime.utcnow(),
+            )
             session.add(record)
             session.commit()
+            session.refresh(record)
+            session.expunge(record)
+            return record
         except Exception:
             session.rollback()
             raise
         finally:
             session.close()
 
+    async def aenqueue_job(
+        self,
+        thread_id: str,
+        user_intent: str,
+        original_query: str,
+        review_mode: Optional[str] = None,
+        model_routing: Optional[Dict[str, str]] = None,
+    ) -> GenerationJobRecord:
+        """Async enqueue_job."""
+        async with self.AsyncSession() as session:
+            record = GenerationJobRecord(
+                thread_id=thread_id,
+                user_intent=user_intent,
+                original_query=original_query,
+                review_mode=review_mode,
+                model_routing=json.dumps(model_routing) if model_routing else None,
+                status="queued",
+                attempts=0,
+                enqueued_at=datetime.utcnow(),
+            )
+            session.add(record)
+            await session.commit()
+            return record
+
+    def update_job(self, thread_id: str, **fields) -> Optional[GenerationJobRecord]:
+        """Update a job's status/timestamps and return the refreshed record."""
+        session = self.Session()
+        try:
+            record = session.get(GenerationJobRecord, thread_id)
+            if record is None:
+                return None
+            for key, value in fields.items():
+                setattr(record, key, value)
+            session.commit()
+            session.refresh(record)
+            session.expunge(record)
+            return record
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    async def aupdate_job(self, thread_id: str, **fields) -> Optional[GenerationJobRecord]:
+        """Async update_job."""
+        async with self.AsyncSession() as session:
+            record = await session.get(GenerationJobRecord, thread_id)
+            if record is None:
+                return None
+            for key, value in fields.items():
+                setattr(record, key, value)
+            await session.commit()
+            return record
+
+    def get_job(self, thread_id: str) -> Optional[GenerationJobRecord]:
+        session = self.Session()
+        try:
+            record = session.get(GenerationJobRecord, thread_id)
+            if record is not None:
+                session.expunge(record)
+            return record
+        finally:
+            session.close()
+
+    async def aget_job(self, thread_id: str) -> Optional[GenerationJobRecord]:
+        """Async get_job."""
+        async with self.AsyncSession() as session:
+            return await session.get(GenerationJobRecord, thread_id)
+
+    @staticmethod
+    def _stale_lease(stale_before: datetime):
+        """Running jobs whose owner stopped renewing the lease before `stale_before`."""
+        return and_(
+            GenerationJobRecord.status == "running",
+            or_(
+                GenerationJobRecord.heartbeat_at.is_(None),
+                GenerationJobRecord.heartbeat_at < stale_before,
+            ),
+        )
+
+    async def aclaim_job(self, thread_id: str, owner: str, stale_before: datetime) -> bool:
+        """
+        Mark a queued job (or one whose lease expired) as running under
+        `owner`. A single conditional UPDATE, so of several processes trying
+        to claim the same job exactly one succeeds.
+        """
+        now = datetime.utcnow()
+        async with self.AsyncSession() as session:
+            result = await session.execute(
+                update(GenerationJobRecord)
+                .where(
+                    GenerationJobRecord.thread_id == thread_id,
+                    or_(GenerationJobRecord.status == "queued", self._stale_lease(stale_before)),
+                )
+                .values(
+                    status="running",
+                    owner=owner,
+                    heartbeat_at=now,
+                    started_at=now,
+                    attempts=func.coalesce(GenerationJobRecord.attempts, 0) + 1,
+                )
+            )
+            await session.commit()
+            return result.rowcount == 1
+
+    async def arequeue_job(self, thread_id: str, stale_before: datetime) -> bool:
+        """
+        Queue a job again unless it is already queued or running under a live
+        lease. A single conditional UPDATE, so of concurrent resumes only one
+        re-queues the job.
+        """
+        async with self.AsyncSession() as session:
+            result = await session.execute(
+                update(GenerationJobRecord)
+                .where(
+                    GenerationJobRecord.thread_id == thread_id,
+                    or_(
+                        GenerationJobRecord.status.notin_(["queued", "running"]),
+                        self._stale_lease(stale_before),
+                    ),
+                )
+                .values(status="queued", owner=None)
+            )
+            await session.commit()
+            return result.rowcount == 1
+
+    async def arenew_job_lease(self, thread_id: str, owner: str) -> bool:
+        """Renew the lease of a job `owner` is running; False if it lost the job."""
+        async with self.AsyncSession() as session:
+            result = await session.execute(
+                update(GenerationJobRecord)
+                .where(
+                    GenerationJobRecord.thread_id == thread_id,
+                    GenerationJobRecord.owner == owner,
+                    GenerationJobRecord.status == "running",
+                )
+                .values(heartbeat_at=datetime.utcnow())
+            )
+            await session.commit()
+            return result.rowcount == 1
+
+    @staticmethod
+    def _failed_jobs_query(max_attempts: int):
+        return (
+            select(GenerationJobRecord)
+            .where(
+                GenerationJobRecord.status == "failed",
+                GenerationJobRecord.attempts < max_attempts,
+            )
+            .order_by(GenerationJobRecord.finished_at)
+        )
+
+    @staticmethod
+    def _pending_jobs_query(stale_before: Optional[datetime] = None):
+        running = (
+            GenerationJobRecord.status == "running"
+            if stale_before is None
+            else Database._stale_lease(stale_before)
+        )
+        return (
+            select(GenerationJobRecord)
+            .where(or_(GenerationJobRecord.status == "queued", running))
+            .order_by(GenerationJobRecord.enqueued_at)
+        )
+
+    def failed_jobs(self, max_attempts: int) -> List[GenerationJobRecord]:
+        """Failed jobs that have been attempted fewer than `max_attempts` times."""
+        session = self.Session()
+        try:
+            records = session.scalars(self._failed_jobs_query(max_attempts)).all()
+            for record in records:
+                session.expunge(record)
+            return records
+        finally:
+            session.close()
+
+    async def afailed_jobs(self, max_attempts: int) -> List[GenerationJobRecord]:
+        """Async failed_jobs."""
+        async with self.AsyncSession() as session:
+            return list((await session.scalars(self._failed_jobs_query(max_attempts))).all())
+
+    def pending_jobs(self) -> List[GenerationJobRecord]:
+        """Jobs that were queued or running when the process last stopped."""
+        session = self.Session()
+        try:
+            records = session.scalars(self._pending_jobs_query()).all()
+            for record in records:
+                session.expunge(record)
+            return records
+        finally:
+            session.close()
+
+    async def apending_jobs(self, stale_before: Optional[datetime] = None) -> List[GenerationJobRecord]:
+        """
+        Async pending_jobs. With `stale_before`, running jobs are only
+        included when their lease expired, i.e. no live process owns them.
+        """
+        async with self.AsyncSession() as session:
+            return list((await session.scalars(self._pending_jobs_query(stale_before))).all())
+
 
 db = Database()
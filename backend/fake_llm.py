@@ -0,0 +1,274 @@
+"""
+Offline stand-in for the LLM provider.
+
+Selected with `CERINA_LLM_BACKEND=fake`. Returns well-formed output for each
+agent (drafter text, safety-guardian JSON arrays, EMPATHY_SCORE/TONE_ISSUES/
+SUGGESTIONS critiques) with injectable latency, error rate and token counts,
+so the pipeline can be load-tested without network access or API spend.
+Output depends only on the prompt, so runs are reproducible. A simulated
+provider prefix cache reports cached input tokens and skips their prefill
+cost (CERINA_FAKE_LLM_MS_PER_INPUT_TOKEN). Per-model latency and failing
+models make model routing and fallback testable offline.
+"""
+import asyncio
+import hashlib
+import json
+import math
+import random
+import re
+from collections import OrderedDict
+from typing import Dict, List, Optional, Type
+
+from pydantic import BaseModel
+
+from backend.config import settings
+from backend.llm import LLMResult
+
+
+class FakeLLMError(Exception):
+    """Injected provider failure (see CERINA_FAKE_LLM_ERROR_RATE)."""
+
+    def __init__(self, message: str, retryable: bool = True):
+        super().__init__(message)
+        self.retryable = retryable  # see backend.resilience.is_retryable
+
+
+def _estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+class FakeLLMBackend:
+    name = "fake"
+
+    def __init__(
+        self,
+        latency_distribution: str = settings.fake_llm_latency_distribution,
+        latency_ms: float = settings.fake_llm_latency_ms,
+        latency_jitter_ms: float = settings.fake_llm_latency_jitter_ms,
+        ms_per_output_token: float = settings.fake_llm_ms_per_output_token,
+        ms_per_input_token: float = settings.fake_llm_ms_per_input_token,
+        prefix_cache_min_tokens: int = settings.fake_llm_prefix_cache_min_tokens,
+        error_rate: float = settings.fake_llm_error_rate,
+        model_latency_ms: Optional[Dict[str, float]] = None,
+        failing_models: Optional[List[str]] = None,
+        draft_tokens: int = settings.fake_llm_draft_tokens,
+        seed: Optional[int] = settings.fake_llm_seed,
+    ):
+        self.latency_distribution = latency_distribution
+        self.latency_ms = latency_ms
+        self.latency_jitter_ms = latency_jitter_ms
+        self.ms_per_output_token = ms_per_output_token
+        self.ms_per_input_token = ms_per_input_token
+        self.prefix_cache_min_tokens = prefix_cache_min_tokens
+        self._prefix_blocks: "OrderedDict[str, None]" = OrderedDict()
+        self.error_rate = error_rate
+        self.model_latency_ms = (
+            settings.fake_llm_model_latency_ms if model_latency_ms is None else model_latency_ms
+        )
+        self.failing_models = set(
+            settings.fake_llm_failing_models if failing_models is None else failing_models
+        )
+        self.draft_tokens = draft_tokens
+        self._rng = random.Random(seed)
+
+    # Provider-style prompt prefix cache: prompts are hashed in blocks of
+    # PREFIX_BLOCK_TOKENS and a prompt reuses the leading blocks seen before
+    PREFIX_BLOCK_TOKENS = 128
+    PREFIX_CACHE_BLOCKS = 50_000
+
+    def cached_prefix_tokens(self, text: str) -> int:
+        """Tokens of `text` served from the simulated prefix cache; remembers its blocks."""
+        block_chars = self.PREFIX_BLOCK_TOKENS * 4
+        digest = hashlib.sha256()
+        cached, hit = 0, True
+        for start in range(0, len(text) - block_chars + 1, block_chars):
+            digest.update(text[start:start + block_chars].encode("utf-8"))
+            key = digest.hexdigest()
+            if hit and key in self._prefix_blocks:
+                cached += self.PREFIX_BLOCK_TOKENS
+                self._prefix_blocks.move_to_end(key)
+            else:
+                hit = False
+                self._prefix_blocks[key] = None
+        while len(self._prefix_blocks) > self.PREFIX_CACHE_BLOCKS:
+            self._prefix_blocks.popitem(last=False)
+        return cached if cached >= self.prefix_cache_min_tokens else 0
+
+    def sample_latency(
+        self, output_tokens: int, uncached_input_tokens: int = 0, model: Optional[str] = None
+    ) -> float:
+        """Seconds to wait before answering."""
+        base = self.model_latency_ms.get(model, self.latency_ms)
+        jitter = self.latency_jitter_ms
+        if self.latency_distribution == "uniform":
+            delay = self._rng.uniform(base - jitter, base + jitter)
+        elif self.latency_distribution == "normal":
+            delay = self._rng.gauss(base, jitter)
+        elif self.latency_distribution == "lognormal":
+            # Long right tail with mean `base` and standard deviation `jitter`
+            if base > 0:
+                sigma = math.sqrt(math.log(1 + (jitter / base) ** 2))
+                delay = self._rng.lognormvariate(math.log(base) - sigma ** 2 / 2, sigma)
+            else:
+                delay = 0.0
+        elif self.latency_distribution == "none":
+            delay = 0.0
+        else:  # "fixed"
+            delay = base
+        delay += self.ms_per_output_token * output_tokens
+        delay += self.ms_per_input_token * uncached_input_tokens
+        return max(0.0, delay) / 1000
+
+    async def generate(
+        self,
+        agent: str,
+        model: str,
+        temperature: float,
+        prompt: str,
+        schema: Optional[Type[BaseModel]] = None,
+        max_tokens: Optional[int] = None,
+        system: str = "",
+    ) -> LLMResult:
+        full_prompt = f"{system}\n\n{prompt}" if system else prompt
+        text = self.respond(agent, full_prompt, structured=schema is not None)
+        truncated = bool(max_tokens) and _estimate_tokens(text) > max_tokens
+        if truncated:
+            # Cut off at the output ceiling like a provider would
+            text = text[: max_tokens * 4]
+        output_tokens = _estimate_tokens(text)
+        input_tokens = _estimate_tokens(full_prompt)
+        cached_input_tokens = self.cached_prefix_tokens(full_prompt)
+        await asyncio.sleep(
+            self.sample_latency(output_tokens, input_tokens - cached_input_tokens, model)
+        )
+
+        if model in self.failing_models:
+            raise FakeLLMError(f"Injected failure for {agent} on {model}", retryable=False)
+        if self.error_rate and self._rng.random() < self.error_rate:
+            raise FakeLLMError(f"Injected failure for {agent}")
+
+        return LLMResult(
+            text=text,
+            model=model,
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            cached_input_tokens=cached_input_tokens,
+            truncated=truncated,
+        )
+
+    # Canned responses -------------------------------------------------
+
+    def respond(self, agent: str, prompt: str, structured: bool = False) -> str:
+        if agent == "drafter":
+            return self._patch(prompt) if structured else self._draft(prompt)
+        if agent == "safety_guardian":
+            return self._safety_audit(prompt, structured)
+        if agent == "clinical_critic":
+            return self._critique(prompt, structured)
+        if agent == "combined_reviewer":
+            return json.dumps(
+                {
+                    "issues": json.loads(self._safety_audit(prompt, structured=True))["issues"],
+                    **json.loads(self._critique(prompt, structured=True)),
+                }
+            )
+        if agent == "synthesizer":
+            return self._finalize(prompt)
+        return "READY_TO_DRAFT"
+
+    # The first draft's steps read as instructions; reviewers flag that
+    # wording and revisions replace it
+    INSTRUCTIONAL = "Take a few minutes to notice"
+    SOFTENED = "When you feel ready, gently notice"
+
+    @staticmethod
+    def _revision(prompt: str) -> int:
+        revisions = [int(r) for r in re.findall(r"Revision (\d+)", prompt)]
+        return max(revisions) if revisions else 0
+
+    def _draft(self, prompt: str) -> str:
+        revision = self._revision(prompt) + 1
+        goal_match = re.search(r"THERAPEUTIC GOAL:\s*(.+)", prompt)
+        goal = goal_match.group(1).strip() if goal_match else "your goal"
+
+        # Revisions soften the steps once, so later drafts differ only in places
+        opener = self.INSTRUCTIONAL if revision == 1 else self.SOFTENED
+        steps = []
+        step_count = max(3, self.draft_tokens // 60)
+        for i in range(1, step_count + 1):
+            steps.append(
+                f"{i}. {opener} one small moment related to {goal.lower()} "
+                f"and write down what you observed, what you thought, and how you felt."
+            )
+
+        return "\n".join(
+            [
+                f"# Exercise: {goal}",
+                f"<!-- Revision {revision} -->",
+                "",
+                "## Context",
+                "This exercise offers a gentle, structured way to work toward your goal. "
+                "There is no right or wrong way to do it; go at your own pace.",
+                "",
+                "## Steps",
+                *steps,
+                "",
+                "## Reflection",
+                "What did you notice? Which step felt most manageable? "
+                "Be kind to yourself about whatever came up.",
+            ]
+        )
+
+    def _patch(self, prompt: str) -> str:
+        sections = [
+            {"index": int(index), "text": text.replace(self.INSTRUCTIONAL, self.SOFTENED)}
+            for index, text in re.findall(
+                r"SECTION (\d+):\n(.*?)\nEND SECTION \1", prompt, re.DOTALL
+            )
+        ]
+        return json.dumps({"sections": sections})
+
+    def _safety_audit(self, prompt: str, structured: bool) -> str:
+        issues = []
+        # Instructional steps get a moderate finding so the loop has work to do
+        if self.INSTRUCTIONAL in prompt:
+            issues.append(
+                {
+                    "line": "Steps",
+                    "severity": "moderate",
+                    "issue": "Steps may feel demanding for someone in acute distress",
+                    "suggestion": "Add a note that it is fine to pause or skip a step",
+                }
+            )
+        return json.dumps({"issues": issues} if structured else issues)
+
+    def _critique(self, prompt: str, structured: bool) -> str:
+        instructional = self.INSTRUCTIONAL in prompt
+        score = 78 if instructional else 90
+        issues = ["slightly instructional tone", "long step descriptions"] if instructional else []
+        suggestions = (
+            "Shorten the steps and add more validating language "
+            "so the exercise feels collaborative rather than prescriptive."
+        )
+        if structured:
+            return json.dumps(
+                {
+                    "empathy_score": score,
+                    "tone_issues": issues,
+                    "suggestions": suggestions,
+                    "sections": ["Steps"] if instructional else [],
+                }
+            )
+        return "\n".join(
+            [
+                f"EMPATHY_SCORE: {score}",
+                f"TONE_ISSUES: {', '.join(issues)}",
+                f"SUGGESTIONS: {suggestions}",
+            ]
+        )
+
+    def _finalize(self, prompt: str) -> str:
+        draft = prompt.split("Current draft:", 1)[-1].split("Guidelines:", 1)[0].strip()
+        draft = re.sub(r"<!-- Revision \d+ -->\n?", "", draft)
+        return f"{draft}\n\nYou are taking a meaningful step by doing this exercise. Well done."
+
@@ -1,43 +1,130 @@
+import functools
+from typing import Optional
 from langgraph.graph import StateGraph, END
+from langgraph.graph.state import CompiledStateGraph
 from backend.state import CerinasState
 from backend.agents.supervisor import supervisor_node
 from backend.agents.drafter import drafter_node
 from backend.agents.safety_guardian import safety_guardian_node
 from backend.agents.clinical_critic import clinical_critic_node
+from backend.agents.combined_reviewer import combined_reviewer_node
+from backend.agents.human_review import human_review_node
 from backend.agents.synthesizer import synthesizer_node
 from backend.database import db
+from backend.routing import Route, current_route, served_notes
+from backend.state import merge_agent_notes
+from backend.tokens import current_usage
 
 
-def build_graph():
+def metered(node):
+    """
+    Run a node with its request's model routing, adding the tokens its LLM
+    calls used (`token_usage`) and the models that served them (`agent_notes`)
+    to its update.
+    """
+    @functools.wraps(node)
+    async def run(state: CerinasState) -> dict:
+        usage = {}
+        route = Route(state.review_mode, state.model_routing, [])
+        usage_token = current_usage.set(usage)
+        route_token = current_route.set(route)
+        try:
+            update = await node(state)
+        finally:
+            current_usage.reset(usage_token)
+            current_route.reset(route_token)
+        if usage:
+            update = {**update, "token_usage": usage}
+        if route.served:
+            update = {
+                **update,
+                "agent_notes": merge_agent_notes(
+                    update.get("agent_notes", {}), served_notes(route.served)
+                ),
+            }
+        return update
+
+    return run
+
+
+def build_graph(checkpointer=None):
     graph = StateGraph(CerinasState)
 
-    graph.add_node("supervisor", supervisor_node)
-    graph.add_node("drafter", drafter_node)
-    graph.add_node("safety_guardian", safety_guardian_node)
-    graph.add_node("clinical_critic", clinical_critic_node)
-    graph.add_node("synthesizer", synthesizer_node)
+    graph.add_node("supervisor", metered(supervisor_node))
+    graph.add_node("drafter", metered(drafter_node))
+    graph.add_node("safety_guardian", metered(safety_guardian_node))
+    graph.add_node("clinical_critic", metered(clinical_critic_node))
+    graph.add_node("combined_reviewer", metered(combined_reviewer_node))
+    graph.add_node("human_review", human_review_node)
+    graph.add_node("synthesizer", metered(synthesizer_node))
 
-    graph.add_edge("supervisor", "drafter")
-    graph.add_edge("drafter", "safety_guardian")
-    graph.add_edge("safety_guardian", "clinical_critic")
+    # Thorough mode: both reviewers only read current_draft, so they run as
+    # parallel branches and the supervisor waits for both before deciding.
+    # They write disjoint fields, and agent_notes has a merging reducer.
+    # Fast mode: one combined reviewer call writes the same fields.
+    def route_to_review(state: CerinasState):
+        if state.review_mode == "fast":
+            return "combined_reviewer"
+        else:
+            return ["safety_guardian", "clinical_critic"]
 
-    def route_after_critique(state: CerinasState) -> str:
+    # The supervisor sends a converged draft straight to the human gate
+    # instead of paying for another drafting round first, and a draft whose
+    # review could not be parsed back to review (unchanged sections are reused)
+    def route_after_supervisor(state: CerinasState):
         if state.halted_for_human:
+            return "human_review"
+        elif state.status == "reviewing":
+            return route_to_review(state)
+        else:
+            return "drafter"
+
+    graph.add_conditional_edges(
+        "supervisor",
+        route_after_supervisor,
+        ["human_review", "drafter", "safety_guardian", "clinical_critic", "combined_reviewer"],
+    )
+
+    graph.add_conditional_edges(
+        "drafter",
+        route_to_review,
+        ["safety_guardian", "clinical_critic", "combined_reviewer"],
+    )
+    graph.add_edge(["safety_guardian", "clinical_critic"], "supervisor")
+    graph.add_edge("combined_reviewer", "supervisor")
+
+    # human_review interrupts until resumed; a rejection pauses again
+    def route_after_review(state: CerinasState) -> str:
+        if state.human_approval:
             return "synthesizer"
         else:
-            return "supervisor"
+            return "human_review"
 
     graph.add_conditional_edges(
-        "clinical_critic",
-        route_after_critique,
-        {"synthesizer": "synthesizer", "supervisor": "supervisor"},
+        "human_review",
+        route_after_review,
+        {"synthesizer": "synthesizer", "human_review": "human_review"},
     )
 
     graph.add_edge("synthesizer", END)
     graph.set_entry_point("supervisor")
 
-    # IMPORTANT: compile with db.checkpointer
-    return graph.compile(checkpointer=db.checkpointer)
+    # IMPORTANT: compile with a checkpointer so threads can be resumed
+    return graph.compile(checkpointer=checkpointer or db.checkpointer)
+
+
+_cerina_graph: Optional[CompiledStateGraph] = None
+
 
+async def get_graph() -> CompiledStateGraph:
+    """
+    Return the graph compiled against the async SQLite checkpointer.
 
-cerina_graph = build_graph()
+    Agent nodes are coroutines, so the graph must be driven with
+    `ainvoke`/`astream`; compiling is deferred until an event loop exists.
+    """
+    global _cerina_graph
+    checkpointer = await db.get_async_checkpointer()
+    if _cerina_graph is None or _cerina_graph.checkpointer is not checkpointer:
+        _cerina_graph = build_graph(checkpointer)
+    return _cerina_graph
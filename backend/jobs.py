@@ -0,0 +1,263 @@
+"""
+Durable job queue for asynchronous protocol generation.
+
+Jobs are persisted in the `generation_jobs` table before they are handed to
+an in-process pool of asyncio workers, so a restart re-queues anything that
+was still queued or running. Synchronous runs are tracked in the same table.
+A worker claims a job with one conditional UPDATE and renews a lease on it
+while it runs, so several processes can share the table: a job is only taken
+over by another process once its lease has expired.
+Retried runs (after a restart, by the periodic recovery of failed runs, or
+via POST /runs/{thread_id}/resume) continue from the thread's last
+checkpoint, so completed agent calls are not repeated.
+"""
+import asyncio
+import json
+import logging
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from backend.config import settings
+from backend.database import db, GenerationJobRecord
+from backend.metrics import metrics
+from backend.pipeline import NodeCallback, ThreadNotResumable, resume_run, run_generation
+from backend.state import CerinasState
+
+logger = logging.getLogger(__name__)
+
+
+class JobQueue:
+    def __init__(
+        self,
+        workers: int = settings.job_workers,
+        lease_seconds: float = settings.job_lease_seconds,
+    ):
+        self.workers = workers
+        self.lease_seconds = lease_seconds
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._recovery: Optional[asyncio.Task] = None
+        self._stopping = False
+        metrics.gauge("jobs.queue_depth", self.depth)
+        metrics.gauge("jobs.workers", lambda: len(self._tasks))
+
+    def depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def _stale_before(self) -> datetime:
+        """Leases last renewed before this have expired."""
+        return datetime.utcnow() - timedelta(seconds=self.lease_seconds)
+
+    async def start(self):
+        """
+        Start the worker pool and pick up queued jobs and jobs whose owner
+        stopped renewing their lease (a previous run of this process, or
+        another process that died). Jobs a live process is running are left alone.
+        """
+        self._queue = asyncio.Queue()
+        self._stopping = False
+        for record in await db.apending_jobs(self._stale_before()):
+            logger.info(f"Re-queueing job {record.thread_id} ({record.status})")
+            self._queue.put_nowait(record.thread_id)
+        self._tasks = [
+            asyncio.create_task(self._worker(i), name=f"cerina-job-worker-{i}")
+            for i in range(self.workers)
+        ]
+        if settings.recovery_interval_seconds > 0:
+            self._recovery = asyncio.create_task(self._recover(), name="cerina-job-recovery")
+
+    async def stop(self):
+        self._stopping = True
+        tasks = self._tasks + ([self._recovery] if self._recovery else [])
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks = []
+        self._recovery = None
+
+    async def enqueue(
+        self,
+        user_intent: str,
+        original_query: str,
+        review_mode: Optional[str] = None,
+        model_routing: Optional[Dict[str, str]] = None,
+    ) -> GenerationJobRecord:
+        thread_id = str(uuid.uuid4())
+        record = await db.aenqueue_job(
+            thread_id, user_intent, original_query, review_mode, model_routing
+        )
+        self._queue.put_nowait(thread_id)
+        metrics.inc("jobs.enqueued")
+        logger.info(f"Queued protocol generation: {thread_id} - {user_intent}")
+        return record
+
+    async def run_now(
+        self,
+        thread_id: str,
+        user_intent: str,
+        original_query: str,
+        review_mode: Optional[str] = None,
+        model_routing: Optional[Dict[str, str]] = None,
+        on_node: Optional[NodeCallback] = None,
+    ) -> CerinasState:
+        """
+        Run a generation in the caller's task (sync /generate), tracked like a
+        queued job so a failed or interrupted run is picked up by recovery.
+        """
+        await db.aenqueue_job(thread_id, user_intent, original_query, review_mode, model_routing)
+        return await self.run(thread_id, raise_errors=True, on_node=on_node)
+
+    async def stream_now(
+        self,
+        thread_id: str,
+        user_intent: str,
+        original_query: str,
+        review_mode: Optional[str] = None,
+        model_routing: Optional[Dict[str, str]] = None,
+    ) -> AsyncIterator[Tuple[str, object]]:
+        """
+        run_now for GET /generate/stream: yields ("node", {"node", "update"})
+        as each agent finishes, then ("complete", final state). Errors are
+        raised; closing the iterator early cancels the run like a client
+        disconnect on sync /generate.
+        """
+        updates: asyncio.Queue = asyncio.Queue()
+
+        async def on_node(node: str, update: dict):
+            updates.put_nowait({"node": node, "update": update})
+
+        run = asyncio.create_task(self.run_now(
+            thread_id, user_intent, original_query, review_mode, model_routing, on_node
+        ))
+        run.add_done_callback(lambda _: updates.put_nowait(None))
+        try:
+            while (update := await updates.get()) is not None:
+                yield "node", update
+            yield "complete", await run
+        finally:
+            if not run.done():
+                run.cancel()
+                await asyncio.gather(run, return_exceptions=True)
+
+    async def resume(self, thread_id: str) -> Optional[CerinasState]:
+        """Resume a failed run from its last checkpoint now (POST /runs/{thread_id}/resume)."""
+        job = await db.aget_job(thread_id)
+        if job is None:
+            # Threads from before runs were tracked
+            return await resume_run(thread_id)
+        if not await db.arequeue_job(thread_id, self._stale_before()):
+            job = await db.aget_job(thread_id)
+            raise ThreadNotResumable(f"Thread {thread_id} is already {job.status}")
+        return await self.run(thread_id, raise_errors=True)
+
+    async def _worker(self, index: int):
+        while True:
+            thread_id = await self._queue.get()
+            try:
+                await self.run(thread_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.error(f"Job worker {index} crashed on {thread_id}", exc_info=True)
+            finally:
+                self._queue.task_done()
+
+    async def _recover(self):
+        """
+        Periodically re-queue failed runs and runs whose lease expired; they
+        resume from their last checkpoint.
+        """
+        while True:
+            await asyncio.sleep(settings.recovery_interval_seconds)
+            for record in await db.apending_jobs(self._stale_before()):
+                if record.status == "running":
+                    logger.info(f"Taking over run {record.thread_id} (lease expired)")
+                    self._queue.put_nowait(record.thread_id)
+                    metrics.inc("jobs.lease_expired")
+            for record in await db.afailed_jobs(settings.recovery_max_attempts):
+                if not await db.arequeue_job(record.thread_id, self._stale_before()):
+                    continue  # resumed or recovered elsewhere meanwhile
+                logger.info(f"Recovering failed run {record.thread_id} (attempt {record.attempts + 1})")
+                self._queue.put_nowait(record.thread_id)
+                metrics.inc("jobs.recovered")
+
+    async def run(
+        self,
+        thread_id: str,
+        raise_errors: bool = False,
+        on_node: Optional[NodeCallback] = None,
+    ) -> Optional[CerinasState]:
+        """
+        Execute a queued job. Retries (recovery, restarts, explicit resume)
+        continue from the thread's last checkpoint instead of starting over.
+        """
+        job = await db.aget_job(thread_id)
+        if job is None or not await db.aclaim_job(thread_id, self.owner, self._stale_before()):
+            # Finished, or another worker or process holds it
+            return None
+
+        started_at = datetime.utcnow()
+        lease = asyncio.create_task(self._renew_lease(thread_id), name=f"cerina-job-lease-{thread_id}")
+        metrics.observe("jobs.wait_seconds", (started_at - job.enqueued_at).total_seconds())
+
+        state = None
+        try:
+            if job.attempts:
+                state = await resume_run(thread_id)
+                if state is not None:
+                    metrics.inc("jobs.resumed")
+            if state is None:
+                # First attempt, or the last one failed before any checkpoint
+                state = await run_generation(
+                    thread_id,
+                    job.user_intent,
+                    job.original_query,
+                    job.review_mode,
+                    json.loads(job.model_routing) if job.model_routing else None,
+                    on_node,
+                )
+        except asyncio.CancelledError:
+            # Shutdown: the next start picks the job up again. Otherwise the
+            # caller went away (client disconnect on a sync run): recovery or
+            # an explicit resume continues it
+            status = "queued" if self._stopping else "failed"
+            await asyncio.shield(db.aupdate_job(
+                thread_id, status=status, owner=None, error="cancelled", finished_at=datetime.utcnow()
+            ))
+            metrics.inc("jobs.cancelled")
+            raise
+        except ThreadNotResumable:
+            # An earlier attempt got to the end but was not marked as such
+            await db.aupdate_job(thread_id, status="succeeded", error=None, finished_at=datetime.utcnow())
+            if raise_errors:
+                raise
+        except Exception as e:
+            logger.error(f"Job failed: {thread_id} - {str(e)}", exc_info=True)
+            await db.aupdate_job(thread_id, status="failed", error=str(e), finished_at=datetime.utcnow())
+            metrics.inc("jobs.failed")
+            if raise_errors:
+                raise
+        else:
+            await db.aupdate_job(thread_id, status="succeeded", error=None, finished_at=datetime.utcnow())
+            metrics.inc("jobs.succeeded")
+        finally:
+            lease.cancel()
+            metrics.observe("jobs.run_seconds", (datetime.utcnow() - started_at).total_seconds())
+        return state
+
+    async def _renew_lease(self, thread_id: str):
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                if not await db.arenew_job_lease(thread_id, self.owner):
+                    logger.warning(f"Lost the lease on job {thread_id}")
+                    return
+            except Exception:
+                logger.warning(f"Could not renew the lease on job {thread_id}", exc_info=True)
+
+
+job_queue = JobQueue()
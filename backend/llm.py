@@ -0,0 +1,393 @@
+"""
+Shared LLM clients.
+
+Agents call `complete(agent, prompt)` instead of constructing ChatOpenAI on
+every call. Clients are created once per (model, temperature) profile and
+all of them share one tuned httpx connection pool, so agent hops reuse
+keep-alive connections instead of paying TCP/TLS setup each time. Responses
+go through the persistent cache in backend/llm_cache.py.
+
+The provider is pluggable: `CERINA_LLM_BACKEND=openai` (default) or `fake`
+for the offline stand-in in backend/fake_llm.py. Which model serves each
+agent call is decided by backend/routing.py.
+"""
+import asyncio
+import json
+import logging
+from dataclasses import dataclass
+from typing import Dict, List, NamedTuple, Optional, Protocol, Tuple, Type
+
+import httpx
+from langchain_openai import ChatOpenAI
+from pydantic import BaseModel
+
+from backend.config import settings
+from backend.llm_cache import llm_cache
+from backend.metrics import metrics
+from backend.resilience import call_resilient
+from backend.routing import model_chain, record_served
+from backend.structured import validates
+from backend.tokens import count_tokens, record_usage
+
+logger = logging.getLogger(__name__)
+
+
+class LLMProfile(NamedTuple):
+    model: str
+    temperature: float
+    max_tokens: Optional[int] = None  # output ceiling (CERINA_LLM_MAX_OUTPUT_TOKENS overrides)
+
+
+# Per-agent model settings; `model` is the last resort of the agent's routing chain
+AGENT_PROFILES: Dict[str, LLMProfile] = {
+    "supervisor": LLMProfile("gpt-4o-mini", 0, 64),
+    "drafter": LLMProfile("gpt-4o-mini", 0.7, 1500),
+    "safety_guardian": LLMProfile("gpt-4o-mini", 0, 800),
+    "clinical_critic": LLMProfile("gpt-4o-mini", 0.7, 600),
+    "combined_reviewer": LLMProfile("gpt-4o-mini", 0, 1200),
+    "synthesizer": LLMProfile("gpt-4o-mini", 0.5, 1500),
+}
+
+
+def max_output_tokens(agent: str) -> Optional[int]:
+    """Output token ceiling for an agent; 0 in the override means unlimited."""
+    ceiling = settings.llm_max_output_tokens.get(agent, AGENT_PROFILES[agent].max_tokens)
+    return ceiling or None
+
+
+@dataclass
+class LLMResult:
+    text: str
+    model: str
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cached_input_tokens: int = 0  # input served from the provider's prompt cache
+    cached: bool = False  # served from our response cache
+    truncated: bool = False  # stopped at the output ceiling
+
+
+class OutputTruncatedError(Exception):
+    """A free-text answer still hit the output ceiling after the retry."""
+
+    def __init__(self, agent: str, max_tokens: int):
+        super().__init__(f"{agent} output was cut off at {max_tokens} tokens")
+        self.agent = agent
+        self.max_tokens = max_tokens
+
+
+class LLMBackend(Protocol):
+    name: str
+
+    async def generate(
+        self,
+        agent: str,
+        model: str,
+        temperature: float,
+        prompt: str,
+        schema: Optional[Type[BaseModel]] = None,
+        max_tokens: Optional[int] = None,
+        system: str = "",
+    ) -> LLMResult: ...
+
+
+class LLMRegistry:
+    def __init__(
+        self,
+        max_connections: int = settings.llm_max_connections,
+        max_keepalive_connections: int = settings.llm_max_keepalive_connections,
+        keepalive_expiry: float = settings.llm_keepalive_expiry,
+        timeout: float = settings.llm_timeout,
+    ):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.timeout = httpx.Timeout(timeout, connect=10.0)
+        self._http_client: Optional[httpx.Client] = None
+        self._async_http_client: Optional[httpx.AsyncClient] = None
+        self._clients: Dict[Tuple[str, float, Optional[int]], ChatOpenAI] = {}
+        self.requests = 0
+
+    def _count_request(self, request: httpx.Request):
+        self.requests += 1
+
+    async def _acount_request(self, request: httpx.Request):
+        self.requests += 1
+
+    @property
+    def http_client(self) -> httpx.Client:
+        if self._http_client is None:
+            self._http_client = httpx.Client(
+                limits=self.limits,
+                timeout=self.timeout,
+                event_hooks={"request": [self._count_request]},
+            )
+        return self._http_client
+
+    @property
+    def async_http_client(self) -> httpx.AsyncClient:
+        if self._async_http_client is None:
+            self._async_http_client = httpx.AsyncClient(
+                limits=self.limits,
+                timeout=self.timeout,
+                event_hooks={"request": [self._acount_request]},
+            )
+        return self._async_http_client
+
+    def get(self, model: str, temperature: float, max_tokens: Optional[int] = None) -> ChatOpenAI:
+        """Return the shared client for a (model, temperature, max_tokens) profile."""
+        key = (model, float(temperature), max_tokens)
+        client = self._clients.get(key)
+        if client is None:
+            client = ChatOpenAI(
+                model=model,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                max_retries=0,  # retried by backend/resilience.py
+                http_client=self.http_client,
+                http_async_client=self.async_http_client,
+            )
+            self._clients[key] = client
+        return client
+
+    def for_agent(self, agent: str) -> ChatOpenAI:
+        profile = AGENT_PROFILES[agent]
+        return self.get(profile.model, profile.temperature, max_output_tokens(agent))
+
+    def pool_stats(self) -> dict:
+        """Client and connection pool statistics for /metrics."""
+        connections = []
+        for http in (self._http_client, self._async_http_client):
+            pool = getattr(getattr(http, "_transport", None), "_pool", None)
+            connections.extend(getattr(pool, "connections", []))
+        idle = sum(1 for conn in connections if conn.is_idle())
+        return {
+            "clients": len(self._clients),
+            "requests": self.requests,
+            "connections": len(connections),
+            "idle_connections": idle,
+            "active_connections": len(connections) - idle,
+            "max_connections": self.limits.max_connections,
+            "max_keepalive_connections": self.limits.max_keepalive_connections,
+        }
+
+    async def aclose(self):
+        if self._async_http_client is not None:
+            await self._async_http_client.aclose()
+            self._async_http_client = None
+        if self._http_client is not None:
+            self._http_client.close()
+            self._http_client = None
+        self._clients.clear()
+
+
+llm_registry = LLMRegistry()
+metrics.gauge("llm.pool", llm_registry.pool_stats)
+
+
+def get_llm(agent: str) -> ChatOpenAI:
+    """Shared client for an agent's profile in AGENT_PROFILES."""
+    return llm_registry.for_agent(agent)
+
+
+def response_format(schema: Type[BaseModel]) -> dict:
+    """OpenAI `json_schema` response format for a Pydantic model."""
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": schema.__name__,
+            "schema": schema.model_json_schema(),
+            "strict": False,
+        },
+    }
+
+
+class OpenAIBackend:
+    name = "openai"
+
+    def __init__(self, registry: LLMRegistry = llm_registry):
+        self.registry = registry
+
+    async def generate(
+        self,
+        agent: str,
+        model: str,
+        temperature: float,
+        prompt: str,
+        schema: Optional[Type[BaseModel]] = None,
+        max_tokens: Optional[int] = None,
+        system: str = "",
+    ) -> LLMResult:
+        kwargs = {}
+        if schema is not None and settings.llm_structured_outputs:
+            kwargs["response_format"] = response_format(schema)
+        client = self.registry.get(model, temperature, max_tokens)
+        messages = [("system", system), ("human", prompt)] if system else prompt
+        message = await client.ainvoke(messages, **kwargs)
+        usage = getattr(message, "usage_metadata", None) or {}
+        finish_reason = (getattr(message, "response_metadata", None) or {}).get("finish_reason")
+        return LLMResult(
+            text=message.content,
+            model=model,
+            input_tokens=usage.get("input_tokens", 0),
+            output_tokens=usage.get("output_tokens", 0),
+            cached_input_tokens=(usage.get("input_token_details") or {}).get("cache_read", 0),
+            truncated=finish_reason == "length",
+        )
+
+
+_backend: Optional[LLMBackend] = None
+
+
+def get_backend() -> LLMBackend:
+    """The configured provider backend (CERINA_LLM_BACKEND)."""
+    global _backend
+    if _backend is None:
+        if settings.llm_backend == "fake":
+            from backend.fake_llm import FakeLLMBackend
+
+            _backend = FakeLLMBackend()
+        elif settings.llm_backend == "openai":
+            _backend = OpenAIBackend()
+        else:
+            raise ValueError(f"Unknown LLM backend: {settings.llm_backend}")
+    return _backend
+
+
+def set_backend(backend: Optional[LLMBackend]):
+    """Swap the provider backend (benchmarks); None re-reads the config."""
+    global _backend
+    _backend = backend
+
+
+async def _generate_with_fallback(
+    agent: str,
+    chain: List[str],
+    prompt: str,
+    schema: Optional[Type[BaseModel]],
+    system: str,
+    max_tokens: Optional[int],
+) -> LLMResult:
+    """
+    Call the models in `chain` in order until one answers.
+
+    A model that raises, or exceeds the agent's latency SLO, is skipped; the
+    last model in the chain runs without the SLO and its error propagates.
+    """
+    profile = AGENT_PROFILES[agent]
+    slo_ms = settings.llm_latency_slo_ms.get(agent)
+    failed: List[str] = []
+    backend = get_backend()
+    for model in chain:
+        last = model == chain[-1]
+        call = call_resilient(
+            backend.name,
+            agent,
+            model,
+            lambda model=model: backend.generate(
+                agent,
+                model,
+                profile.temperature,
+                prompt,
+                schema=schema,
+                max_tokens=max_tokens,
+                system=system,
+            ),
+        )
+        try:
+            if slo_ms and not last:
+                result = await asyncio.wait_for(call, slo_ms / 1000)
+            else:
+                result = await call
+        except Exception as e:
+            if last:
+                raise
+            if isinstance(e, asyncio.TimeoutError):
+                reason = f"exceeded {slo_ms:g}ms SLO"
+            else:
+                reason = f"{type(e).__name__}: {str(e)}"
+            logger.warning(f"{agent}: {model} failed ({reason}), falling back")
+            metrics.inc(f"llm.fallbacks.{agent}")
+            failed.append(model)
+            continue
+        result.model = model
+        record_served(agent, model, failed)
+        return result
+
+
+def _record_call(agent: str, full_prompt: str, result: LLMResult):
+    """Count a provider call's tokens in /metrics and the running node's usage."""
+    # Providers that don't report usage are counted locally
+    result.input_tokens = result.input_tokens or count_tokens(full_prompt, result.model)
+    result.output_tokens = result.output_tokens or count_tokens(result.text, result.model)
+    metrics.inc(f"llm.calls.{agent}")
+    metrics.inc(f"llm.models.{agent}.{result.model}")
+    metrics.inc("llm.input_tokens", result.input_tokens)
+    metrics.inc("llm.output_tokens", result.output_tokens)
+    metrics.inc("llm.cached_input_tokens", result.cached_input_tokens)
+    metrics.inc(f"llm.input_tokens.{agent}", result.input_tokens)
+    metrics.inc(f"llm.output_tokens.{agent}", result.output_tokens)
+    metrics.inc(f"llm.cached_input_tokens.{agent}", result.cached_input_tokens)
+    record_usage(agent, result.input_tokens, result.output_tokens, result.cached_input_tokens)
+
+
+async def complete(
+    agent: str, prompt: str, schema: Optional[Type[BaseModel]] = None, system: str = ""
+) -> LLMResult:
+    """
+    Run one agent LLM call, served from the response cache when possible.
+
+    `system` is the static prefix of a template in backend/prompts.py and
+    `prompt` its per-call suffix. With `schema`, the provider is asked for
+    JSON matching that model; the caller still parses `text` (see
+    backend/structured.py), and only a response that parses is cached.
+    Output is capped at the agent's ceiling (`max_output_tokens`); an
+    answer that stops at the ceiling is retried once with twice the room,
+    and free text that is still cut off raises OutputTruncatedError rather
+    than being used. Token counts go to /metrics and the running node's
+    usage (backend/tokens.py).
+    """
+    profile = AGENT_PROFILES[agent]
+    chain = model_chain(agent, profile.model)
+    use_cache = llm_cache.enabled_for(agent, profile.temperature)
+    full_prompt = f"{system}\n\n{prompt}" if system else prompt
+    # The same prompt with a different response format is a different request
+    cache_key = full_prompt
+    if schema is not None:
+        cache_key += "\n\n" + json.dumps(schema.model_json_schema(), sort_keys=True)
+
+    if use_cache:
+        cached = await llm_cache.aget(agent, chain[0], profile.temperature, cache_key)
+        if cached is not None:
+            record_usage(
+                agent, count_tokens(full_prompt, chain[0]), count_tokens(cached, chain[0]),
+                cache_hit=True,
+            )
+            return LLMResult(text=cached, model=chain[0], cached=True)
+
+    ceiling = max_output_tokens(agent)
+    result = await _generate_with_fallback(agent, chain, prompt, schema, system, ceiling)
+    _record_call(agent, full_prompt, result)
+    if result.truncated and ceiling:
+        metrics.inc("llm.truncated")
+        metrics.inc(f"llm.truncated.{agent}")
+        ceiling *= 2
+        result = await _generate_with_fallback(agent, chain, prompt, schema, system, ceiling)
+        _record_call(agent, full_prompt, result)
+        if result.truncated:
+            metrics.inc("llm.truncated_after_retry")
+            metrics.inc(f"llm.truncated_after_retry.{agent}")
+            # Structured answers are left to the parser (a cut-off patch is
+            # rejected there); cut-off prose must not become a draft
+            if schema is None:
+                raise OutputTruncatedError(agent, ceiling)
+
+    # Only usable answers from the routed model are cached under its key; a
+    # refusal or truncated JSON would otherwise be replayed until it expires
+    usable = not result.truncated and (
+        validates(result.text, schema) if schema is not None else bool(result.text.strip())
+    )
+    if use_cache and result.model == chain[0] and usable:
+        await llm_cache.aset(agent, chain[0], profile.temperature, cache_key, result.text)
+    return result
@@ -0,0 +1,202 @@
+"""
+Persistent LLM response cache.
+
+Responses are stored in the `llm_cache` table keyed by a hash of
+(model, temperature, prompt), so a re-audit of an unchanged draft is served
+from SQLite instead of the provider. Only deterministic calls (temperature
+up to CERINA_LLM_CACHE_MAX_TEMPERATURE) are cached. Entries expire after a TTL and the table
+is kept under an entry/byte budget by evicting least recently used rows.
+"""
+import asyncio
+import hashlib
+import logging
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from sqlalchemy import func
+
+from backend.config import settings
+from backend.database import db, LLMCacheRecord
+from backend.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+def cache_key(model: str, temperature: float, prompt: str) -> str:
+    payload = f"{model}\x00{float(temperature)}\x00{prompt}".encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()
+
+
+class LLMCache:
+    def __init__(
+        self,
+        enabled: bool = settings.llm_cache_enabled,
+        ttl_seconds: int = settings.llm_cache_ttl_seconds,
+        max_entries: int = settings.llm_cache_max_entries,
+        max_bytes: int = settings.llm_cache_max_bytes,
+        max_temperature: float = settings.llm_cache_max_temperature,
+        bypass_agents: Optional[List[str]] = None,
+    ):
+        self.enabled = enabled
+        self.ttl = timedelta(seconds=ttl_seconds)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_temperature = max_temperature
+        self.bypass_agents = set(
+            settings.llm_cache_bypass_agents if bypass_agents is None else bypass_agents
+        )
+        # (entries, bytes) as of the last write or refresh, so /metrics can
+        # report the cache size without a query on the event loop
+        self._usage: Optional[Tuple[int, int]] = None
+
+    def enabled_for(self, agent: str, temperature: float) -> bool:
+        return (
+            self.enabled
+            and temperature <= self.max_temperature
+            and agent not in self.bypass_agents
+        )
+
+    def get(self, agent: str, model: str, temperature: float, prompt: str) -> Optional[str]:
+        key = cache_key(model, temperature, prompt)
+        session = db.Session()
+        try:
+            record = session.get(LLMCacheRecord, key)
+            now = datetime.utcnow()
+            if record is not None and now - record.created_at > self.ttl:
+                session.delete(record)
+                session.commit()
+                if self._usage is not None:
+                    count, total_bytes = self._usage
+                    self._usage = (count - 1, total_bytes - (record.size_bytes or 0))
+                metrics.inc("llm_cache.expired")
+                record = None
+
+            if record is None:
+                metrics.inc("llm_cache.misses")
+                metrics.inc(f"llm_cache.misses.{agent}")
+                return None
+
+            record.hits = (record.hits or 0) + 1
+            record.last_accessed_at = now
+            session.commit()
+            metrics.inc("llm_cache.hits")
+            metrics.inc(f"llm_cache.hits.{agent}")
+            return record.response
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    def set(self, agent: str, model: str, temperature: float, prompt: str, response: str):
+        now = datetime.utcnow()
+        session = db.Session()
+        try:
+            session.merge(
+                LLMCacheRecord(
+                    key=cache_key(model, temperature, prompt),
+                    agent=agent,
+                    model=model,
+                    temperature=float(temperature),
+                    response=response,
+                    size_bytes=len(response.encode("utf-8")),
+                    hits=0,
+                    created_at=now,
+                    last_accessed_at=now,
+                )
+            )
+            session.commit()
+            self._evict(session)
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    def _evict(self, session):
+        """Drop expired rows, then least recently used rows until within limits."""
+        expired = (
+            session.query(LLMCacheRecord)
+            .filter(LLMCacheRecord.created_at < datetime.utcnow() - self.ttl)
+            .delete(synchronize_session=False)
+        )
+
+        count, total_bytes = self._measure(session)
+
+        evicted = 0
+        if count > self.max_entries or total_bytes > self.max_bytes:
+            oldest = session.query(
+                LLMCacheRecord.key, LLMCacheRecord.size_bytes
+            ).order_by(LLMCacheRecord.last_accessed_at)
+            doomed = []
+            for key, size in oldest.yield_per(500):
+                if count <= self.max_entries and total_bytes <= self.max_bytes:
+                    break
+                doomed.append(key)
+                count -= 1
+                total_bytes -= size or 0
+            if doomed:
+                evicted = (
+                    session.query(LLMCacheRecord)
+                    .filter(LLMCacheRecord.key.in_(doomed))
+                    .delete(synchronize_session=False)
+                )
+
+        session.commit()
+        self._usage = (count, total_bytes)
+        if expired:
+            metrics.inc("llm_cache.expired", expired)
+        if evicted:
+            metrics.inc("llm_cache.evictions", evicted)
+
+    async def aget(self, agent: str, model: str, temperature: float, prompt: str) -> Optional[str]:
+        try:
+            return await asyncio.to_thread(self.get, agent, model, temperature, prompt)
+        except Exception as e:
+            # The cache must never take down a generation
+            logger.warning(f"LLM cache read failed: {str(e)}")
+            return None
+
+    async def aset(self, agent: str, model: str, temperature: float, prompt: str, response: str):
+        try:
+            await asyncio.to_thread(self.set, agent, model, temperature, prompt, response)
+        except Exception as e:
+            logger.warning(f"LLM cache write failed: {str(e)}")
+
+    @staticmethod
+    def _measure(session) -> Tuple[int, int]:
+        count, total_bytes = session.query(
+            func.count(LLMCacheRecord.key),
+            func.coalesce(func.sum(LLMCacheRecord.size_bytes), 0),
+        ).one()
+        return count, total_bytes
+
+    def refresh_usage(self):
+        session = db.Session()
+        try:
+            self._usage = self._measure(session)
+        finally:
+            session.close()
+
+    async def arefresh_usage(self):
+        try:
+            await asyncio.to_thread(self.refresh_usage)
+        except Exception as e:
+            logger.warning(f"LLM cache size check failed: {str(e)}")
+
+    def stats(self) -> dict:
+        """Cache settings and size; reads no rows, so it is safe on the event loop."""
+        count, total_bytes = self._usage or (None, None)
+        return {
+            "enabled": self.enabled,
+            "entries": count,
+            "bytes": total_bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "max_temperature": self.max_temperature,
+            "bypass_agents": sorted(self.bypass_agents),
+        }
+
+
+llm_cache = LLMCache()
+metrics.gauge("llm_cache", llm_cache.stats)
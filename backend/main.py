@@ -130,52 +130,62 @@
 #         "final_protocol": output.final_protocol
 #     }
 
-# @app.get("/status/{thread_id}")
-# async def get_status(thread_id: str) -> dict:
-#     """
-#     Get current state of a protocol generation.
-#     """
-#     config = {"configurable": {"thread_id": thread_id}}
-    
-#     # Fetch from checkpoint
-#     try:
-#         checkpoint = db.checkpointer.get(thread_id, None)
-#         if not checkpoint:
-#             raise ValueError("Thread not found")
-        
-#         # Reconstruct state from checkpoint (requires deserialization)
-#         # This is a simplified version; full implementation needs proper checkpoint parsing
-#         return {
-#             "thread_id": thread_id,
-#             "status": "unknown"  # TODO: implement proper deserialization
-#         }
-#     except Exception as e:
-#         raise HTTPException(status_code=404, detail=str(e))
-
 # if __name__ == "__main__":
 #     import uvicorn
 #     uvicorn.run(app, host="0.0.0.0", port=8000)
 
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, Literal
+from contextlib import asynccontextmanager
+import json
 import uuid
 import logging
 
-from backend.graph import cerina_graph
+from backend.graph import get_graph
 from backend.state import CerinasState
-from backend.database import db, ProtocolQueryRecord
+from backend.database import db
+from backend.jobs import job_queue
+from backend.llm import llm_registry
+from backend.llm_cache import llm_cache
+from backend.metrics import metrics
+from backend.resilience import CircuitOpenError
+from backend.routing import validate_overrides
+from backend.pipeline import (
+    resume_with_approval,
+    protocol_response,
+    thread_config,
+    ThreadNotAwaitingReview,
+    ThreadNotResumable,
+)
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Compile the graph against the async checkpointer inside the event loop
+    await get_graph()
+    await job_queue.start()
+    db.start_wal_checkpoints()
+    await llm_cache.arefresh_usage()
+    yield
+    await job_queue.stop()
+    await llm_registry.aclose()
+    await db.aclose()
+
+
 app = FastAPI(
     title="Cerina Protocol Foundry",
     description="Autonomous multi-agent system for designing CBT exercises",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
 # ⚠️ CRITICAL: CORSMiddleware FIRST, then GZIPMiddleware
@@ -194,10 +204,24 @@ app.add_middleware(
 )
 app.add_middleware(GZipMiddleware, minimum_size=1000)
 
+def provider_unavailable(error: CircuitOpenError) -> HTTPException:
+    """503 while the LLM provider's circuit breaker is open."""
+    return HTTPException(
+        status_code=503,
+        detail=str(error),
+        headers={"Retry-After": str(max(1, round(error.retry_after)))},
+    )
+
+
 # Request/Response models
+ReviewMode = Literal["thorough", "fast"]
+
+
 class ProtocolRequest(BaseModel):
     user_intent: str
     original_query: str
+    review_mode: Optional[ReviewMode] = None  # defaults to CERINA_REVIEW_MODE
+    model_routing: Optional[Dict[str, str]] = None  # agent -> model tier, e.g. {"drafter": "fast"}
 
 
 class ApprovalRequest(BaseModel):
@@ -406,64 +430,180 @@ async def health():
 #         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/generate", response_model=dict)
-async def generate_protocol(request: ProtocolRequest):
+async def generate_protocol(request: ProtocolRequest, mode: Literal["sync", "async"] = "sync"):
     """
     Trigger protocol generation.
 
-    Returns initial state after agents process until halt point.
+    mode=sync (default) returns the state after agents process until the halt
+    point. mode=async queues the run and returns 202 with the thread_id; poll
+    GET /status/{thread_id} for progress.
+
+    review_mode=fast reviews each draft with one combined reviewer call
+    instead of the Safety Guardian and Clinical Critic. model_routing
+    overrides the configured model tier per agent (400 for unknown tiers).
     """
+    try:
+        model_routing = validate_overrides(request.model_routing)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if mode == "async":
+        job = await job_queue.enqueue(
+            request.user_intent, request.original_query, request.review_mode, model_routing
+        )
+        return JSONResponse(
+            status_code=202,
+            content={
+                "thread_id": job.thread_id,
+                "status": job.status,
+                "status_url": f"/status/{job.thread_id}",
+            },
+        )
+
     thread_id = str(uuid.uuid4())
     logger.info(f"Generating protocol: {thread_id} - {request.user_intent}")
 
-    # Initial state as plain dict for LangGraph
-    initial_state = CerinasState(
-        user_intent=request.user_intent,
-        original_query=request.original_query,
-    )
-    initial_state_dict = initial_state.model_dump()
-
     try:
-        # LangGraph returns a dict[str, Any]
-        result = cerina_graph.invoke(
-            initial_state_dict,
-            config={"configurable": {"thread_id": thread_id}},
+        state = await job_queue.run_now(
+            thread_id,
+            request.user_intent,
+            request.original_query,
+            request.review_mode,
+            model_routing,
         )
+        return protocol_response(thread_id, state)
 
-        if not isinstance(result, dict):
-            raise RuntimeError(f"Graph returned non-dict result: {type(result)}")
+    except CircuitOpenError as e:
+        raise provider_unavailable(e)
+    except Exception as e:
+        logger.error(f"Error in protocol generation: {str(e)}", exc_info=True)
+        # The checkpoints survive: the client can resume instead of starting over
+        raise HTTPException(
+            status_code=500,
+            detail=f"{str(e)} (resume with POST /runs/{thread_id}/resume)",
+            headers={"X-Thread-Id": thread_id},
+        )
 
-        # Build a CerinasState from the dict so rest of backend stays the same
-        state = CerinasState(**result)
 
-        # Persist
-        db.save_protocol(thread_id, state)
-        logger.info(f"Protocol generation halted for review: {thread_id}")
+def format_sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(jsonable_encoder(data))}\n\n"
 
-        # Shape must match your ProtocolResponse type
-        return {
-            "thread_id": thread_id,
-            "status": state.status,
-            "current_draft": state.current_draft,
-            "safety_flags": [
-                {
-                    "line": f.line_num,
-                    "severity": f.severity,
-                    "issue": f.issue,
-                    "suggestion": f.suggestion,
-                }
-                for f in state.safety_flags
-            ],
-            "clinical_feedback": state.clinical_feedback,
-            "empathy_score": round(state.empathy_score, 1),
-            "safety_score": round(state.safety_score, 1),
-            "agent_notes": state.agent_notes,
-            "iteration_count": state.iteration_count,
-        }
 
+@app.get("/generate/stream")
+async def generate_protocol_stream(
+    user_intent: str,
+    original_query: str = "",
+    review_mode: Optional[ReviewMode] = None,
+    model_routing: Optional[str] = None,
+):
+    """
+    Trigger protocol generation and stream progress as Server-Sent Events.
+
+    Emits `start` with the thread_id, one `node` event per finished agent
+    carrying only the fields it changed, then `complete` with the same
+    payload as POST /generate (or `error`). Takes the same options as
+    POST /generate, with model_routing as a JSON object, and is tracked as a
+    job: GET /status and POST /runs/{thread_id}/resume work on the thread.
+    """
+    try:
+        overrides = json.loads(model_routing) if model_routing else None
+        if overrides is not None and not isinstance(overrides, dict):
+            raise ValueError("model_routing must be a JSON object")
+        model_routing = validate_overrides(overrides)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    thread_id = str(uuid.uuid4())
+    logger.info(f"Streaming protocol generation: {thread_id} - {user_intent}")
+
+    async def events():
+        yield format_sse("start", {"thread_id": thread_id})
+        try:
+            async for event, data in job_queue.stream_now(
+                thread_id, user_intent, original_query or user_intent, review_mode, model_routing
+            ):
+                if event == "complete":
+                    data = protocol_response(thread_id, data)
+                yield format_sse(event, data)
+        except Exception as e:
+            logger.error(f"Error in streamed generation: {str(e)}", exc_info=True)
+            yield format_sse("error", {
+                "thread_id": thread_id,
+                "detail": f"{str(e)} (resume with POST /runs/{thread_id}/resume)",
+            })
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.post("/runs/{thread_id}/resume", response_model=dict)
+async def resume_failed_run(thread_id: str):
+    """
+    Continue a failed or interrupted run from its last checkpoint.
+
+    Agents that already finished are not called again. Returns the same
+    payload as POST /generate; 409 when the run is still in progress,
+    finished, or waiting for human review (use /approve).
+    """
+    try:
+        state = await job_queue.resume(thread_id)
+    except ThreadNotResumable as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except CircuitOpenError as e:
+        raise provider_unavailable(e)
     except Exception as e:
-        logger.error(f"Error in protocol generation: {str(e)}", exc_info=True)
+        logger.error(f"Error resuming run {thread_id}: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
+    if state is None:
+        raise HTTPException(status_code=404, detail="Thread not found")
+    return protocol_response(thread_id, state)
+
+
+@app.get("/status/{thread_id}", response_model=dict)
+async def get_status(thread_id: str):
+    """
+    Get current state of a protocol generation.
+
+    Combines the job queue entry (if the run was queued) with the latest
+    checkpoint of the thread.
+    """
+    job = await db.aget_job(thread_id)
+
+    cerina_graph = await get_graph()
+    snapshot = await cerina_graph.aget_state(thread_config(thread_id))
+    if job is None and not snapshot.values:
+        raise HTTPException(status_code=404, detail="Thread not found")
+
+    response = {"thread_id": thread_id}
+    if job is not None:
+        response["job"] = {
+            "status": job.status,
+            "attempts": job.attempts,
+            "error": job.error,
+            "enqueued_at": job.enqueued_at.isoformat() if job.enqueued_at else None,
+            "started_at": job.started_at.isoformat() if job.started_at else None,
+            "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+        }
+
+    if snapshot.values:
+        state = CerinasState(**snapshot.values)
+        response.update(protocol_response(thread_id, state))
+        response["next_nodes"] = list(snapshot.next)
+    else:
+        response["status"] = job.status
+
+    return response
+
+
+@app.get("/metrics", response_model=dict)
+async def get_metrics():
+    """Queue depth, wait/run time distributions, LLM pool stats and counters."""
+    return metrics.snapshot()
+
 
 
 @app.post("/approve", response_model=dict)
@@ -476,51 +616,18 @@ async def approve_and_finalize(request: ApprovalRequest):
     logger.info(f"Approving protocol: {request.thread_id}")
 
     try:
-        # Retrieve protocol from DB using SQLAlchemy directly
-        session = db.Session()
-        record = session.query(ProtocolQueryRecord).filter_by(
-            thread_id=request.thread_id
-        ).first()
-        session.close()
+        # Resume the thread from its checkpoint; only the Synthesizer runs
+        output = await resume_with_approval(
+            request.thread_id,
+            request.human_approval,
+            request.human_edits or "",
+        )
 
-        if not record:
+        if output is None:
             logger.error(f"Protocol not found: {request.thread_id}")
             raise HTTPException(status_code=404, detail="Protocol not found")
 
-        logger.info(f"Retrieved protocol from DB: {request.thread_id}")
-
-        # Reconstruct minimal state needed for synthesis
-        state = CerinasState(
-            user_intent=record.user_intent,
-            original_query=record.original_query,
-        )
-        state.human_approval = request.human_approval
-        state.human_edits = request.human_edits or ""
-        state.halted_for_human = True
-        state.status = "halted"
-
-        logger.info(
-            f"State prepared: human_approval={state.human_approval}, "
-            f"edits_provided={len(state.human_edits) > 0}"
-        )
-
-        # Run graph so Synthesizer finalizes the protocol
-        logger.info("Invoking graph for synthesis...")
-        result = cerina_graph.invoke(
-            state,
-            config={"configurable": {"thread_id": request.thread_id}},
-        )
-
-        # If your graph returns a dict, wrap it back into CerinasState
-        if isinstance(result, dict):
-            output = CerinasState(**result)
-        else:
-            output = result
-
         logger.info(f"Graph execution complete: status={output.status}")
-
-        # Save updated protocol
-        db.save_protocol(request.thread_id, output)
         logger.info(f"Protocol finalized: {request.thread_id}")
 
         return {
@@ -531,6 +638,10 @@ async def approve_and_finalize(request: ApprovalRequest):
 
     except HTTPException:
         raise
+    except ThreadNotAwaitingReview as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except CircuitOpenError as e:
+        raise provider_unavailable(e)
     except Exception as e:
         logger.error(f"Error approving protocol: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
@@ -541,7 +652,7 @@ async def approve_and_finalize(request: ApprovalRequest):
 async def get_protocol(thread_id: str):
     """Retrieve a protocol by thread ID."""
     try:
-        record = db.get_protocol(thread_id)
+        record = await db.aget_protocol(thread_id)
         if not record:
             raise HTTPException(status_code=404, detail="Protocol not found")
         
@@ -552,6 +663,10 @@ async def get_protocol(thread_id: str):
             "final_protocol": record.final_protocol,
             "safety_score": record.safety_score,
             "empathy_score": record.empathy_score,
+            "iteration_count": record.iteration_count,
+            "human_approved": record.human_approved,
+            "input_tokens": record.input_tokens,
+            "output_tokens": record.output_tokens,
             "created_at": record.created_at.isoformat()
         }
     
@@ -559,18 +674,18 @@ async def get_protocol(thread_id: str):
         raise
     except Exception as e:
         logger.error(f"Error retrieving protocol: {str(e)}", exc_info=True)
-        raise HTTPException(status_code=404, detail=str(e))
+        raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get("/protocols", response_model=dict)
-async def list_protocols(limit: int = 10):
-    """List recent protocols."""
+async def list_protocols(
+    limit: int = Query(10, ge=1, le=100),
+    status: Optional[str] = None,
+    min_safety_score: Optional[float] = None,
+):
+    """List recent protocols, optionally filtered by status or minimum safety score."""
     try:
-        session = db.Session()
-        records = session.query(db.__class__.__dict__['ProtocolQueryRecord']).order_by(
-            db.__class__.__dict__['ProtocolQueryRecord'].created_at.desc()
-        ).limit(limit).all()
-        session.close()
+        records = await db.alist_protocols(limit, status, min_safety_score)
         
         return {
             "count": len(records),
@@ -581,6 +696,7 @@ async def list_protocols(limit: int = 10):
                     "status": r.status,
                     "safety_score": r.safety_score,
                     "empathy_score": r.empathy_score,
+                    "iteration_count": r.iteration_count,
                     "created_at": r.created_at.isoformat()
                 }
                 for r in records
@@ -6,9 +6,8 @@ import uuid
 from mcp.server import Server
 from mcp.types import Tool, TextContent, ToolResult
 
-from backend.graph import cerina_graph
-from backend.state import CerinasState
-from backend.database import db
+from backend import pipeline
+from backend.pipeline import run_generation, resume_with_approval
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -31,21 +30,12 @@ async def generate_cbt_protocol(user_intent: str) -> ToolResult:
     try:
         thread_id = str(uuid.uuid4())
         
-        # Create initial state
-        initial_state = CerinasState(
-            user_intent=user_intent,
-            original_query=user_intent
-        )
-        
-        # Run graph to completion (MCP skips human-in-loop)
-        output = cerina_graph.invoke(initial_state)
-        
-        # Finalize without human approval for MCP
-        output.human_approval = True
-        output.status = "finalized"
+        # Run graph until the human review halt
+        await run_generation(thread_id, user_intent, user_intent)
         
-        # Synthesize final protocol
-        output = cerina_graph.invoke(output)
+        # MCP skips human-in-loop: approve from the checkpoint so only the
+        # Synthesizer runs
+        output = await resume_with_approval(thread_id, human_approval=True)
         
         # Format response
         result = {
@@ -61,9 +51,6 @@ async def generate_cbt_protocol(user_intent: str) -> ToolResult:
             "timestamp": datetime.utcnow().isoformat()
         }
         
-        # Save to DB
-        db.save_protocol(thread_id, output)
-        
         logger.info(f"Protocol generated: {thread_id}")
         
         return ToolResult(
@@ -108,10 +95,13 @@ async def list_tools() -> list[Tool]:
 
 async def main():
     """Run MCP server via stdio."""
-    async with mcp_server:
-        logger.info("Cerina Foundry MCP server started on stdio")
-        while True:
-            await asyncio.sleep(1)
+    try:
+        async with mcp_server:
+            logger.info("Cerina Foundry MCP server started on stdio")
+            while True:
+                await asyncio.sleep(1)
+    finally:
+        await pipeline.aclose()
 
 
 if __name__ == "__main__":
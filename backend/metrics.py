@@ -0,0 +1,78 @@
+import threading
+from collections import deque
+from typing import Callable, Deque, Dict
+
+
+class Histogram:
+    """Rolling latency/size distribution over the most recent samples."""
+
+    def __init__(self, window: int = 2048):
+        self._samples: Deque[float] = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value: float):
+        self._samples.append(value)
+        self.count += 1
+        self.total += value
+
+    def percentile(self, pct: float) -> float:
+        if not self._samples:
+            return 0.0
+        ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "mean": round(self.total / self.count, 4) if self.count else 0.0,
+            "p50": round(self.percentile(50), 4),
+            "p95": round(self.percentile(95), 4),
+            "p99": round(self.percentile(99), 4),
+            "max": round(max(self._samples), 4) if self._samples else 0.0,
+        }
+
+
+class MetricsRegistry:
+    """
+    In-process metrics: counters, gauges and histograms keyed by name.
+
+    Gauges can also be registered as callables so values such as queue depth
+    are read live when `/metrics` is scraped.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, float] = {}
+        self._gauges: Dict[str, Callable[[], float]] = {}
+        self._histograms: Dict[str, Histogram] = {}
+
+    def inc(self, name: str, value: float = 1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def gauge(self, name: str, fn: Callable[[], float]):
+        with self._lock:
+            self._gauges[name] = fn
+
+    def observe(self, name: str, value: float):
+        with self._lock:
+            self._histograms.setdefault(name, Histogram()).observe(value)
+
+    def histogram(self, name: str) -> Histogram:
+        with self._lock:
+            return self._histograms.setdefault(name, Histogram())
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "counters": dict(self._counters),
+                "gauges": {name: fn() for name, fn in self._gauges.items()},
+                "histograms": {
+                    name: hist.snapshot() for name, hist in self._histograms.items()
+                },
+            }
+
+
+metrics = MetricsRegistry()
@@ -0,0 +1,182 @@
+"""
+Shared entry points for driving the Cerina graph.
+
+The HTTP handlers, the job queue workers and the MCP server all go through
+these helpers so a thread is run, persisted and reported the same way
+regardless of who triggered it.
+"""
+import logging
+from typing import Awaitable, Callable, Dict, Optional
+
+from langgraph.types import Command
+
+from backend.config import settings
+from backend.graph import get_graph
+from backend.llm import llm_registry
+from backend.state import CerinasState
+from backend.database import db
+
+logger = logging.getLogger(__name__)
+
+NodeCallback = Callable[[str, dict], Awaitable[None]]
+
+
+class ThreadNotAwaitingReview(Exception):
+    """The thread exists but is not paused at the human review gate."""
+
+
+class ThreadNotResumable(Exception):
+    """The thread has nothing left to run, or is waiting for human review."""
+
+
+def thread_config(thread_id: str) -> dict:
+    # REQUIRED for checkpointer: thread_id inside `configurable`
+    return {"configurable": {"thread_id": thread_id}}
+
+
+async def run_generation(
+    thread_id: str,
+    user_intent: str,
+    original_query: str,
+    review_mode: Optional[str] = None,
+    model_routing: Optional[Dict[str, str]] = None,
+    on_node: Optional[NodeCallback] = None,
+) -> CerinasState:
+    """
+    Run the graph for a new thread until the human review halt and persist it.
+
+    `on_node(node, update)` is awaited as each agent finishes, with only the
+    fields that node returned (GET /generate/stream forwards these).
+    """
+    initial_state = CerinasState(
+        user_intent=user_intent,
+        original_query=original_query,
+        review_mode=review_mode or settings.review_mode,
+        model_routing=model_routing or {},
+    )
+    config = thread_config(thread_id)
+
+    cerina_graph = await get_graph()
+    if on_node is None:
+        result = await cerina_graph.ainvoke(initial_state.model_dump(), config=config)
+    else:
+        async for chunk in cerina_graph.astream(
+            initial_state.model_dump(),
+            config=config,
+            stream_mode="updates",
+        ):
+            for node, update in chunk.items():
+                if node == "__interrupt__":
+                    # Paused at the human gate; the caller reports the final state
+                    continue
+                await on_node(node, update or {})
+        result = (await cerina_graph.aget_state(config)).values
+
+    if not isinstance(result, dict):
+        raise RuntimeError(f"Graph returned non-dict result: {type(result)}")
+
+    state = CerinasState(**result)
+    await db.asave_protocol(thread_id, state)
+    logger.info(f"Protocol generation halted for review: {thread_id}")
+    return state
+
+
+async def resume_run(thread_id: str) -> Optional[CerinasState]:
+    """
+    Continue a failed or interrupted run from its last checkpoint and persist it.
+
+    Invoking the graph without input makes LangGraph pick up the pending
+    tasks of the latest checkpoint. Nodes that already finished in that
+    step kept their writes, so only the failed or unfinished nodes and
+    what follows them run again. Returns None when the thread has no
+    checkpoint. Raises ThreadNotResumable when the run already finished or
+    is paused at the human gate (use resume_with_approval for that).
+    """
+    config = thread_config(thread_id)
+    cerina_graph = await get_graph()
+
+    snapshot = await cerina_graph.aget_state(config)
+    if not snapshot.values:
+        return None
+    if not snapshot.next:
+        raise ThreadNotResumable(f"Thread {thread_id} has already finished")
+    if "human_review" in snapshot.next:
+        raise ThreadNotResumable(f"Thread {thread_id} is waiting for human review")
+
+    logger.info(f"Resuming {thread_id} at {list(snapshot.next)}")
+    result = await cerina_graph.ainvoke(None, config=config)
+
+    state = CerinasState(**result)
+    await db.asave_protocol(thread_id, state)
+    return state
+
+
+async def resume_with_approval(
+    thread_id: str, human_approval: bool, human_edits: str = ""
+) -> Optional[CerinasState]:
+    """
+    Resume a thread paused at the human_review interrupt with the reviewer's
+    decision.
+
+    Only the nodes after the gate run (the synthesizer when approved), so the
+    reviewed draft is finalized without re-running the earlier agents.
+    Returns None when the thread has no checkpoint and raises
+    ThreadNotAwaitingReview when it is not paused at the gate.
+    """
+    config = thread_config(thread_id)
+    cerina_graph = await get_graph()
+
+    snapshot = await cerina_graph.aget_state(config)
+    if not snapshot.values:
+        return None
+    if "human_review" not in snapshot.next:
+        raise ThreadNotAwaitingReview(
+            f"Thread {thread_id} is not awaiting review (next: {list(snapshot.next)})"
+        )
+
+    result = await cerina_graph.ainvoke(
+        Command(resume={"human_approval": human_approval, "human_edits": human_edits or ""}),
+        config=config,
+    )
+
+    state = CerinasState(**result)
+    await db.asave_protocol(thread_id, state)
+    return state
+
+
+async def aclose():
+    """
+    Close the LLM clients and the database's async resources.
+
+    The FastAPI lifespan does this on shutdown; anything else driving the
+    pipeline (the MCP server, benchmarks, ad-hoc asyncio.run scripts) must
+    await it before its loop ends.
+    """
+    await llm_registry.aclose()
+    await db.aclose()
+
+
+def protocol_response(thread_id: str, state: CerinasState) -> dict:
+    """Shape a state the way the frontend's ProtocolResponse expects."""
+    return {
+        "thread_id": thread_id,
+        "status": state.status,
+        "current_draft": state.current_draft,
+        "safety_flags": [
+            {
+                "line": f.line_num,
+                "severity": f.severity,
+                "issue": f.issue,
+                "suggestion": f.suggestion,
+            }
+            for f in state.safety_flags
+        ],
+        "clinical_feedback": state.clinical_feedback,
+        "empathy_score": round(state.empathy_score, 1),
+        "safety_score": round(state.safety_score, 1),
+        "agent_notes": state.agent_notes,
+        "iteration_count": state.iteration_count,
+        "review_mode": state.review_mode,
+        "model_routing": state.model_routing,
+        "token_usage": state.token_usage,
+    }
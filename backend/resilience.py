@@ -0,0 +1,218 @@
+"""
+Resilience for provider calls.
+
+Every LLM attempt made by `complete()` goes through `call_resilient`:
+
+- a per-attempt timeout (CERINA_LLM_CALL_TIMEOUT),
+- retries of transient errors (connection errors, timeouts, 429s, 5xx) with
+  exponential backoff and full jitter,
+- optional hedging: once an attempt runs longer than the p95 latency seen
+  for that agent and model, a duplicate request is sent and the first
+  answer wins,
+- a circuit breaker per provider, which fails calls fast after repeated
+  failures and lets one trial call through after a cool-down.
+
+With these settings a single call is bounded by roughly
+timeout × (retries + 1) plus backoff, so /generate latency has a ceiling.
+"""
+import asyncio
+import logging
+import random
+import time
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+
+import httpx
+import openai
+
+from backend.config import settings
+from backend.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_RETRYABLE = (
+    asyncio.TimeoutError,
+    httpx.TransportError,
+    openai.APIConnectionError,  # includes APITimeoutError
+    openai.RateLimitError,
+    openai.InternalServerError,
+)
+
+
+class CircuitOpenError(Exception):
+    """The provider's circuit breaker is open; the call was not attempted."""
+
+    def __init__(self, provider: str, retry_after: float):
+        super().__init__(f"{provider} circuit open, retry in {retry_after:.0f}s")
+        self.provider = provider
+        self.retry_after = retry_after
+
+
+def is_retryable(error: BaseException) -> bool:
+    return isinstance(error, _RETRYABLE) or getattr(error, "retryable", False)
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure breaker: closed → open after `failure_threshold`
+    failures, half-open (one trial call) after `reset_seconds`, closed
+    again when the trial succeeds.
+    """
+
+    def __init__(
+        self,
+        provider: str,
+        failure_threshold: int = settings.llm_breaker_failure_threshold,
+        reset_seconds: float = settings.llm_breaker_reset_seconds,
+    ):
+        self.provider = provider
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_running = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return "half_open"
+        return "open"
+
+    def before_call(self):
+        state = self.state
+        if state == "open" or (state == "half_open" and self._trial_running):
+            retry_after = self.reset_seconds - (time.monotonic() - self.opened_at)
+            raise CircuitOpenError(self.provider, max(0.0, retry_after))
+        if state == "half_open":
+            self._trial_running = True
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+
+    def release_trial(self):
+        """The half-open trial ended without telling us about provider health."""
+        self._trial_running = False
+
+    def record_failure(self):
+        self.failures += 1
+        half_open = self._trial_running
+        self._trial_running = False
+        if self.failure_threshold and (half_open or self.failures >= self.failure_threshold):
+            if self.opened_at is None or half_open:
+                logger.warning(f"Circuit breaker for {self.provider} opened")
+                metrics.inc(f"llm.breaker_opened.{self.provider}")
+            self.opened_at = time.monotonic()
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def breaker_for(provider: str) -> CircuitBreaker:
+    if provider not in _breakers:
+        _breakers[provider] = CircuitBreaker(provider)
+    return _breakers[provider]
+
+
+def breaker_states() -> Dict[str, str]:
+    """Breaker state per provider for /metrics."""
+    return {provider: breaker.state for provider, breaker in _breakers.items()}
+
+
+metrics.gauge("llm.breakers", breaker_states)
+
+
+def backoff_delay(attempt: int) -> float:
+    """Full-jitter exponential backoff for retry `attempt` (1-based), in seconds."""
+    ceiling = min(settings.llm_retry_max_delay, settings.llm_retry_base_delay * 2 ** (attempt - 1))
+    return random.uniform(0, ceiling)
+
+
+async def _hedged(call: Callable[[], Awaitable[T]], hedge_after: Optional[float], label: str) -> T:
+    """Run `call`; if it is still running after `hedge_after` seconds, race a duplicate."""
+    tasks = [asyncio.ensure_future(call())]
+    try:
+        if hedge_after:
+            done, _ = await asyncio.wait(tasks, timeout=hedge_after)
+            if not done:
+                metrics.inc(f"llm.hedges.{label}")
+                tasks.append(asyncio.ensure_future(call()))
+
+        pending = set(tasks)
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    if task is not tasks[0]:
+                        metrics.inc(f"llm.hedge_wins.{label}")
+                    return task.result()
+                error = error or task.exception()
+        raise error
+    finally:
+        # The losing (or abandoned) request is cancelled
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+
+
+def _hedge_delay(label: str) -> Optional[float]:
+    if not settings.llm_hedge_enabled:
+        return None
+    latency = metrics.histogram(f"llm.latency_seconds.{label}")
+    if latency.count < settings.llm_hedge_min_samples:
+        return None
+    return latency.percentile(settings.llm_hedge_percentile)
+
+
+async def call_resilient(
+    provider: str, agent: str, model: str, call: Callable[[], Awaitable[T]]
+) -> T:
+    """
+    Run one provider call with timeout, retries, hedging and the provider's
+    circuit breaker. `call` must start a fresh request each time it is called.
+    """
+    label = f"{agent}.{model}"
+    breaker = breaker_for(provider)
+    timeout = settings.llm_call_timeout or None
+
+    async def attempt() -> T:
+        return await asyncio.wait_for(call(), timeout)
+
+    retries = 0
+    while True:
+        breaker.before_call()
+        start = time.perf_counter()
+        try:
+            result = await _hedged(attempt, _hedge_delay(label), label)
+        except asyncio.CancelledError:
+            breaker.release_trial()
+            raise
+        except Exception as e:
+            retryable = is_retryable(e)
+            # Only transient failures say something about the provider's health
+            if retryable:
+                breaker.record_failure()
+            else:
+                breaker.release_trial()
+            if isinstance(e, asyncio.TimeoutError):
+                metrics.inc(f"llm.timeouts.{agent}")
+            if not retryable or retries >= settings.llm_retries:
+                metrics.inc(f"llm.errors.{agent}")
+                raise
+            retries += 1
+            delay = backoff_delay(retries)
+            metrics.inc(f"llm.retries.{agent}")
+            logger.warning(
+                f"{agent}: {model} attempt {retries} failed ({type(e).__name__}), "
+                f"retrying in {delay:.2f}s"
+            )
+            await asyncio.sleep(delay)
+            continue
+        breaker.record_success()
+        metrics.observe(f"llm.latency_seconds.{label}", time.perf_counter() - start)
+        return result
@@ -0,0 +1,86 @@
+"""
+Per-agent model routing.
+
+Each agent is assigned a tier (CERINA_LLM_AGENT_TIERS, optionally per review
+mode as "<mode>.<agent>", and per request via `model_routing`), and each tier
+is an ordered fallback chain of models (CERINA_LLM_MODEL_TIERS). `complete()`
+tries the chain in order, moving on when a model errors or misses the
+agent's latency SLO (CERINA_LLM_LATENCY_SLO_MS); the agent's model in
+AGENT_PROFILES is always the last resort. The model that served each call is
+counted in /metrics and noted in `agent_notes` by the graph node wrapper.
+"""
+import contextvars
+from typing import Dict, List, NamedTuple, Optional
+
+from backend.config import settings
+
+
+class ServedCall(NamedTuple):
+    agent: str
+    model: str
+    fallback_from: List[str]  # models tried first that failed or were too slow
+
+
+class Route(NamedTuple):
+    review_mode: str
+    overrides: Dict[str, str]  # agent -> tier for this request
+    served: List[ServedCall]
+
+
+# Route of the graph node currently running (set by backend.graph.metered)
+current_route: contextvars.ContextVar[Optional[Route]] = contextvars.ContextVar(
+    "cerina_route", default=None
+)
+
+
+def validate_overrides(overrides: Optional[Dict[str, str]]) -> Dict[str, str]:
+    """Per-request agent -> tier overrides; raises ValueError for unknown tiers."""
+    overrides = overrides or {}
+    unknown = sorted(set(overrides.values()) - set(settings.llm_model_tiers))
+    if unknown:
+        raise ValueError(
+            f"Unknown model tier(s) {unknown}; configured: {sorted(settings.llm_model_tiers)}"
+        )
+    return overrides
+
+
+def agent_tier(agent: str, review_mode: str = "", overrides: Optional[Dict[str, str]] = None) -> str:
+    tiers = settings.llm_agent_tiers
+    return (
+        (overrides or {}).get(agent)
+        or tiers.get(f"{review_mode}.{agent}")
+        or tiers.get(agent)
+        or settings.llm_default_tier
+    )
+
+
+def model_chain(agent: str, default_model: str) -> List[str]:
+    """Models to try for one call of `agent`, in order."""
+    route = current_route.get()
+    tier = agent_tier(
+        agent,
+        route.review_mode if route else settings.review_mode,
+        route.overrides if route else None,
+    )
+    chain = list(dict.fromkeys(settings.llm_model_tiers.get(tier, [])))
+    if default_model not in chain:
+        chain.append(default_model)
+    return chain
+
+
+def record_served(agent: str, model: str, fallback_from: List[str]):
+    route = current_route.get()
+    if route is not None:
+        route.served.append(ServedCall(agent, model, fallback_from))
+
+
+def served_notes(served: List[ServedCall]) -> Dict[str, List[str]]:
+    """agent_notes entries naming the model(s) behind a node's calls."""
+    notes: Dict[str, List[str]] = {}
+    for call in served:
+        note = f"Model: {call.model}"
+        if call.fallback_from:
+            note += f" (fallback from {', '.join(call.fallback_from)})"
+        if note not in notes.get(call.agent, []):
+            notes.setdefault(call.agent, []).append(note)
+    return notes
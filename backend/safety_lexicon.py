@@ -0,0 +1,225 @@
+"""
+Lexical safety pre-screen.
+
+A deterministic scan the Safety Guardian runs before its LLM audit. Matches
+are hints, not verdicts: they tell the LLM which lines to look at closely
+(or, with CERINA_SAFETY_PRESCREEN_SCOPE=spans, are the only lines it sees),
+since CBT material routinely mentions suicidal thoughts, quotes distorted
+thoughts and uses idioms like "cut yourself some slack". Only the few
+high-precision phrases in the `definitive` category are reported without an
+LLM audit.
+
+Every phrase pattern is compiled into a single regex with one named group
+per category. Python's regex engine tries each alternative at every offset,
+so the draft is first searched for literal anchor words with str.find and
+the regex only runs on lines containing one, which keeps a multi-KB draft
+well under a millisecond (measure with
+`python -m backend.benchmarks.safety_prescreen`). Matches become SafetyFlags
+with real 1-based line numbers.
+
+Phrases on lines that point the reader to help (crisis lines, emergency
+services, a clinician) are not flagged, since safety resources routinely
+mention self-harm or medication.
+"""
+import re
+from typing import Dict, List, NamedTuple, Tuple
+
+from backend.state import SafetyFlag
+
+
+class LexiconCategory(NamedTuple):
+    severity: str
+    issue: str
+    suggestion: str
+    patterns: Tuple[str, ...]
+    # Lowercase literals, one of which occurs in every match (prefilter)
+    anchors: Tuple[str, ...]
+    # Reported without an LLM audit (keep to unambiguous phrases)
+    definitive: bool = False
+    # Ignore matches inside quotation marks (quoted thoughts, not advice)
+    skip_quoted: bool = False
+
+
+_DRUG = (
+    r"(?:medications?|meds|pills?|tablets?|capsules?|doses?|dosage|antidepressants?|"
+    r"ssris?|benzodiazepines?|sertraline|fluoxetine|citalopram|escitalopram|"
+    r"lorazepam|diazepam|alprazolam|xanax|zoloft|prozac|lithium)"
+)
+_UNIT = r"\d+(?:\.\d+)? ?(?:mg|milligrams?|mcg|ml)"
+
+
+LEXICON: Dict[str, LexiconCategory] = {
+    "definitive": LexiconCategory(
+        "critical",
+        "Language directing the reader toward self-harm",
+        "Remove this wording and add a note on reaching crisis support",
+        (
+            r"(?:ways|how) to (?:kill|hurt|harm) yourself",
+            r"you (?:should|deserve to) (?:die|kill yourself|hurt yourself|harm yourself)",
+            r"(?:everyone|the world) (?:would be|is) better off without you",
+        ),
+        ("yourself", "deserve to die", "should die", "without you"),
+        definitive=True,
+    ),
+    "self_harm": LexiconCategory(
+        "critical",
+        "Possible self-harm content",
+        "Check that self-harm is only discussed safely, with crisis support signposted",
+        (
+            # "cut yourself some slack" is a self-compassion idiom
+            r"(?:kill|hurt|harm|cut|burn|starve)(?:ing)? (?:yourself|myself)"
+            r"(?! (?:some |a little |a bit of )?slack)",
+            r"end (?:your|my) (?:own )?life",
+            r"suicid(?:e|al)",
+            r"self[- ]?harm(?:ing)?",
+            r"you deserve (?:to )?(?:pain|to suffer|to be punished|punishment)",
+            r"(?:no|not) worth living",
+        ),
+        ("yourself", "myself", "life", "suicid", "harm", "deserve", "worth living"),
+    ),
+    "medication_dosage": LexiconCategory(
+        "critical",
+        "Possible medication or dosage advice",
+        "Remove dosage guidance and refer medication questions to a prescriber",
+        (
+            r"(?:stop|quit|skip|halve|double) (?:taking )?(?:your |the )?"
+            r"(?:medications?|meds|antidepressants?|pills|dose|dosage)",
+            r"(?:increase|decrease|reduce|change) (?:your |the )?(?:dose|dosage)",
+            # Units only count next to a drug word ("250 ml of water" is fine)
+            rf"{_UNIT}(?: of)? (?:\w+ )?{_DRUG}",
+            rf"{_DRUG}(?: \w+){{0,3}} {_UNIT}",
+            r"take (?:\d+|one|two|three|four|extra|more) (?:pills|tablets|capsules)",
+        ),
+        ("medication", "meds", "antidepressant", "pill", "dose", "dosage", "tablet", "capsule",
+         "ssri", "benzodiazepine", "sertraline", "fluoxetine", "citalopram", "lorazepam",
+         "diazepam", "alprazolam", "xanax", "zoloft", "prozac", "lithium"),
+    ),
+    "coercion": LexiconCategory(
+        "moderate",
+        "Pressuring or coercive language",
+        "Rephrase as an invitation the reader can decline or pace themselves",
+        (
+            r"no excuses",
+            r"force yourself",
+            r"failure is not an option",
+            r"(?:don't|do not) stop until",
+            r"you will never (?:get better|recover|improve)",
+            r"(?:or else|you have no choice)",
+        ),
+        ("no excuses", "yourself", "not an option", "stop until", "will never", "or else",
+         "no choice"),
+        skip_quoted=True,
+    ),
+    "victim_blaming": LexiconCategory(
+        "moderate",
+        "Victim-blaming or invalidating language",
+        "Replace with validating language that does not assign blame",
+        (
+            r"(?:it's|it is) (?:all )?your (?:own )?fault",
+            r"you brought (?:this|it) on yourself",
+            r"you asked for it",
+            r"(?:only )?have yourself to blame",
+            r"just (?:get over it|snap out of it|cheer up|think positive)",
+            r"stop being (?:so )?(?:dramatic|sensitive|weak)",
+        ),
+        ("fault", "yourself", "asked for it", "to blame", "get over it", "snap out",
+         "cheer up", "think positive", "stop being"),
+        skip_quoted=True,
+    ),
+}
+
+_SCAN = re.compile(
+    "|".join(
+        rf"(?P<{name}>\b(?:{'|'.join(category.patterns)})\b)"
+        for name, category in LEXICON.items()
+    ),
+    re.IGNORECASE,
+)
+
+_ANCHORS = tuple(sorted({anchor for category in LEXICON.values() for anchor in category.anchors}))
+
+# Lines that direct the reader to help are not themselves harmful
+_SAFE_CONTEXT = re.compile(
+    r"\b(?:crisis|hotline|helpline|988|911|999|emergency|samaritans|"
+    r"reach out|seek (?:help|support)|contact|talk to|speak (?:to|with)|"
+    r"(?:your|a) (?:doctor|gp|psychiatrist|prescriber|therapist|clinician))\b",
+    re.IGNORECASE,
+)
+
+
+_QUOTES = "\"\u201c\u201d"
+
+
+def _quoted(draft: str, line_start: int, position: int) -> bool:
+    """Whether `position` falls inside quotation marks on its line."""
+    return sum(draft.count(quote, line_start, position) for quote in _QUOTES) % 2 == 1
+
+
+class PrescreenResult(NamedTuple):
+    flags: List[SafetyFlag]  # every match: hints for the LLM audit
+    definitive: List[SafetyFlag] = []  # matches reported without an audit
+
+    def hints(self, draft: str) -> str:
+        """Matched lines and why, for the LLM audit prompt."""
+        lines = draft.splitlines()
+        return "\n".join(
+            f"- line {flag.line_num}: \"{lines[flag.line_num - 1].strip()}\" ({flag.issue})"
+            for flag in self.flags
+        )
+
+    def spans(self, draft: str, context: int = 2) -> str:
+        """Flagged lines plus `context` lines around each, numbered as in the draft."""
+        lines = draft.splitlines()
+        keep = set()
+        for flag in self.flags:
+            start = max(1, flag.line_num - context)
+            keep.update(range(start, min(len(lines), flag.line_num + context) + 1))
+        return "\n".join(f"{number}: {lines[number - 1]}" for number in sorted(keep))
+
+
+def _candidate_lines(draft: str) -> List[Tuple[int, int]]:
+    """(start, end) offsets of lines containing at least one anchor, in order."""
+    lowered = draft.lower()
+    starts = set()
+    for anchor in _ANCHORS:
+        found = lowered.find(anchor)
+        while found >= 0:
+            start = lowered.rfind("\n", 0, found) + 1
+            starts.add(start)
+            end = lowered.find("\n", found)
+            if end < 0:
+                break
+            found = lowered.find(anchor, end)
+
+    lines = []
+    for start in sorted(starts):
+        end = draft.find("\n", start)
+        lines.append((start, len(draft) if end < 0 else end))
+    return lines
+
+
+def prescreen(draft: str) -> PrescreenResult:
+    """Scan a draft against LEXICON; at most one flag per (line, category)."""
+    flags: List[SafetyFlag] = []
+    definitive: List[SafetyFlag] = []
+    for start, end in _candidate_lines(draft):
+        seen = set()
+        for match in _SCAN.finditer(draft, start, end):
+            category = match.lastgroup
+            entry = LEXICON[category]
+            if category in seen or (entry.skip_quoted and _quoted(draft, start, match.start())):
+                continue
+            seen.add(category)
+            if _SAFE_CONTEXT.search(draft, start, end):
+                break
+
+            flag = SafetyFlag(
+                line_num=draft.count("\n", 0, start) + 1,
+                severity=entry.severity,
+                issue=f"{entry.issue}: \"{match.group()}\"",
+                suggestion=entry.suggestion,
+            )
+            flags.append(flag)
+            if entry.definitive:
+                definitive.append(flag)
+    return PrescreenResult(flags, definitive)
@@ -0,0 +1,108 @@
+"""
+Draft sections.
+
+Drafts are split at their headings (Markdown `#` headings, `**Bold**` lines
+or short `Label:` lines such as "Context:" / "Steps:" / "Reflection:") and
+each section is identified by a hash of its content. Reviewers keep their
+results per section hash in state, so on later iterations only sections the
+drafter actually changed are sent to the LLM again. The drafter's patch mode
+uses the same split to regenerate only flagged sections.
+"""
+import difflib
+import hashlib
+import re
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+_HEADING = re.compile(
+    r"^\s*(?:#{1,6}\s+\S.*|\*\*[^*\n]{1,80}\*\*:?|[A-Z][A-Za-z /&-]{1,40}:)\s*$"
+)
+
+
+class Section(NamedTuple):
+    heading: str
+    start_line: int  # 1-based line of the heading (or first line) in the draft
+    text: str
+    digest: str
+
+    @property
+    def end_line(self) -> int:
+        return self.start_line + self.text.count("\n")
+
+    def numbered(self) -> str:
+        """Section text with each line prefixed by its draft line number."""
+        return "\n".join(
+            f"{self.start_line + offset}: {line}"
+            for offset, line in enumerate(self.text.split("\n"))
+        )
+
+
+def section_digest(text: str) -> str:
+    normalized = "\n".join(line.rstrip() for line in text.strip().splitlines())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()[:16]
+
+
+def split_sections(draft: str) -> List[Section]:
+    """Split a draft at heading lines; text before the first heading is its own section."""
+    lines = draft.split("\n")
+    starts = [0] + [i for i, line in enumerate(lines) if i and _HEADING.match(line)]
+    sections = []
+    for index, start in enumerate(starts):
+        end = starts[index + 1] if index + 1 < len(starts) else len(lines)
+        text = "\n".join(lines[start:end]).rstrip()
+        if not text.strip():
+            continue
+        sections.append(
+            Section(
+                heading=lines[start].strip(),
+                start_line=start + 1,
+                text=text,
+                digest=section_digest(text),
+            )
+        )
+    return sections
+
+
+def changed_sections(sections: Iterable[Section], reviewed: Dict[str, object]) -> List[Section]:
+    """Sections whose content hash has no stored review."""
+    return [section for section in sections if section.digest not in reviewed]
+
+
+def heading_key(heading: str) -> str:
+    """Heading text without Markdown markers, for matching reviewer references."""
+    return re.sub(r"[#*:_]", "", heading).strip().lower()
+
+
+def matches_heading(section: Section, references: Iterable[str]) -> bool:
+    key = heading_key(section.heading)
+    return any(
+        ref_key and (ref_key in key or key in ref_key)
+        for ref_key in (heading_key(ref) for ref in references)
+    )
+
+
+def splice(draft: str, replacements: Dict[Section, str]) -> str:
+    """Replace whole sections of a draft, leaving every other line untouched."""
+    lines = draft.split("\n")
+    for section in sorted(replacements, key=lambda s: s.start_line, reverse=True):
+        new_lines = replacements[section].rstrip().split("\n")
+        lines[section.start_line - 1:section.end_line] = new_lines
+    return "\n".join(lines)
+
+
+def diff_summary(old: str, new: str) -> str:
+    """Line counts added/removed between two drafts, e.g. "+4/-3 lines"."""
+    added = removed = 0
+    for line in difflib.unified_diff(old.splitlines(), new.splitlines(), lineterm="", n=0):
+        if line.startswith("+") and not line.startswith("+++"):
+            added += 1
+        elif line.startswith("-") and not line.startswith("---"):
+            removed += 1
+    return f"+{added}/-{removed} lines"
+
+
+def section_for_line(sections: List[Section], line_num: int) -> Optional[Section]:
+    """The section containing a 1-based draft line, or None if no section does."""
+    for section in sections:
+        if section.start_line <= line_num <= section.end_line:
+            return section
+    return None
@@ -1,5 +1,6 @@
 from dataclasses import dataclass, field
-from typing import List, Dict, Any
+from typing import Annotated, List, Dict, Any
+import operator
 from datetime import datetime
 from pydantic import BaseModel, Field
 
@@ -10,6 +11,12 @@ class DraftVersion(BaseModel):
     created_at: datetime
     created_by: str
     notes: str = ""
+    diff_summary: str = ""
+
+class ScoreSnapshot(BaseModel):
+    iteration: int
+    safety_score: float
+    empathy_score: float
 
 class SafetyFlag(BaseModel):
     line_num: int
@@ -18,6 +25,29 @@ class SafetyFlag(BaseModel):
     suggestion: str
     resolved: bool = False
 
+class SectionCritique(BaseModel):
+    empathy_score: float
+    tone_issues: List[str] = Field(default_factory=list)
+    suggestions: str = ""
+
+def merge_agent_notes(
+    existing: Dict[str, List[str]], new: Dict[str, List[str]]
+) -> Dict[str, List[str]]:
+    """Reducer: nodes return only their new notes, which are appended per agent."""
+    merged = {agent: list(notes) for agent, notes in (existing or {}).items()}
+    for agent, notes in (new or {}).items():
+        merged.setdefault(agent, []).extend(notes)
+    return merged
+
+
+def merge_token_usage(existing: Dict[str, int], new: Dict[str, int]) -> Dict[str, int]:
+    """Reducer: nodes return the tokens their LLM calls used, which are summed per key."""
+    merged = dict(existing or {})
+    for key, value in (new or {}).items():
+        merged[key] = merged.get(key, 0) + value
+    return merged
+
+
 class CerinasState(BaseModel):
     # Input
     user_intent: str
@@ -25,7 +55,7 @@ class CerinasState(BaseModel):
     
     # Drafting
     current_draft: str = ""
-    draft_history: List[DraftVersion] = Field(default_factory=list)
+    draft_history: Annotated[List[DraftVersion], operator.add] = Field(default_factory=list)  # appended
     
     # Safety Review
     safety_flags: List[SafetyFlag] = Field(default_factory=list)
@@ -36,7 +66,22 @@ class CerinasState(BaseModel):
     empathy_score: float = 0.0
     tone_issues: List[str] = Field(default_factory=list)
     
+    # Per-section review results keyed by section content hash (backend/sections.py),
+    # so unchanged sections are not re-reviewed; flag line numbers are section-relative
+    safety_section_flags: Dict[str, List[SafetyFlag]] = Field(default_factory=dict)
+    critic_section_reviews: Dict[str, SectionCritique] = Field(default_factory=dict)
+    
+    # Set when a reviewer's response could not be parsed this round, so the
+    # supervisor does not mistake missing feedback for a clean review
+    safety_review_failed: bool = False
+    clinical_review_failed: bool = False
+    
+    # Convergence (one snapshot per review round, appended by the supervisor)
+    score_history: Annotated[List[ScoreSnapshot], operator.add] = Field(default_factory=list)
+    
     # Metadata
+    review_mode: str = "thorough"  # "thorough" (two reviewers) or "fast" (combined reviewer)
+    model_routing: Dict[str, str] = Field(default_factory=dict)  # agent -> model tier overrides
     iteration_count: int = 0
     max_iterations: int = 3
     status: str = "drafting"
@@ -44,8 +89,13 @@ class CerinasState(BaseModel):
     human_approval: bool = False
     human_edits: str = ""
     
-    # Audit trail
-    agent_notes: Dict[str, List[str]] = Field(default_factory=dict)
+    # Audit trail (nodes return {"agent_notes": {agent: [new notes]}})
+    agent_notes: Annotated[Dict[str, List[str]], merge_agent_notes] = Field(default_factory=dict)
+    
+    # Token accounting (backend/tokens.py): "input_tokens", "output_tokens",
+    # "cached_input_tokens" (provider prompt cache), "cache_hit_*" (response
+    # cache) and the same keys per agent ("drafter.input_tokens")
+    token_usage: Annotated[Dict[str, int], merge_token_usage] = Field(default_factory=dict)
     
     # Final result
     final_protocol: str = ""
@@ -0,0 +1,259 @@
+"""
+Structured reviewer outputs.
+
+The reviewers (and the drafter in patch mode) ask the provider for JSON matching
+the Pydantic models below (OpenAI `json_schema` response format). Responses
+are still parsed defensively: code fences, surrounding prose and truncated
+output are repaired where possible, and every outcome is counted in /metrics
+(`structured.parsed`, `structured.recovered`, `structured.parse_failures`,
+`structured.rejected_recovered`).
+"""
+import json
+import re
+from typing import Any, Callable, List, Literal, Optional, Tuple, Type, TypeVar
+
+from pydantic import BaseModel, ValidationError, field_validator, model_validator
+
+from backend.metrics import metrics
+
+SEVERITIES = ("critical", "moderate", "low")
+
+
+class SafetyIssue(BaseModel):
+    line: str = ""
+    severity: Literal["critical", "moderate", "low"] = "low"
+    issue: str
+    suggestion: str = ""
+
+    @field_validator("line", mode="before")
+    @classmethod
+    def _line_as_text(cls, value: Any) -> str:
+        return "" if value is None else str(value)
+
+    @field_validator("severity", mode="before")
+    @classmethod
+    def _normalize_severity(cls, value: Any) -> str:
+        value = str(value or "").strip().lower()
+        return value if value in SEVERITIES else "low"
+
+
+def _drop_incomplete_issues(data: Any) -> Any:
+    # A truncated response can end in an issue missing its fields
+    if isinstance(data, dict) and isinstance(data.get("issues"), list):
+        data = {
+            **data,
+            "issues": [
+                item for item in data["issues"]
+                if isinstance(item, dict) and item.get("issue")
+            ],
+        }
+    return data
+
+
+class SafetyAudit(BaseModel):
+    issues: List[SafetyIssue] = []
+
+    @model_validator(mode="before")
+    @classmethod
+    def _accept_bare_array(cls, data: Any) -> Any:
+        # The original prompt asked for a top-level array; keep accepting it
+        if isinstance(data, list):
+            data = {"issues": data}
+        return _drop_incomplete_issues(data)
+
+
+class ClinicalCritique(BaseModel):
+    empathy_score: float
+    tone_issues: List[str] = []
+    suggestions: str = ""
+    # Headings of the sections the tone issues refer to (empty: the whole draft)
+    sections: List[str] = []
+
+    @field_validator("empathy_score", mode="before")
+    @classmethod
+    def _clamp_score(cls, value: Any) -> float:
+        if isinstance(value, str):
+            match = re.search(r"-?\d+(?:\.\d+)?", value)
+            if match is None:
+                raise ValueError(f"no number in empathy_score {value!r}")
+            value = match.group()
+        return min(100.0, max(0.0, float(value)))
+
+    @field_validator("tone_issues", mode="before")
+    @classmethod
+    def _split_issues(cls, value: Any) -> Any:
+        if isinstance(value, str):
+            return [item.strip() for item in value.split(",") if item.strip()]
+        return value
+
+    @classmethod
+    def from_labeled_text(cls, text: str) -> Optional["ClinicalCritique"]:
+        """Parse the plain `EMPATHY_SCORE: / TONE_ISSUES: / SUGGESTIONS:` format."""
+        fields = {}
+        for label, key in (
+            ("EMPATHY_SCORE", "empathy_score"),
+            ("TONE_ISSUES", "tone_issues"),
+            ("SUGGESTIONS", "suggestions"),
+        ):
+            match = re.search(rf"^\W*{label}\W*:\s*(.*)$", text, re.MULTILINE)
+            if match:
+                fields[key] = match.group(1).strip().strip("[]")
+        if "empathy_score" not in fields:
+            return None
+        return cls.model_validate(fields)
+
+
+class PatchedSection(BaseModel):
+    index: int
+    text: str
+
+
+class DraftPatch(BaseModel):
+    """Revised sections returned by the drafter in patch mode."""
+
+    sections: List[PatchedSection] = []
+
+
+class CombinedReview(ClinicalCritique):
+    """Safety audit and clinical critique from the single fast-mode reviewer."""
+
+    issues: List[SafetyIssue] = []
+
+    @model_validator(mode="before")
+    @classmethod
+    def _complete_issues(cls, data: Any) -> Any:
+        return _drop_incomplete_issues(data)
+
+
+T = TypeVar("T", bound=BaseModel)
+
+_FENCE = re.compile(r"```[a-zA-Z]*\s*\n?(.*?)(?:```|$)", re.DOTALL)
+
+
+def _strip_fences(text: str) -> str:
+    match = _FENCE.search(text)
+    return match.group(1).strip() if match else text.strip()
+
+
+def _close_partial(text: str) -> Any:
+    """
+    Best-effort decode of truncated JSON.
+
+    One forward pass records, outside strings, every point where a value
+    ended and the brackets still open there; candidates are then tried from
+    the longest down, closing the open brackets, until one decodes.
+    """
+    stack: List[str] = []
+    cut_points: List[Tuple[int, str]] = []
+    in_string = escaped = False
+    for i, char in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+            continue
+        if char == '"':
+            in_string = True
+        elif char in "[{":
+            stack.append("]" if char == "[" else "}")
+        elif char in "]}":
+            if stack:
+                stack.pop()
+            cut_points.append((i + 1, "".join(reversed(stack))))
+        elif char == ",":
+            cut_points.append((i, "".join(reversed(stack))))
+
+    if in_string:
+        # Output stopped mid-string: keep what we have and close it
+        cut_points.append((len(text), '"' + "".join(reversed(stack))))
+    else:
+        cut_points.append((len(text), "".join(reversed(stack))))
+
+    for end, closers in reversed(cut_points):
+        try:
+            return json.loads(text[:end] + closers)
+        except json.JSONDecodeError:
+            continue
+    raise ValueError("no decodable JSON prefix")
+
+
+def load_json(text: str) -> Tuple[Any, bool]:
+    """
+    Decode model output as JSON.
+
+    Returns (value, recovered), where `recovered` is True when the raw text
+    was not valid JSON as-is (fenced, wrapped in prose or truncated).
+    Raises ValueError when nothing usable is found.
+    """
+    try:
+        return json.loads(text), False
+    except json.JSONDecodeError:
+        pass
+
+    body = _strip_fences(text)
+    starts = [i for i in (body.find("{"), body.find("[")) if i >= 0]
+    if not starts:
+        raise ValueError("no JSON object or array in response")
+    body = body[min(starts):]
+
+    try:
+        value, _ = json.JSONDecoder().raw_decode(body)
+        return value, True
+    except json.JSONDecodeError:
+        return _close_partial(body), True
+
+
+def validates(text: str, schema: Type[BaseModel]) -> bool:
+    """Whether `text` parses as `schema`, with the same repairs but no metrics."""
+    try:
+        schema.model_validate(load_json(text)[0])
+    except (ValueError, ValidationError):
+        return False
+    return True
+
+
+def parse_structured(
+    agent: str,
+    text: str,
+    schema: Type[T],
+    fallback: Optional[Callable[[str], Optional[T]]] = None,
+    allow_recovered: bool = True,
+) -> Optional[T]:
+    """
+    Validate a reviewer response against `schema`, or return None.
+
+    `fallback` is tried on text that is not JSON at all (e.g. a model that
+    ignored the response format); a successful fallback counts as recovered.
+    With `allow_recovered=False` only JSON that parsed as-is is accepted:
+    repairing a truncated score is harmless, but repaired content would end
+    mid-sentence.
+    """
+    result, recovered = None, False
+    try:
+        value, recovered = load_json(text)
+        result = schema.model_validate(value)
+    except (ValueError, ValidationError):
+        if fallback is not None:
+            try:
+                result, recovered = fallback(text), True
+            except (ValueError, ValidationError):
+                result = None
+
+    if result is not None and recovered and not allow_recovered:
+        metrics.inc("structured.rejected_recovered")
+        metrics.inc(f"structured.rejected_recovered.{agent}")
+        result = None
+
+    if result is None:
+        metrics.inc("structured.parse_failures")
+        metrics.inc(f"structured.parse_failures.{agent}")
+    elif recovered:
+        metrics.inc("structured.recovered")
+        metrics.inc(f"structured.recovered.{agent}")
+    else:
+        metrics.inc("structured.parsed")
+        metrics.inc(f"structured.parsed.{agent}")
+    return result
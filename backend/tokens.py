@@ -0,0 +1,100 @@
+"""
+Token accounting.
+
+Counts tokens with tiktoken when its encoding is available locally (it
+ships with langchain-openai but downloads BPE files on first use) and falls
+back to a ~4 characters per token heuristic otherwise. Agent calls are
+metered per graph node (see `metered` in backend/graph.py) and the totals
+are accumulated in `CerinasState.token_usage`, so budgets survive restarts
+with the checkpoint.
+"""
+import contextvars
+import logging
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+_encodings: Dict[str, object] = {}
+_tiktoken_unavailable = False
+
+# Usage of the graph node currently running (set by backend.graph.metered)
+current_usage: contextvars.ContextVar[Optional[Dict[str, int]]] = contextvars.ContextVar(
+    "cerina_token_usage", default=None
+)
+
+
+def _encoding(model: str):
+    global _tiktoken_unavailable
+    if _tiktoken_unavailable:
+        return None
+    if model not in _encodings:
+        try:
+            import tiktoken
+
+            try:
+                _encodings[model] = tiktoken.encoding_for_model(model)
+            except KeyError:
+                _encodings[model] = tiktoken.get_encoding("o200k_base")
+        except Exception as e:
+            # Not installed, or the BPE file can't be fetched (offline)
+            logger.warning(f"tiktoken unavailable, estimating tokens: {str(e)}")
+            _tiktoken_unavailable = True
+            return None
+    return _encodings[model]
+
+
+def count_tokens(text: str, model: str = "gpt-4o-mini") -> int:
+    if not text:
+        return 0
+    encoding = _encoding(model)
+    if encoding is None:
+        return max(1, len(text) // 4)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def trim_to_budget(text: str, max_tokens: int, model: str = "gpt-4o-mini") -> str:
+    """Cut `text` to at most `max_tokens` tokens, marking the cut."""
+    if max_tokens <= 0:
+        return ""
+    if count_tokens(text, model) <= max_tokens:
+        return text
+    marker = " …[trimmed]"
+    encoding = _encoding(model)
+    if encoding is None:
+        return text[: max_tokens * 4 - len(marker)].rstrip() + marker
+    tokens = encoding.encode(text, disallowed_special=())
+    return encoding.decode(tokens[: max(0, max_tokens - 3)]).rstrip() + marker
+
+
+def record_usage(
+    agent: str,
+    input_tokens: int,
+    output_tokens: int,
+    cached_input_tokens: int = 0,
+    cache_hit: bool = False,
+):
+    """
+    Add one agent call to the running node's usage, if a node is being metered.
+
+    `cached_input_tokens` is the part of the input the provider served from
+    its prompt cache; `cache_hit` marks a call answered by our response cache,
+    which is recorded under "cache_hit_*" keys and not billed.
+    """
+    usage = current_usage.get()
+    if usage is None:
+        return
+    prefix = "cache_hit_" if cache_hit else ""
+    counts = {
+        f"{prefix}input_tokens": input_tokens,
+        f"{prefix}output_tokens": output_tokens,
+    }
+    if cached_input_tokens:
+        counts["cached_input_tokens"] = cached_input_tokens
+    for key, value in counts.items():
+        for name in (key, f"{agent}.{key}"):
+            usage[name] = usage.get(name, 0) + value
+
+
+def billed_tokens(usage: Dict[str, int]) -> int:
+    """Input plus output tokens actually sent to the provider (cache hits excluded)."""
+    return usage.get("input_tokens", 0) + usage.get("output_tokens", 0)
@@ -6,13 +6,24 @@ interface AgentTimelineProps {
 }
 
 export default function AgentTimeline({ notes }: AgentTimelineProps) {
-  const agents = ["supervisor", "drafter", "safety_guardian", "clinical_critic", "synthesizer"];
+  // The combined reviewer only runs in fast review mode
+  const agents = [
+    "supervisor",
+    "drafter",
+    "safety_guardian",
+    "clinical_critic",
+    "combined_reviewer",
+    "human_review",
+    "synthesizer",
+  ].filter((agent) => agent !== "combined_reviewer" || notes[agent]?.length);
   
   const agentLabels: Record<string, string> = {
     supervisor: "Supervisor",
     drafter: "Drafter",
     safety_guardian: "Safety Guardian",
     clinical_critic: "Clinical Critic",
+    combined_reviewer: "Combined Reviewer",
+    human_review: "Human Review",
     synthesizer: "Synthesizer",
   };
 
@@ -69,49 +69,89 @@
 
 import { useState } from "react";
 import axios from "axios";
-import { ProtocolState, ProtocolResponse, ApprovalResponse } from "../types";
+import { ProtocolState, ProtocolResponse, ApprovalResponse, NodeUpdateEvent } from "../types";
 
 const API_BASE = process.env.REACT_APP_API_URL || "http://localhost:8000";
 
+// Merge the changed fields of one agent into the running state
+function applyNodeUpdate(prev: ProtocolState, update: NodeUpdateEvent["update"]): ProtocolState {
+  const agent_notes = { ...prev.agent_notes };
+  Object.entries(update.agent_notes || {}).forEach(([agent, notes]) => {
+    agent_notes[agent] = [...(agent_notes[agent] || []), ...notes];
+  });
+
+  return {
+    ...prev,
+    status: (update.status as ProtocolState["status"]) ?? prev.status,
+    current_draft: update.current_draft ?? prev.current_draft,
+    safety_flags: update.safety_flags
+      ? update.safety_flags.map((f) => ({ ...f, line: f.line_num }))
+      : prev.safety_flags,
+    clinical_feedback: update.clinical_feedback ?? prev.clinical_feedback,
+    empathy_score: update.empathy_score ?? prev.empathy_score,
+    safety_score: update.safety_score ?? prev.safety_score,
+    iteration_count: update.iteration_count ?? prev.iteration_count,
+    agent_notes,
+  };
+}
+
 export function useProtocolGenerator() {
   const [state, setState] = useState<ProtocolState | null>(null);
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState("");
 
-  const generate = async (userIntent: string, originalQuery: string) => {
-    setLoading(true);
-    setError("");
-    try {
-      const response = await axios.post<ProtocolResponse>(`${API_BASE}/generate`, {
+  const generate = (userIntent: string, originalQuery: string) =>
+    new Promise<void>((resolve) => {
+      setLoading(true);
+      setError("");
+
+      // Stream per-agent progress so the timeline fills in while agents run
+      const params = new URLSearchParams({
         user_intent: userIntent,
         original_query: originalQuery,
       });
+      const source = new EventSource(`${API_BASE}/generate/stream?${params}`);
 
-      const data = response.data;
-      console.log("GENERATE response:", data);
-
-      // Direct 1:1 mapping
-      const nextState: ProtocolState = {
-        thread_id: data.thread_id,
-        status: data.status as ProtocolState["status"],
-        current_draft: data.current_draft,
-        safety_flags: data.safety_flags,
-        clinical_feedback: data.clinical_feedback,
-        empathy_score: data.empathy_score,
-        safety_score: data.safety_score,
-        agent_notes: data.agent_notes,
-        iteration_count: data.iteration_count,
+      const finish = () => {
+        source.close();
+        setLoading(false);
+        resolve();
       };
 
-      setState(nextState);
-    } catch (err: any) {
-      console.error("GENERATE error:", err);
-      const errorMsg = err.response?.data?.detail || "Generation failed";
-      setError(errorMsg);
-    } finally {
-      setLoading(false);
-    }
-  };
+      source.addEventListener("start", (e) => {
+        const { thread_id } = JSON.parse((e as MessageEvent).data);
+        setState({
+          thread_id,
+          status: "drafting",
+          current_draft: "",
+          safety_flags: [],
+          clinical_feedback: "",
+          empathy_score: 0,
+          safety_score: 0,
+          agent_notes: {},
+          iteration_count: 0,
+        });
+      });
+
+      source.addEventListener("node", (e) => {
+        const { update } = JSON.parse((e as MessageEvent).data) as NodeUpdateEvent;
+        setState((prev) => (prev ? applyNodeUpdate(prev, update) : prev));
+      });
+
+      source.addEventListener("complete", (e) => {
+        const data = JSON.parse((e as MessageEvent).data) as ProtocolResponse;
+        console.log("GENERATE response:", data);
+        setState({ ...data, status: data.status as ProtocolState["status"] });
+        finish();
+      });
+
+      source.addEventListener("error", (e) => {
+        const data = (e as MessageEvent).data;
+        console.error("GENERATE error:", e);
+        setError(data ? JSON.parse(data).detail : "Generation failed");
+        finish();
+      });
+    });
 
   const approve = async (threadId: string, edits: string = "") => {
     setLoading(true);
@@ -53,6 +53,9 @@ export interface ProtocolState {
   safety_score: number;
   agent_notes: Record<string, string[]>;
   iteration_count: number;
+  review_mode?: "thorough" | "fast";
+  token_usage?: Record<string, number>;
+  model_routing?: Record<string, string>;
 }
 
 export interface ProtocolResponse extends ProtocolState {}  // simplify
@@ -62,3 +65,18 @@ export interface ApprovalResponse {
   status: string;
   final_protocol: string;
 }
+
+// One SSE `node` event from GET /generate/stream: only the fields that agent changed
+export interface NodeUpdateEvent {
+  node: string;
+  update: {
+    status?: string;
+    current_draft?: string;
+    safety_flags?: (Omit<SafetyFlag, "line"> & { line_num: number })[];
+    clinical_feedback?: string;
+    empathy_score?: number;
+    safety_score?: number;
+    iteration_count?: number;
+    agent_notes?: Record<string, string[]>;
+  };
+}
@@ -0,0 +1,16 @@
+"""
+Shared test setup.
+
+backend.database, backend.llm_cache and the checkpointer open their SQLite
+files in the working directory when imported, so the session runs from a
+scratch directory, with the fake LLM backend and no response cache.
+"""
+import os
+import tempfile
+
+os.environ.setdefault("CERINA_LLM_BACKEND", "fake")
+os.environ.setdefault("CERINA_LLM_CACHE_ENABLED", "false")
+
+
+def pytest_sessionstart(session):
+    os.chdir(tempfile.mkdtemp(prefix="cerina-tests-"))
@@ -0,0 +1,69 @@
+from backend.convergence import ConvergencePolicy
+from backend.state import CerinasState, SafetyFlag, ScoreSnapshot
+
+policy = ConvergencePolicy(safety_threshold=90, empathy_threshold=80, min_delta=2, token_budget=0)
+
+
+def state(**fields) -> CerinasState:
+    fields.setdefault("iteration_count", 1)
+    fields.setdefault("clinical_feedback", "Add more validating language.")
+    return CerinasState(user_intent="Sleep hygiene", original_query="Sleep hygiene", **fields)
+
+
+def history(*scores):
+    return [
+        ScoreSnapshot(iteration=i, safety_score=safety, empathy_score=empathy)
+        for i, (safety, empathy) in enumerate(scores, start=1)
+    ]
+
+
+def critical_flag() -> SafetyFlag:
+    return SafetyFlag(line_num=3, severity="critical", issue="Self-harm cue", suggestion="Remove it")
+
+
+def test_max_iterations_halts_before_other_rules():
+    decision = policy.evaluate(
+        state(iteration_count=3, safety_flags=[critical_flag()]), history((40, 40))
+    )
+    assert decision.halt and decision.rule == "max_iterations"
+
+
+def test_token_budget_halts_when_next_round_would_exceed_it():
+    budgeted = ConvergencePolicy(90, 80, 2, token_budget=1000)
+    usage = {"input_tokens": 500, "output_tokens": 100}
+    decision = budgeted.evaluate(state(token_usage=usage), history((40, 40)))
+    assert decision.halt and decision.rule == "token_budget"
+
+    decision = budgeted.evaluate(state(iteration_count=2, token_usage=usage), history((40, 40)))
+    assert decision.rule != "token_budget"
+
+
+def test_failed_review_keeps_iterating():
+    decision = policy.evaluate(state(clinical_review_failed=True), history((100, 100)))
+    assert not decision.halt and decision.rule == "review_failed"
+    assert "clinical" in decision.detail
+
+
+def test_critical_flag_keeps_iterating_above_thresholds():
+    decision = policy.evaluate(state(safety_flags=[critical_flag()]), history((95, 95)))
+    assert not decision.halt and decision.rule == "critical_safety"
+
+
+def test_quality_threshold_halts():
+    decision = policy.evaluate(state(), history((90, 80)))
+    assert decision.halt and decision.rule == "quality_threshold"
+
+
+def test_plateau_halts_when_both_scores_barely_move():
+    decision = policy.evaluate(state(), history((70, 60), (71, 59)))
+    assert decision.halt and decision.rule == "plateau"
+
+
+def test_one_improving_score_is_not_a_plateau():
+    decision = policy.evaluate(state(), history((70, 60), (71, 70)))
+    assert not decision.halt and decision.rule == "improving"
+
+
+def test_no_feedback_halts():
+    decision = policy.evaluate(state(clinical_feedback="  "), history((70, 60)))
+    assert decision.halt and decision.rule == "no_feedback"
@@ -0,0 +1,54 @@
+import asyncio
+import time
+
+import pytest
+
+from backend.database import Database
+from backend.state import CerinasState
+
+
+@pytest.fixture
+def database(tmp_path):
+    return Database(f"sqlite:///{tmp_path / 'cerina.db'}", str(tmp_path / "checkpoints.sqlite"))
+
+
+def protocol(**fields) -> CerinasState:
+    return CerinasState(user_intent="Sleep hygiene", original_query="Sleep hygiene", **fields)
+
+
+def test_upsert_updates_fields_but_keeps_created_at(database):
+    database.save_protocol("t1", protocol(status="halted", safety_score=70))
+    created_at = database.get_protocol("t1").created_at
+    time.sleep(0.01)
+
+    database.save_protocol("t1", protocol(status="finalized", safety_score=95, final_protocol="Done"))
+    record = database.get_protocol("t1")
+    assert record.created_at == created_at
+    assert (record.status, record.safety_score, record.final_protocol) == ("finalized", 95, "Done")
+    assert len(database.list_protocols()) == 1
+
+
+def test_batch_upsert_keeps_created_at(database):
+    database.save_protocol("t1", protocol(status="halted"))
+    created_at = database.get_protocol("t1").created_at
+    time.sleep(0.01)
+
+    database.save_protocols([("t1", protocol(status="finalized")), ("t2", protocol(status="halted"))])
+    assert database.get_protocol("t1").created_at == created_at
+    assert database.get_protocol("t1").status == "finalized"
+    assert database.get_protocol("t2").created_at > created_at
+
+
+def test_async_upsert_keeps_created_at(database):
+    async def run():
+        await database.asave_protocol("t1", protocol(status="halted"))
+        first = await database.aget_protocol("t1")
+        await asyncio.sleep(0.01)
+        await database.asave_protocol("t1", protocol(status="finalized"))
+        second = await database.aget_protocol("t1")
+        await database.aclose()
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert second.created_at == first.created_at
+    assert second.status == "finalized"
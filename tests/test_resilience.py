@@ -0,0 +1,126 @@
+import asyncio
+
+import httpx
+import pytest
+
+from backend import resilience
+from backend.config import settings
+from backend.resilience import CircuitBreaker, CircuitOpenError, backoff_delay, call_resilient
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(resilience.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_breaker_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker("test", failure_threshold=3, reset_seconds=30)
+    for _ in range(2):
+        breaker.before_call()
+        breaker.record_failure()
+    breaker.before_call()
+    breaker.record_success()  # a success resets the count
+    for _ in range(3):
+        breaker.before_call()
+        breaker.record_failure()
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError) as error:
+        breaker.before_call()
+    assert error.value.retry_after == 30
+
+
+def test_half_open_lets_one_trial_through(clock):
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_seconds=30)
+    breaker.before_call()
+    breaker.record_failure()
+    clock[0] += 30
+    assert breaker.state == "half_open"
+    breaker.before_call()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()  # a second caller while the trial runs
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+
+def test_failed_trial_reopens_for_a_full_period(clock):
+    breaker = CircuitBreaker("test", failure_threshold=5, reset_seconds=30)
+    for _ in range(5):
+        breaker.record_failure()
+    clock[0] += 30
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    clock[0] += 29
+    assert breaker.state == "open"
+
+
+def test_released_trial_allows_another(clock):
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_seconds=30)
+    breaker.record_failure()
+    clock[0] += 30
+    breaker.before_call()
+    breaker.release_trial()
+    breaker.before_call()
+    assert breaker.state == "half_open"
+
+
+def test_zero_threshold_disables_the_breaker():
+    breaker = CircuitBreaker("test", failure_threshold=0)
+    for _ in range(100):
+        breaker.record_failure()
+    assert breaker.state == "closed"
+
+
+def test_backoff_is_jittered_below_a_capped_exponential(monkeypatch):
+    monkeypatch.setattr(settings, "llm_retry_base_delay", 0.5)
+    monkeypatch.setattr(settings, "llm_retry_max_delay", 3.0)
+    monkeypatch.setattr(resilience.random, "uniform", lambda low, high: high)
+    assert [backoff_delay(attempt) for attempt in range(1, 6)] == [0.5, 1.0, 2.0, 3.0, 3.0]
+
+
+@pytest.fixture
+def fast_retries(monkeypatch):
+    monkeypatch.setattr(resilience, "_breakers", {})
+    monkeypatch.setattr(settings, "llm_retries", 2)
+    monkeypatch.setattr(settings, "llm_retry_base_delay", 0.0)
+    monkeypatch.setattr(settings, "llm_hedge_enabled", False)
+    monkeypatch.setattr(settings, "llm_call_timeout", 5.0)
+    monkeypatch.setattr(settings, "llm_breaker_failure_threshold", 10)
+
+
+def flaky(errors):
+    """A call that raises each of `errors` in turn, then returns "ok"."""
+    calls = []
+
+    async def call():
+        calls.append(1)
+        if len(calls) <= len(errors):
+            raise errors[len(calls) - 1]
+        return "ok"
+
+    return call, calls
+
+
+def test_transient_errors_are_retried(fast_retries):
+    call, calls = flaky([httpx.ConnectError("reset"), asyncio.TimeoutError()])
+    assert asyncio.run(call_resilient("test", "drafter", "model", call)) == "ok"
+    assert len(calls) == 3
+    assert resilience.breaker_for("test").failures == 0
+
+
+def test_retries_are_bounded(fast_retries):
+    call, calls = flaky([httpx.ConnectError("reset")] * 5)
+    with pytest.raises(httpx.ConnectError):
+        asyncio.run(call_resilient("test", "drafter", "model", call))
+    assert len(calls) == 3
+    assert resilience.breaker_for("test").failures == 3
+
+
+def test_permanent_errors_are_not_retried_or_counted(fast_retries):
+    call, calls = flaky([ValueError("bad request")])
+    with pytest.raises(ValueError):
+        asyncio.run(call_resilient("test", "drafter", "model", call))
+    assert len(calls) == 1
+    assert resilience.breaker_for("test").failures == 0
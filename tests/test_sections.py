@@ -0,0 +1,81 @@
+from backend.sections import (
+    changed_sections,
+    diff_summary,
+    matches_heading,
+    section_for_line,
+    splice,
+    split_sections,
+)
+
+DRAFT = "\n".join([
+    "A short introduction.",
+    "",
+    "## Steps",
+    "1. Breathe in for four counts.",
+    "2. Breathe out for six counts.",
+    "",
+    "Reflection:",
+    "Write down what you noticed.",
+])
+
+
+def test_split_at_headings():
+    sections = split_sections(DRAFT)
+    assert [(s.heading, s.start_line, s.end_line) for s in sections] == [
+        ("A short introduction.", 1, 1),
+        ("## Steps", 3, 5),
+        ("Reflection:", 7, 8),
+    ]
+    assert sections[1].numbered().splitlines()[0] == "3: ## Steps"
+
+
+def test_digest_ignores_trailing_whitespace_only():
+    before = split_sections(DRAFT)
+    assert [s.digest for s in split_sections(DRAFT.replace("counts.", "counts.  "))] == [
+        s.digest for s in before
+    ]
+    edited = split_sections(DRAFT.replace("six", "eight"))
+    reviewed = {s.digest: [] for s in before}
+    assert [s.heading for s in changed_sections(edited, reviewed)] == ["## Steps"]
+
+
+def test_section_for_line():
+    sections = split_sections(DRAFT)
+    assert section_for_line(sections, 4).heading == "## Steps"
+    assert section_for_line(sections, 8).heading == "Reflection:"
+    # Unknown, past the end, or outside the given sections: no guess
+    assert section_for_line(sections, 0) is None
+    assert section_for_line(sections, 99) is None
+    assert section_for_line(sections[2:], 4) is None
+
+
+def test_splice_replaces_only_the_given_sections():
+    sections = split_sections(DRAFT)
+    revised = splice(DRAFT, {sections[1]: "## Steps\n1. Breathe slowly.\n"})
+    assert revised.splitlines() == [
+        "A short introduction.",
+        "",
+        "## Steps",
+        "1. Breathe slowly.",
+        "",
+        "Reflection:",
+        "Write down what you noticed.",
+    ]
+    assert diff_summary(DRAFT, revised) == "+1/-2 lines"
+
+
+def test_splice_several_sections_keeps_line_numbers_valid():
+    sections = split_sections(DRAFT)
+    revised = splice(DRAFT, {
+        sections[0]: "A longer\nintroduction.",
+        sections[2]: "Reflection:\nNote one thing.",
+    })
+    assert revised.splitlines()[:2] == ["A longer", "introduction."]
+    assert revised.splitlines()[-1] == "Note one thing."
+    assert split_sections(revised)[1].text == sections[1].text
+
+
+def test_matches_heading_ignores_markup_and_case():
+    steps = split_sections(DRAFT)[1]
+    assert matches_heading(steps, ["**steps**"])
+    assert not matches_heading(steps, ["Reflection"])
@@ -0,0 +1,41 @@
+import pytest
+
+from backend.structured import SafetyAudit, _close_partial, load_json, parse_structured
+
+
+def test_close_partial_mid_string_keeps_the_partial_value():
+    assert _close_partial('{"issues": [{"issue": "Too vag') == {"issues": [{"issue": "Too vag"}]}
+
+
+def test_close_partial_drops_a_dangling_key():
+    assert _close_partial('{"a": [1, 2], "b": ') == {"a": [1, 2]}
+
+
+def test_close_partial_closes_nested_brackets():
+    assert _close_partial('{"a": {"b": [1, [2, 3') == {"a": {"b": [1, [2, 3]]}}
+
+
+def test_close_partial_ignores_brackets_and_escapes_inside_strings():
+    text = '{"a": "x]} \\" {[", "b": [1'
+    assert _close_partial(text) == {"a": 'x]} " {[', "b": [1]}
+
+
+def test_close_partial_without_a_decodable_prefix():
+    with pytest.raises(ValueError):
+        _close_partial('{"a')
+
+
+def test_load_json_reports_recovery():
+    assert load_json('{"a": 1}') == ({"a": 1}, False)
+    assert load_json('```json\n{"a": 1}\n```') == ({"a": 1}, True)
+    assert load_json('Here you go: [1, 2] Hope that helps.') == ([1, 2], True)
+    assert load_json('{"a": [1, 2') == ({"a": [1, 2]}, True)
+    with pytest.raises(ValueError):
+        load_json("no json here")
+
+
+def test_parse_structured_can_reject_recovered_output():
+    truncated = '{"issues": [{"line": "3", "severity": "low", "issue": "Jargon"}, {"line": "'
+    audit = parse_structured("safety_guardian", truncated, SafetyAudit)
+    assert [issue.issue for issue in audit.issues] == ["Jargon"]
+    assert parse_structured("safety_guardian", truncated, SafetyAudit, allow_recovered=False) is None